@@ -0,0 +1,98 @@
+#! /usr/bin/env python3
+"""Compare a full recursive planning pass with an incremental one, which
+skips the folders a folderindex.FolderIndex reports unchanged, on a tree
+where a share of the files is new.
+
+The tree holds files of a type that is not sorted (FOLDER/file.dat), which
+a recursive run sorting text files leaves in place, and the new text files
+are dropped in a random share (--spread) of the FOLDERs. Both passes plan the same moves; the
+incremental one includes loading and saving the folder states.
+
+Run from the project root:
+
+    python -m benchmarks.bench_incremental --files 1000000 --churn 0.01 --spread 0.01
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+from slib.helpers import DatabaseHelper
+from slib.planner import MovePlanner
+
+SCOPE = 'bench'
+
+
+def populate(path, files, folders):
+    per_folder = max(files // folders, 1)
+    for i in range(folders):
+        folder = os.path.join(path, 'folder_{}'.format(i))
+        os.makedirs(folder)
+        for j in range(per_folder):
+            open(os.path.join(folder, 'file_{}.dat'.format(j)), 'w').close()
+
+
+def add_churn(path, count, folders, spread):
+    changed = random.sample(range(folders), max(int(folders * spread), 1))
+    for i in range(count):
+        folder = os.path.join(path, 'folder_{}'.format(random.choice(changed)))
+        open(os.path.join(folder, 'new_{}.txt'.format(i)), 'w').close()
+
+
+def plan(path, index=None):
+    return MovePlanner(['txt']).plan_files(path, path, recursive=True, index=index)
+
+
+def plan_incremental(db_helper, path):
+    index = db_helper.get_folder_index(SCOPE)
+    # The tree was created moments ago, and is older than that in real use
+    index.racy_window = 0
+    result = plan(path, index)
+    db_helper.save_folder_index(SCOPE, index, path)
+    return result, index
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    return value, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=100000,
+                        help='number of files in the tree (default 100000)')
+    parser.add_argument('--folders', type=int, default=1000,
+                        help='number of folders they are spread across (default 1000)')
+    parser.add_argument('--churn', type=float, default=0.01,
+                        help='new files, as a share of --files (default 0.01)')
+    parser.add_argument('--spread', type=float, default=0.01,
+                        help='folders the new files are dropped in, as a share of '
+                        '--folders (default 0.01)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        tree = os.path.join(path, 'tree')
+        print('Creating {} files in {} folders...'.format(args.files, args.folders))
+        populate(tree, args.files, args.folders)
+        db_helper = DatabaseHelper(os.path.join(path, 'operations.db'))
+        db_helper.initialise_db()
+
+        _, first = timed(plan_incremental, db_helper, tree)
+        churn = int(args.files * args.churn)
+        add_churn(tree, churn, args.folders, args.spread)
+
+        full, full_time = timed(plan, tree)
+        (incremental, index), incremental_time = timed(plan_incremental, db_helper, tree)
+        assert sorted(move.source for move in full) == \
+            sorted(move.source for move in incremental)
+        print('{0} new files, {1} moves planned, {2} of {3} folders unchanged'.format(
+            churn, len(full), index.unchanged, len(index.visited)))
+        print('{0:>24} {1:>10.3f}'.format('first indexed pass (s)', first))
+        print('{0:>24} {1:>10.3f}'.format('full pass (s)', full_time))
+        print('{0:>24} {1:>10.3f}'.format('incremental pass (s)', incremental_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#! /usr/bin/env python3
+"""Compare the memory and CPU cost of the lazy sdir.File records with the
+eager File class they replaced.
+
+Run from the project root:
+
+    python -m benchmarks.bench_records --files 1000000
+"""
+
+import os
+import time
+import ctypes
+import argparse
+import tracemalloc
+from pathlib import Path
+from data.filegroups import typeGroups, typeList
+from slib.sdir import File
+
+
+class EagerFile(object):
+    """The former sdir.File: every attribute is computed in __init__, which
+    is run again whenever the path changes."""
+
+    default_category = 'UNDEFINED'
+
+    def __init__(self, path):
+        self.Path = Path(os.path.abspath(path))
+        self._path = self.Path.absolute().__str__()
+        self._parent = self.Path.parent.absolute().__str__()
+        self._name = self.Path.name
+        self._hidden_path = self.in_hidden_path(self._path)
+        self._suffix = self.Path.suffix
+        self._stem = self.Path.stem
+        extension = self.Path.suffix[1:]
+        self._extension = extension or self.default_category
+        self._category = self.get_category(extension)
+        self._exists = self.Path.is_file
+
+    def in_hidden_path(self, full_path):
+        # The former check, which looks at every prefix of the path
+        paths = full_path.split(os.sep)
+
+        if os.name == 'nt':
+            get_hidden_attribute = ctypes.windll.kernel32.GetFileAttributesW
+            for i in range(len(paths) + 1):
+                path = os.sep.join(paths[:i])
+                try:
+                    attrs = get_hidden_attribute(path)
+                    result = bool(attrs & 2)
+                except AttributeError:
+                    result = False
+                if result:
+                    return True
+        else:
+            for i in range(len(paths) + 1):
+                path = str(os.sep).join(paths[:i])
+                base_name = os.path.basename(path)
+                if base_name.startswith('.') or base_name.startswith('__'):
+                    return True
+
+        return False
+
+    def get_category(self, extension):
+        if extension:
+            file_extension = set([extension.upper()])
+            for key in typeGroups.keys():
+                common = set(typeGroups[key]) & file_extension
+                if common:
+                    return key
+        return self.default_category
+
+    @property
+    def category(self):
+        return self._category
+
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, value):
+        self.__init__(value)
+
+
+def get_paths(count):
+    root = os.path.join(os.path.abspath(os.sep), 'home', 'user', 'Downloads')
+    extensions = [ext.lower() for ext in typeList]
+    return [os.path.join(root, 'folder_{0}'.format(i % 100), 'file_{0}.{1}'.format(
+        i, extensions[i % len(extensions)])) for i in range(count)]
+
+
+def run(record_class, paths):
+    """Create a record per path, read what sorting reads and move it.
+
+    Return the records, the seconds taken and the peak memory in bytes."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = [record_class(path) for path in paths]
+    for record in records:
+        record.category
+        record.path = os.path.join(os.path.dirname(record.path), 'moved')
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return records, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=100000,
+                        help='number of file records to create (default 100000)')
+    args = parser.parse_args()
+
+    paths = get_paths(args.files)
+    print('{0} files'.format(args.files))
+    print('{0:>10} {1:>10} {2:>14}'.format('class', 'time (s)', 'peak (MiB)'))
+    for record_class in (EagerFile, File):
+        records, elapsed, peak = run(record_class, paths)
+        del records
+        print('{0:>10} {1:>10.3f} {2:>14.1f}'.format(
+            record_class.__name__, elapsed, peak / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#! /usr/bin/env python3
+"""Compare the per-type iglob search formerly used by SorterOps.sort_files
+with the single pass scanner.Scanner.
+
+Run from the project root:
+
+    python -m benchmarks.bench_scanner --files 200000
+"""
+
+import os
+import time
+import argparse
+import tempfile
+from glob import iglob
+from data.filegroups import typeList
+from slib.scanner import Scanner
+
+
+def populate(path, count):
+    extensions = [ext.lower() for ext in typeList]
+    for i in range(count):
+        name = 'file_{0}.{1}'.format(i, extensions[i % len(extensions)])
+        open(os.path.join(path, name), 'w').close()
+
+
+def glob_search(path, file_types):
+    pattern = '' if file_types == ['*'] else '*.'
+    return sum(1 for item in file_types for i in iglob(os.path.join(
+        path, pattern + item)) if os.path.isfile(i))
+
+
+def scanner_search(path, file_types):
+    return sum(1 for _ in Scanner(file_types).scan(path))
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    count = function(*args)
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=20000,
+                        help='number of files in the folder (default 20000)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        populate(path, args.files)
+        print('{0} files'.format(args.files))
+        print('{0:>6} {1:>12} {2:>12} {3:>8}'.format(
+            'types', 'iglob (s)', 'scanner (s)', 'matched'))
+        for type_count in (1, 5, 10, 30):
+            file_types = [ext.lower() for ext in typeList[:type_count]]
+            glob_count, glob_time = timed(glob_search, path, file_types)
+            scan_count, scan_time = timed(scanner_search, path, file_types)
+            assert glob_count == scan_count
+            print('{0:>6} {1:>12.4f} {2:>12.4f} {3:>8}'.format(
+                type_count, glob_time, scan_time, scan_count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#! /usr/bin/env python3
+"""Measure the latency of undoing a move (DatabaseHelper.mark_undone) as the
+history grows, and the cost of writing the history with and without the
+(source, destination, added_at) index dropped in schema version 6.
+
+Run from the project root:
+
+    python -m benchmarks.bench_undo --sizes 1000 10000 100000 1000000
+"""
+
+import time
+import random
+import argparse
+from datetime import datetime
+from slib.helpers import DatabaseHelper
+
+UNDO_COUNT = 200
+
+# The index undo lookups used before moves were undone by id
+OLD_INDEX = ('CREATE INDEX "data_path_source_destination_added_at" '
+             'ON "data_path" ("source", "destination", "added_at")')
+
+
+def populate(db_helper, size):
+    """Return the seconds taken to record size moves."""
+    start = time.perf_counter()
+    run_id = db_helper.start_run('/src', '/dst')
+    with db_helper.get_writer(run_id, batch_size=10000) as writer:
+        for i in range(size):
+            writer.add('file_{}.txt'.format(i), str(i), datetime.now(),
+                       '/src/{}/file_{}.txt'.format(i % 1000, i),
+                       '/dst/TXT/file_{}.txt'.format(i))
+    return time.perf_counter() - start
+
+
+def time_undo(db_helper, size):
+    """Return the mean seconds taken by one undo, as done by undo.RunReverser."""
+    path_ids = random.sample(range(1, size + 1), UNDO_COUNT)
+    start = time.perf_counter()
+    for path_id in path_ids:
+        db_helper.mark_undone([path_id])
+    return (time.perf_counter() - start) / len(path_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='history sizes to measure (default 1000 10000 100000)')
+    args = parser.parse_args()
+
+    print('{0:>10} {1:>12} {2:>12} {3:>16}'.format(
+        'history', 'undo (ms)', 'write (s)', 'old index (s)'))
+    for size in args.sizes:
+        size = max(size, UNDO_COUNT)
+        db_helper = DatabaseHelper(':memory:')
+        db_helper.initialise_db()
+        written = populate(db_helper, size)
+        undo = time_undo(db_helper, size)
+
+        db_helper = DatabaseHelper(':memory:')
+        db_helper.initialise_db()
+        db_helper.connection.execute(OLD_INDEX)
+        indexed = populate(db_helper, size)
+        print('{0:>10} {1:>12.3f} {2:>12.3f} {3:>16.3f}'.format(
+            size, undo * 1000, written, indexed))
+
+
+if __name__ == '__main__':
+    main()
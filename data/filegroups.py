@@ -1,3 +1,6 @@
+from types import MappingProxyType
+from data.settings import FILEGROUPS
+
 typeGroups = {'archive': ['7Z',
              'BZ2',
              'CRX',
@@ -668,3 +671,42 @@ typeList = ['3DM',
  'YUV',
  'ZIP',
  'ZIPX']
+
+
+def build_extension_index(groups, overrides=None):
+    """Return a read-only mapping of each upper case extension in groups
+    (category -> extensions) to its category.
+
+    An extension listed under several categories keeps the first one.
+    overrides (extension -> category) take precedence over groups.
+    """
+    index = {}
+    for category, extensions in groups.items():
+        for extension in extensions:
+            index.setdefault(extension.upper(), category)
+    for extension, category in (overrides or {}).items():
+        index[str(extension).upper().lstrip('.')] = str(category)
+    return MappingProxyType(index)
+
+
+extensionIndex = build_extension_index(typeGroups, FILEGROUPS)
+
+categories = frozenset(extensionIndex.values()) | frozenset(typeGroups)
+
+# The most dots in an indexed extension, plus one e.g. 2 for TAR.GZ
+_MAX_EXTENSION_PARTS = max(extension.count('.') for extension in extensionIndex) + 1
+
+
+def get_extension(name):
+    """Return the longest extension of the file name found in extensionIndex,
+    in upper case and without the leading dot, or '' if there is none.
+
+    Unlike pathlib.Path.suffix, multi-dot extensions such as TAR.GZ are
+    recognised.
+    """
+    parts = name.lstrip('.').upper().split('.')[1:]
+    for start in range(max(0, len(parts) - _MAX_EXTENSION_PARTS), len(parts)):
+        extension = '.'.join(parts[start:])
+        if extension in extensionIndex:
+            return extension
+    return ''
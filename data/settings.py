@@ -10,10 +10,15 @@ with ConfigReader(settings_ini) as config:
 
     SETTINGS = {
         'cleanup': config.get('cleanup', default='True'),
+        'workers': config.get('workers', default='1'),
+        'conflict': config.get('conflict', default='rename'),
         'autoscroll': config.get('autoscroll', default='True', section='progress'),
         'scrollbar': config.get('scrollbar', default='False', section='progress'),
     }
 
+    # User-defined extension = category pairs, see data.filegroups
+    FILEGROUPS = config.get_items('filegroups') or {}
+
 if os.name == 'nt':
     app_data = os.getenv('APPDATA')
     PROJECT_ROOT = os.path.join(app_data, 'Sorter')
@@ -22,23 +27,10 @@ if os.name == 'nt':
     except FileExistsError:
         pass
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(PROJECT_ROOT, 'operations.db'),
-    }
-}
-
-INSTALLED_APPS = (
-    'data',
-)
-
-SECRET_KEY = '63cFWu$$lhT3bVP9U1k1Iv@Jo02SuM'
+DB_NAME = os.path.join(PROJECT_ROOT, 'operations.db')     # The history database
 
 LOG_FILE = os.path.join(PROJECT_ROOT, log_file)
 
 SORTER_IGNORE_FILENAME = '.signore'		# Should start with a dot
 
 SORTER_FOLDER_IDENTITY_FILENAME = '.sorter'		# Should start with a dot
-
-MIDDLEWARE_CLASSES = []
@@ -1,6 +1,9 @@
 #! /usr/bin/env python3.4
 
+import time
+import queue
 import logging
+import threading
 import base64
 from tkinter import *
 from tkinter import ttk
@@ -11,11 +14,25 @@ except SystemError:
     
 logger = logging.getLogger(__name__)
 
+POLL_INTERVAL = 20     # Milliseconds between two checks for progress
+
 
 class Loader(Tk):
+    """The splash screen shown while Sorter starts.
+
+    data attributes:
+        error - the exception raised by a task run by load, if any
+
+    methods:
+        load
+        report_progress
+        tk_run
+    """
 
     def __init__(self):
         super(Loader, self).__init__()
+        self.error = None
+        self._queue = queue.Queue()
         self.overrideredirect(True)
 
         # Configure default theme
@@ -80,5 +97,45 @@ class Loader(Tk):
             self.progress_var.set(value)
             self.update()
 
+    def _run_tasks(self, tasks):
+        total = len(tasks)
+        for count, (msg, task) in enumerate(tasks):
+            self._queue.put((int(count * 100 / total), msg))
+            start = time.perf_counter()
+            try:
+                task()
+            except Exception as error:
+                logger.exception('Loading failed: %s', msg)
+                self.error = error
+                break
+            logger.debug('%s done in %.3fs', msg, time.perf_counter() - start)
+        self._queue.put((100, 'Initialising UI.'))
+
+    def _check_progress(self):
+        try:
+            while True:
+                value, msg = self._queue.get_nowait()
+                self.report_progress(value, msg)
+                if value > 99:
+                    return
+        except queue.Empty:
+            self.after(POLL_INTERVAL, self._check_progress)
+
+    def load(self, tasks):
+        """Run tasks, a list of (message, callable) pairs, in order on a
+        background thread while the splash screen is shown.
+
+        The progress bar moves as each task completes. Return once all tasks
+        are done and the splash screen is closed, raising the exception of
+        the failed task if any. The tasks must not use tkinter.
+        """
+        thread = threading.Thread(target=self._run_tasks, args=(tasks,), daemon=True)
+        thread.start()
+        self.after(POLL_INTERVAL, self._check_progress)
+        self.mainloop()
+        thread.join()
+        if self.error is not None:
+            raise self.error
+
     def tk_run(self):
         self.mainloop()
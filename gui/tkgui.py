@@ -3,123 +3,146 @@
 import logging
 import base64
 import os
-import shutil
 import json
+import queue
+import threading
 import urllib.request
 from .icons import icon_string
 from tkinter import *
 from tkinter import filedialog, messagebox, ttk
 from tkinter import TclError
-from slib.helpers import InterfaceHelper
+from slib.helpers import InterfaceHelper, ProgressLog
 from data.filegroups import typeGroups
 from webbrowser import get
 from tkinter import font
 from . import descriptions
 from data.version import SORTER_VERSION
 from datetime import datetime
+from itertools import chain, islice
 
 logger = logging.getLogger(__name__)
 
+POLL_INTERVAL = 50     # Milliseconds between two checks for sorter messages
 
-class TextWithVar(Text):
-    """A Text widget that accepts a 'textvariable' option
+TREE_PAGE_SIZE = 100     # Rows inserted into a PagedTree at a time
 
-    Has no scrollbar but is scrollable
+TREE_LOAD_AT = 0.9     # Scroll position at which the next page is inserted
+
+
+class LogText(Text):
+    """A Text widget that shows a helpers.ProgressLog given as the 'log'
+    option
 
-    Thanks to https://stackoverflow.com/q/21507178/6735826
-    and https://stackoverflow.com/a/21565476/6735826
+    The lines in the log are inserted once, then each new line is
+    inserted at the end as it is logged. The oldest lines are deleted once
+    the widget holds more lines than the log keeps.
+
+    Has no scrollbar but is scrollable
     """
 
     def __init__(self, parent, *args, **kwargs):
-        self._textvariable = kwargs.pop("textvariable", None)
+        self.log = kwargs.pop('log')
         self.autoscroll = kwargs.pop('autoscroll', True)
 
         super().__init__(parent, *args, **kwargs)
 
-        # if the variable has data in it, use it to initialize
-        # the widget
-        if self._textvariable is not None:
-            self.insert("1.0", self._textvariable.get())
-
-        # this defines an internal proxy which generates a
-        # virtual event whenever text is inserted or deleted
-        self.tk.eval('''
-            proc widget_proxy {widget widget_command args} {
-
-                # call the real tk widget command with the real args
-                set result [uplevel [linsert $args 0 $widget_command]]
-
-                # if the contents changed, generate an event we can bind to
-                if {([lindex $args 0] in {insert replace delete})} {
-                    event generate $widget <<Change>> -when tail
-                }
-                # return the result from the real widget command
-                return $result
-            }
-            ''')
-
-        # this replaces the underlying widget with the proxy
-        self.tk.eval('''
-            rename {widget} _{widget}
-            interp alias {{}} ::{widget} {{}} widget_proxy {widget} _{widget}
-        '''.format(widget=str(self)))
-
-        # set up a binding to update the variable whenever
-        # the widget changes
-        self.bind("<<Change>>", self._on_widget_change)
-
-        # set up a trace to update the text widget when the
-        # variable changes
-        if self._textvariable is not None:
-            self._textvariable.trace("wu", self._on_var_change)
-
-    def _on_var_change(self, *args):
-        """Change the text widget when the associated textvariable changes"""
-
-        # only change the widget if something actually
-        # changed, otherwise we'll get into an endless
-        # loop
+        self.insert(END, ''.join(self.log))
+        if self.autoscroll:
+            self.see(END)
+        self.log.add_listener(self._on_log)
+        self.bind('<Destroy>', self._on_destroy, add='+')
+
+    def _on_log(self, line):
+        """Insert line at the end of the widget"""
         try:
-            text_current = self.get("1.0", "end-1c")
+            self.insert(END, line)
+            excess = int(self.index('end-1c').split('.')[0]) - 1 - self.log.maxlen
+            if excess > 0:
+                self.delete('1.0', '{}.0'.format(excess + 1))
+            if self.autoscroll:
+                self.see(END)
         except TclError:
-            pass
-        else:
-            var_current = self._textvariable.get()
-            if text_current != var_current:
-                self.delete("1.0", "end")
-                self.insert("1.0", var_current)
-                if self.autoscroll:
-                    self.see(END)
+            self.log.remove_listener(self._on_log)
 
-    def _on_widget_change(self, event=None):
-        """Change the variable when the widget changes"""
-        if self._textvariable is not None:
-            self._textvariable.set(self.get("1.0", "end-1c"))
+    def _on_destroy(self, event=None):
+        self.log.remove_listener(self._on_log)
 
 
 class TextFrame(Frame):
-    """Text widget in a scrollable Frame which accepts textvariable"""
+    """LogText widget in a scrollable Frame"""
 
     def __init__(self, master, *args, **kwargs):
-        self.textvariable = kwargs.pop('textvariable', None)
+        self.log = kwargs.pop('log')
         self.autoscroll = kwargs.pop('autoscroll', True)
-        if self.textvariable is not None:
-            if not isinstance(self.textvariable, Variable):
-                raise TypeError("tkinter.Variable type expected, {} given.".format(type(self.textvariable)))
 
         super().__init__(master, *args, **kwargs)
 
         self.yscrollbar = ttk.Scrollbar(self, orient=VERTICAL)
 
-        self.text_widget = TextWithVar(self, textvariable=self.textvariable,
-                                       autoscroll=self.autoscroll,
-                                       yscrollcommand=self.yscrollbar.set)
+        self.text_widget = LogText(self, log=self.log,
+                                   autoscroll=self.autoscroll,
+                                   yscrollcommand=self.yscrollbar.set)
         self.yscrollbar.config(command=self.text_widget.yview)
         self.yscrollbar.pack(side=RIGHT, fill=Y)
 
         self.text_widget.pack(side=LEFT, fill=BOTH, expand=1)
 
 
+class PagedTree(Frame):
+    """A ttk.Treeview with scrollbars, filled from an iterator of rows a
+    page at a time
+
+    The first page is inserted when the widget is created and the next one
+    once the view is scrolled near the last row, so opening the view takes
+    the same time whatever the number of rows.
+
+    columns - (name, heading, width) tuples
+    rows - iterator of (iid, values, tags) tuples
+    """
+
+    def __init__(self, master, columns, rows, *args, **kwargs):
+        self.rows = rows
+        self.page_size = kwargs.pop('page_size', TREE_PAGE_SIZE)
+        self.exhausted = False
+        self._loading = False
+
+        super().__init__(master, *args, **kwargs)
+
+        self.tree = ttk.Treeview(self, columns=[name for name, _, _ in columns],
+                                 show='headings', selectmode=EXTENDED)
+        for name, heading, width in columns:
+            self.tree.heading(name, text=heading, anchor=W)
+            self.tree.column(name, width=width, anchor=W)
+        self.yscrollbar = ttk.Scrollbar(self, orient=VERTICAL, command=self.tree.yview)
+        xscrollbar = ttk.Scrollbar(self, orient=HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(yscrollcommand=self._on_scroll, xscrollcommand=xscrollbar.set)
+
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.yscrollbar.grid(row=0, column=1, sticky='ns')
+        xscrollbar.grid(row=1, column=0, sticky='ew')
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.add_page()
+
+    def add_page(self):
+        """Insert the next page_size rows"""
+        self._loading = False
+        if not self.winfo_exists():
+            return
+        added = 0
+        for added, (iid, values, tags) in enumerate(islice(self.rows, self.page_size), 1):
+            self.tree.insert('', END, iid=iid, values=values, tags=tags)
+        if added < self.page_size:
+            self.exhausted = True
+
+    def _on_scroll(self, first, last):
+        self.yscrollbar.set(first, last)
+        if not self.exhausted and not self._loading and float(last) >= TREE_LOAD_AT:
+            self._loading = True
+            self.after_idle(self.add_page)
+
+
 class TkGui(Tk):
     """Sorter tkinter GUI class"""
 
@@ -142,6 +165,9 @@ class TkGui(Tk):
         self.geometry('{0}x{1}+{2}+{3}'.format(550, 300, 200, 200))
         self.operations = operations
         self.db_helper = self.operations.db_helper
+        # Messages and results from the sorter thread, drained by the GUI thread
+        self._sorter_queue = queue.Queue()
+        self._sorter_thread = None
         self._init_ui()
 
     def _init_ui(self):
@@ -247,7 +273,7 @@ class TkGui(Tk):
         types_value = IntVar()
         self.file_types = ['*']
         self.by_extension = IntVar()
-        self.progress_info = StringVar()
+        self.progress_log = ProgressLog()
         self.show_logs = IntVar()
 
         # Configure Options frame
@@ -330,6 +356,14 @@ class TkGui(Tk):
                                      text='Run',
                                      command=self._run_sorter)
         self.run_button.pack(side=LEFT, padx=5)
+        self.pause_button = ttk.Button(self.bottom_frame,
+                                       text='Pause', state=DISABLED,
+                                       command=self._toggle_pause)
+        self.pause_button.pack(side=LEFT, padx=5)
+        self.cancel_button = ttk.Button(self.bottom_frame,
+                                        text='Cancel', state=DISABLED,
+                                        command=self._cancel_sorter)
+        self.cancel_button.pack(side=LEFT, padx=5)
         self.quit_button = ttk.Button(self.bottom_frame,
                                       text='Quit',
                                       command=self._show_exit_dialog)
@@ -350,9 +384,9 @@ class TkGui(Tk):
 
         self.interface_helper = InterfaceHelper(
             progress_bar=self.progress_bar, progress_var=self.progress_var,
-            status=self.status_bar, messagebox=messagebox, progress_info=self.progress_info)
+            status=self.status_bar, messagebox=messagebox, progress_log=self.progress_log)
         logger.info('Finished GUI initialisation. Waiting...')
-        self.progress_info.set('{}  Ready.\n'.format(datetime.now()))
+        self.progress_log.append('{}  Ready.\n'.format(datetime.now()))
 
     def _on_mousewheel(self, event, canvas, count):
         try:
@@ -400,9 +434,10 @@ class TkGui(Tk):
         self._set_window_attributes(history_window, 'History')
 
     def _get_history(self, count):
-        files = self.db_helper.get_history(count)
+        files = self.db_helper.iter_history(count, page_size=TREE_PAGE_SIZE)
+        first_file = next(files, None)
 
-        if not files:
+        if first_file is None:
             error_msg = 'No data found!'
             messagebox.showwarning(title='Warning', message=error_msg)
             logger.warning('Error accessing history:: %s', error_msg)
@@ -410,59 +445,27 @@ class TkGui(Tk):
             history_window = Toplevel(self)
             history_window.geometry(
                 '{0}x{1}+{2}+{3}'.format(500, 400, 300, 150))
-            canvas = self._create_canvas(history_window)
 
-            frame = Frame(canvas, background="#C0C0C0")
-            frame.pack(side=LEFT)
-
-            canvas.create_window(0, 0, anchor=NW, window=frame)
-
-            PADX, PADY, IPADX, IPADY = 1, 1, 1, 1
-
-            # Add items to canvas
-            llabel = ttk.Label(frame, text='Filename', anchor=N, relief=SUNKEN,
-                               background=self.bg, borderwidth=0)
-            llabel.grid(row=0, column=0, sticky="nsew", padx=PADX, pady=3)
-            llabel = ttk.Label(frame, text='Original location', anchor=N, relief=SUNKEN,
-                               background=self.bg, borderwidth=0)
-            llabel.grid(row=0, column=1, sticky="nsew", padx=PADX, pady=3)
-            llabel = ttk.Label(frame, text='Current location', anchor=N, relief=SUNKEN,
-                               background=self.bg, borderwidth=0)
-            llabel.grid(row=0, column=2, sticky="nsew", padx=PADX, pady=3)
-            llabel = ttk.Label(frame, anchor=N, relief=SUNKEN,
-                               background=self.bg, borderwidth=0)
-            llabel.grid(row=0, column=3, sticky="nsew", padx=0, pady=0)
-
-            for count, item in enumerate(files, 1):
-                item_path_object = item.filename_path
-                original_location = item_path_object.first().source
-                current_location = item_path_object.last().destination
-
-                filename_label = Message(frame, width=400, relief=RAISED, text=item.filename,
-                                         anchor=CENTER, background=self.bg, borderwidth=0)
-                filename_label.grid(row=count, column=0, padx=PADX, pady=PADY,
-                                    ipadx=IPADX, ipady=IPADY, sticky="nsew")
-
-                o_loc_label = Message(frame, width=400, relief=RAISED,
-                                      text=original_location, anchor=W, background=self.bg, borderwidth=0)
-                o_loc_label.grid(row=count, column=1, padx=PADX, pady=PADY,
-                                 ipadx=IPADX, ipady=IPADY, sticky="nsew")
-
-                c_loc_label = Message(frame, width=400, relief=SUNKEN,
-                                      text=current_location, anchor=W, background=self.bg, borderwidth=0)
-                c_loc_label.grid(row=count, column=2, padx=PADX, pady=PADY,
-                                 ipadx=IPADX, ipady=IPADY, sticky="nsew")
-                button_label = ttk.Label(
-                    frame, width=400, relief=RAISED, anchor=W, background=self.bg, borderwidth=0)
-                button_label.grid(row=count, column=3, padx=0, pady=0,
-                                  ipadx=IPADX, ipady=IPADY, sticky="nsew")
-                button = ttk.Button(button_label, text='Open location',
-                                    command=lambda location=os.path.dirname(current_location): get().open(location))
-                button.grid(sticky="ns", padx=10, pady=10)
-
-                # Hack: Alter height to refit contents to canvas
-                h = canvas.winfo_height()
-                canvas.configure(height=h + 1)
+            rows = ((str(item.id), (item.filename, item.original_location,
+                                    item.current_location), ())
+                    for item in chain([first_file], files))
+            columns = (('filename', 'Filename', 150),
+                       ('original_location', 'Original location', 300),
+                       ('current_location', 'Current location', 300))
+            paged_tree = PagedTree(history_window, columns, rows)
+            paged_tree.pack(side=TOP, fill=BOTH, expand=YES)
+
+            def open_location(event=None):
+                for iid in paged_tree.tree.selection():
+                    current_location = paged_tree.tree.set(iid, 'current_location')
+                    get().open(os.path.dirname(current_location))
+
+            paged_tree.tree.bind('<Double-1>', open_location)
+            buttons_frame = ttk.Frame(history_window, style='My.TFrame')
+            buttons_frame.pack(side=BOTTOM, fill=X)
+            open_button = ttk.Button(buttons_frame, text='Open location',
+                                     command=open_location)
+            open_button.pack(side=LEFT, padx=10, pady=10)
 
             self._set_window_attributes(history_window, 'History')
 
@@ -519,20 +522,26 @@ class TkGui(Tk):
                                              window=window: cls._open_link(link, event, window))
 
     def _delete_db(self):
+        if self._is_sorting():
+            messagebox.showwarning(
+                title='Warning', message='Wait for the sorting to finish or cancel it first.')
+            return
         db_path = os.path.abspath(self.db_helper.DB_NAME)
         try:
-            os.remove(db_path)
-        except PermissionError:
+            # The connection is closed and the write-ahead log removed too
+            self.db_helper.delete_db()
+        except OSError:
             messagebox.showwarning(
                 title='Success',
                 message='Error refreshing database!\nDelete file at "%s" once the program closes.' % db_path)
             logger.error(
                 'Error refreshing database file at %s', db_path)
-        else:
-            messagebox.showinfo(
-                title='Success', message='Database refreshed!\n\nRestart application to continue!')
-            logger.info('Database refreshed. Closing... %s', db_path)
-        self.destroy()
+            self.destroy()
+            return
+        self.db_helper.initialise_db()
+        messagebox.showinfo(
+            title='Success', message='Database refreshed!')
+        logger.info('Database refreshed. %s', db_path)
 
     def _clear_entry_help(self, widget, variable):
         value = variable.get()
@@ -701,10 +710,10 @@ class TkGui(Tk):
         frame = Frame(progress_window, relief=SUNKEN)
         frame.pack(side=LEFT, fill=Y)
 
-        widget = TextWithVar(frame, background=self.bg,
-                             textvariable=self.progress_info,
-                             autoscroll=self.settings.get('autoscroll'),
-                             relief=SUNKEN, borderwidth=2)
+        widget = LogText(frame, background=self.bg,
+                         log=self.progress_log,
+                         autoscroll=self.settings.get('autoscroll'),
+                         relief=SUNKEN, borderwidth=2)
         widget.config(pady=5, padx=10, font='Helvetica 9')
         widget.pack(side=TOP, fill=BOTH)
         self._set_window_attributes(progress_window, 'Logs...', take_focus=False)
@@ -714,7 +723,7 @@ class TkGui(Tk):
 
         frame = TextFrame(progress_window,
                           autoscroll=self.settings.get('autoscroll'),
-                          textvariable=self.progress_info)
+                          log=self.progress_log)
         frame.text_widget.config(relief=SUNKEN, pady=5, padx=10, font='Helvetica 9')
         frame.pack(side=LEFT, fill=Y)
         self._set_window_attributes(progress_window, 'Logs...', take_focus=False)
@@ -743,6 +752,10 @@ class TkGui(Tk):
 
     def _exit(self):
         logger.info('Exiting...')
+        if self._is_sorting():
+            # Let the move in progress finish so that it is recorded
+            self.operations.cancel()
+            self._sorter_thread.join()
         self.destroy()
 
     def _show_exit_dialog(self):
@@ -759,11 +772,13 @@ class TkGui(Tk):
         """Call Sorter operations on the provided values."""
         logger.info('Running sorter')
         kwargs = {
-            'send_message': self.interface_helper.message_user,
+            'send_message': self._queue_message,
             'src': self.source_entry.get(),
             'dst': self.dst_entry.get(),
             'file_types': self.file_types,
-            'by_extension': bool(self.by_extension.get())
+            'by_extension': bool(self.by_extension.get()),
+            'workers': int(self.settings.get('workers', 1)),
+            'conflict': self.settings.get('conflict', 'rename'),
         }
         cleanup = bool(self.settings.get('cleanup'))
 
@@ -785,31 +800,117 @@ class TkGui(Tk):
         self.update()
 
         if self.db_helper.initialise_db():
-            report = self.operations.start(**kwargs)
-
-            try:
-                ops_length = len(report)
-            except TypeError:
-                ops_length = 0
-            logger.info('%s operations done.', ops_length)
-
-            if report is not None:
-                if ops_length:
-                    self.interface_helper.message_user(through=['status', 'progress_bar', 'dialog'],
-                                                       msg='Sorting finished',
-                                                       weight=1, value=100)
-                    self._show_report(report, kwargs.get('src'), kwargs.get('dst'), cleanup)
-                else:
-                    self.interface_helper.message_user(
-                        through=['status', 'progress_bar', 'dialog'],
-                        msg='Nothing done. Consider refining your search.')
-            self.interface_helper.message_user()
+            self._run_in_background(
+                lambda: self.operations.start(**kwargs),
+                lambda kind, statistics: self._on_sorter_done(kind, statistics, kwargs,
+                                                              cleanup))
 
         else:
             self.interface_helper.message_user(
                 through=['status', 'dialog'], msg='Database initialisation failed.')
             logger.info('DB initialisation failed.')
 
+    def _is_sorting(self):
+        return self._sorter_thread is not None and self._sorter_thread.is_alive()
+
+    def _set_sorting_state(self, sorting):
+        """Enable the Pause and Cancel buttons while sorting, Run otherwise."""
+        self.run_button.config(state=DISABLED if sorting else NORMAL)
+        self.pause_button.config(text='Pause', state=NORMAL if sorting else DISABLED)
+        self.cancel_button.config(state=NORMAL if sorting else DISABLED)
+
+    def _queue_message(self, **kwargs):
+        """Pass a message from the sorter thread on to the GUI thread.
+
+        Used as the send_message of the sorter thread, which must not call
+        tkinter itself.
+        """
+        self._sorter_queue.put(('message', kwargs))
+
+    def _run_in_background(self, task, on_done):
+        """Call task on the sorter thread, then on_done on the GUI thread
+        with 'done' and the value returned by task, or 'error' and the
+        exception raised.
+
+        task has to send its messages through _queue_message. Pause and
+        Cancel act on self.operations.control meanwhile.
+        """
+        self._set_sorting_state(True)
+        self._sorter_thread = threading.Thread(
+            target=self._call_in_background, args=(task,))
+        self._sorter_thread.start()
+        self.after(POLL_INTERVAL, self._check_sorter, on_done)
+
+    def _call_in_background(self, task):
+        try:
+            value = task()
+        except Exception as error:
+            logger.exception('Sorter operations failed.')
+            self._sorter_queue.put(('error', error))
+        else:
+            self._sorter_queue.put(('done', value))
+
+    def _check_sorter(self, on_done):
+        """Show the messages of the sorter thread, until it is done."""
+        try:
+            while True:
+                kind, value = self._sorter_queue.get_nowait()
+                if kind == 'message':
+                    self.interface_helper.message_user(**value)
+                else:
+                    self._sorter_thread.join()
+                    self._sorter_thread = None
+                    self._set_sorting_state(False)
+                    on_done(kind, value)
+                    return
+        except queue.Empty:
+            self.after(POLL_INTERVAL, self._check_sorter, on_done)
+
+    def _toggle_pause(self):
+        if self.operations.control.paused:
+            self.operations.resume()
+            self.pause_button.config(text='Pause')
+            self.interface_helper.message_user(msg='Resuming...', weight=1)
+        else:
+            self.operations.pause()
+            self.pause_button.config(text='Resume')
+            self.interface_helper.message_user(msg='Paused', weight=1)
+
+    def _cancel_sorter(self):
+        self.operations.cancel()
+        self.pause_button.config(state=DISABLED)
+        self.cancel_button.config(state=DISABLED)
+        self.interface_helper.message_user(msg='Cancelling...', weight=1)
+
+    def _on_sorter_done(self, kind, statistics, kwargs, cleanup):
+        if kind == 'error':
+            self.interface_helper.message_user(
+                through=['status', 'progress_bar', 'dialog'],
+                msg='Sorting failed: {}'.format(statistics), weight=2)
+            return
+
+        ops_length = 0 if statistics is None else statistics.moved
+        logger.info('%s operations done.', ops_length)
+
+        if statistics is not None:
+            if self.operations.cancelled:
+                msg = 'Sorting cancelled'
+            else:
+                msg = 'Sorting finished'
+            if ops_length:
+                self.interface_helper.message_user(through=['status', 'progress_bar', 'dialog'],
+                                                   msg=msg, weight=1, value=100)
+                self._show_report(statistics.run_id, kwargs.get('src'),
+                                  kwargs.get('dst'), cleanup)
+            elif self.operations.cancelled:
+                self.interface_helper.message_user(
+                    through=['status', 'progress_bar', 'dialog'], msg=msg)
+            else:
+                self.interface_helper.message_user(
+                    through=['status', 'progress_bar', 'dialog'],
+                    msg='Nothing done. Consider refining your search.')
+        self.interface_helper.message_user()
+
     def _create_canvas(self, window):
         # Configure canvas
         canvas = Canvas(window)
@@ -840,10 +941,11 @@ class TkGui(Tk):
         """Resize canvas to fit all contents"""
         canvas.configure(scrollregion=canvas.bbox('all'))
 
-    def _show_report(self, report, source_path, dst_path, cleanup):
+    def _show_report(self, run_id, source_path, dst_path, cleanup):
         # Configure Report window
         report_window = Toplevel(self)
         report_window.geometry('{0}x{1}+{2}+{3}'.format(900, 600, 100, 80))
+        drained = self.operations.last_drained
 
         def _after_destroy():
             """Destroy window then do some cleanup."""
@@ -851,150 +953,89 @@ class TkGui(Tk):
             if cleanup:
                 self.interface_helper.message_user(
                     msg='Performing cleanup...', weight=1)
-                self.operations.perform_cleanup(source_path)
+                self.operations.cleanup_drained(source_path, drained)
                 self.interface_helper.message_user()
 
         report_window.protocol("WM_DELETE_WINDOW", _after_destroy)
 
-        canvas = self._create_canvas(report_window)
-
-        frame = Frame(canvas, background="#C0C0C0")
-        frame.pack(side=LEFT)
-
-        canvas.create_window(0, 0, anchor=NW, window=frame)
-        PADX, PADY, IPADX, IPADY = 1, 1, 1, 1
-
-        # Add items to canvas
-        llabel = ttk.Label(frame, anchor=N,
-                           background=self.bg, borderwidth=0)
-        llabel.grid(row=0, column=0, sticky="nsew", padx=0, pady=0)
-        llabel = ttk.Label(frame, text='Filename', anchor=N,
-                           background=self.bg, borderwidth=0)
-        llabel.grid(row=0, column=1, sticky="nsew", padx=PADX, pady=5)
-        llabel = ttk.Label(frame, text='From', anchor=N,
-                           background=self.bg, borderwidth=0)
-        llabel.grid(row=0, column=2, sticky="nsew", padx=PADX, pady=5)
-        llabel = ttk.Label(frame, text='To', anchor=N,
-                           background=self.bg, borderwidth=0)
-        llabel.grid(row=0, column=3, sticky="nsew", padx=PADX, pady=5)
-
-        buttons = {}
-        ROW_COUNT = 2
-
-        def reverse_action(origin, current_path, added_at, button_index):
-            """Undo the conducted Sorter operation."""
-
-            os.makedirs(os.path.dirname(origin), exist_ok=True)
-            self.interface_helper.message_user(through=['status'],
-                                               msg='Reversing: {} to {}'.format(
-                                                   current_path, origin
-                                               ))
-            try:
-                shutil.move(current_path, origin)
-            except FileNotFoundError:
-                self.interface_helper.message_user(through=['status'],
-                                                   msg='Could NOT reverse {}. File not found.'.format(
-                                                       os.path.basename(current_path)
-                                                   ))
+        # Rows are read from the database a page at a time, as they are shown
+        rows = ((str(record.id), (record.filename, record.source, record.destination),
+                 () if record.accepted else ('undone',))
+                for record in self.db_helper.iter_report_records(run_id, page_size=TREE_PAGE_SIZE))
+        columns = (('filename', 'Filename', 200),
+                   ('source', 'From', 350),
+                   ('destination', 'To', 350))
+        paged_tree = PagedTree(report_window, columns, rows)
+        tree = paged_tree.tree
+        tree.tag_configure('undone', foreground='#A9A9A9')
+        paged_tree.pack(side=TOP, fill=BOTH, expand=YES)
+
+        def reverse_selected(button):
+            """Undo the selected Sorter operations."""
+            if self._is_sorting():
                 return
-
-            except shutil.Error:
-                files = ((file_, os.path.join(current_path, file_)) for file_ in os.listdir(current_path))
-                for record in files:
-                    _src = record[1]
-                    _dst = os.path.join(origin, record[0])
-                    try:
-                        shutil.move(_src, _dst)
-                    except Exception as err:
-                        error = str(err)
-                        logger.error(error)
-                        self.interface_helper.message_user(through=['status'],
-                                                           msg='Error "{}" while reversing: {} to {}'.format(
-                                                               error, _src, _dst
-                                                           ))
-
-            else:
-                finders = {
-                    'source': origin,
-                    'destination': current_path,
-                    'added_at': added_at
-                }
-                alter_value = {'accepted': False}
-                self.db_helper.alter_path(alter_value, finders)
-                buttons[button_index].config(state='disabled')
-                report_window.update()
-                del buttons[button_index]
-                self.interface_helper.message_user(through=['status'],
-                                                   msg='Reversal of {} successful'.format(
-                                                       os.path.basename(current_path)
-                                                   ))
-
-        def reverse_all(report, button):
+            selected = set(int(iid) for iid in tree.selection()
+                           if not tree.tag_has('undone', iid))
+            tree.selection_set(())
+            if not selected:
+                return
+            logger.info('Reversing %s operations of run %s.', len(selected), run_id)
+            button.config(state=DISABLED)
+            # Moved back on the sorter thread, without replacing what took their place
+            self._run_in_background(
+                lambda: self.operations.undo_run(
+                    run_id, self._queue_message, workers=int(self.settings.get('workers', 1)),
+                    selected=selected),
+                lambda kind, result: on_reversed(kind, result, button, 'Undo', False))
+
+        def reverse_all(button):
             """Undo all the conducted Sorter operations in the current instance."""
-            if buttons:
-                try:
-                    ops_length = str(len(report))
-                except TypeError:
-                    ops_length = 0
-                msg = 'Reversing {} operations.'.format(ops_length)
-                logger.info(msg)
-
-                button.config(text='Running...', state=DISABLED)
-                self.interface_helper.message_user(through=['status'], msg=msg)
-                len_report = len(report) + ROW_COUNT
-                for count, value in enumerate(report, ROW_COUNT):
-                    button.config(text='Running ({})...'.format(len_report - count))
-                    reverse_action(value[1], value[2], value[3], count)
-
-                self.operations.perform_cleanup(dst_path)
+            if self._is_sorting():
+                return
+            logger.info('Reversing operations of run %s.', run_id)
+            button.config(text='Running...', state=DISABLED)
+            self._run_in_background(
+                lambda: self.operations.undo_run(
+                    run_id, self._queue_message, workers=int(self.settings.get('workers', 1))),
+                lambda kind, result: on_reversed(kind, result, button, 'Undo All', True))
+
+        def on_reversed(kind, result, button, text, final):
+            if kind == 'error':
+                self.interface_helper.message_user(
+                    through=['status', 'dialog'],
+                    msg='Reversal failed: {}'.format(result), weight=2)
+            elif result.failed:
+                self.interface_helper.message_user(
+                    through=['status', 'dialog'],
+                    msg='{} operations could not be reversed.'.format(len(result.failed)),
+                    weight=2)
+            if not tree.winfo_exists():
+                return
+            if kind == 'done':
+                for path_id in result.undone:
+                    if tree.exists(str(path_id)):
+                        tree.item(str(path_id), tags=('undone',))
+            if kind == 'error' or result.failed or self.operations.cancelled or not final:
+                button.config(text=text, state=NORMAL)
+            else:
                 button.config(text='Done.')
 
-        for count, value in enumerate(report, ROW_COUNT):
-            button_label = ttk.Label(
-                frame, width=400, relief=RAISED, anchor=W, background=self.bg, borderwidth=0)
-            button_label.grid(row=count, column=0, padx=0, pady=0,
-                              ipadx=IPADX, ipady=IPADY, sticky="nsew")
-            buttons[count] = ttk.Button(button_label, text='Undo',
-                                        command=lambda origin=value[1], current_path=value[2], added_at=value[3],
-                                                       i=count: reverse_action(
-                                            origin, current_path, added_at, i))
-            buttons[count].grid(padx=5, pady=5, sticky="ns")
-
-            filename_label = Message(frame, width=400, relief=RAISED, text=value[
-                0], anchor=CENTER, background=self.bg, borderwidth=0)
-            filename_label.grid(row=count, column=1, padx=PADX, pady=PADY,
-                                ipadx=IPADX, ipady=IPADY, sticky="nsew")
-
-            from_label = Message(frame, width=400, relief=RAISED, text=value[
-                1], anchor=W, background=self.bg, borderwidth=0)
-            from_label.grid(row=count, column=2, padx=PADX, pady=PADY,
-                            ipadx=IPADX, ipady=IPADY, sticky="nsew")
-
-            to_label = Message(frame, width=400, relief=RAISED, text=value[
-                2], anchor=W, background=self.bg, borderwidth=0)
-            to_label.grid(row=count, column=3, padx=PADX, pady=PADY,
-                          ipadx=IPADX, ipady=IPADY, sticky="nsew")
-
-            # Hack: Alter height to refit contents to canvas
-            h = canvas.winfo_height()
-            canvas.configure(height=h + 1)
-
-        last_row = len(report) + ROW_COUNT
-
-        buttons_label = ttk.Label(
-            frame, width=400, relief=RAISED, anchor=W, background=self.bg, borderwidth=0)
-        buttons_label.grid(row=last_row, column=0, columnspan=5, padx=0, pady=0,
-                           ipadx=IPADX, ipady=IPADY, sticky="nsew")
+        buttons_frame = ttk.Frame(report_window, style='My.TFrame')
+        buttons_frame.pack(side=BOTTOM, fill=X)
 
         accept_button = ttk.Button(
-            buttons_label, text='Accept', command=_after_destroy)
-        accept_button.grid(row=0, column=0, padx=10, pady=40, sticky="ns")
+            buttons_frame, text='Accept', command=_after_destroy)
+        accept_button.pack(side=LEFT, padx=10, pady=10)
+
+        undo_button = ttk.Button(
+            buttons_frame, text='Undo')
+        undo_button.config(command=lambda button=undo_button: reverse_selected(button))
+        undo_button.pack(side=LEFT, padx=10, pady=10)
 
         reverse_button = ttk.Button(
-            buttons_label, text='Undo All')
-        reverse_button.config(command=lambda report=report,
-                                             button=reverse_button: reverse_all(report, button))
-        reverse_button.grid(row=0, column=1, padx=10, pady=40, sticky="ns")
+            buttons_frame, text='Undo All')
+        reverse_button.config(command=lambda button=reverse_button: reverse_all(button))
+        reverse_button.pack(side=LEFT, padx=10, pady=10)
 
         self._set_window_attributes(report_window, 'Sorting Report', escape_close=False)
 
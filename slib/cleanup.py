@@ -0,0 +1,104 @@
+#! /usr/bin/env python3
+
+import os
+import heapq
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from data.settings import SORTER_IGNORE_FILENAME, SORTER_FOLDER_IDENTITY_FILENAME
+
+# Files Sorter leaves in the folders it creates
+SORTER_FILES = frozenset([SORTER_IGNORE_FILENAME, SORTER_FOLDER_IDENTITY_FILENAME] +
+                         (['.directory'] if os.name != 'nt' else []))
+
+
+def is_drained(path):
+    """Return True if the folder path holds nothing but SORTER_FILES."""
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name not in SORTER_FILES or entry.is_dir(follow_symlinks=False):
+                    return False
+    except OSError:
+        return False
+    return True
+
+
+def _is_below(path, root):
+    return os.path.commonpath([path, root]) == root and path != root
+
+
+def remove_drained(folders, root):
+    """Remove the folders in folders that hold nothing but SORTER_FILES,
+    then the parents they leave in the same state, up to but not including
+    root.
+
+    Only folders below root are considered. Deeper folders are handled
+    first, so a parent is checked once all of its drained children are
+    gone. Return the list of folders removed.
+    """
+    root = os.path.abspath(root)
+    pending = []
+    queued = set()
+
+    def push(folder):
+        if folder not in queued and _is_below(folder, root):
+            queued.add(folder)
+            heapq.heappush(pending, (-folder.count(os.sep), folder))
+
+    for folder in folders:
+        push(os.path.abspath(folder))
+
+    removed = []
+    while pending:
+        _, folder = heapq.heappop(pending)
+        if not is_drained(folder):
+            continue
+        try:
+            shutil.rmtree(folder)
+        except OSError:
+            continue
+        removed.append(folder)
+        push(os.path.dirname(folder))
+    return removed
+
+
+def _remove_if_empty(root, dirs, files, removed):
+    # A subfolder listed in dirs is gone only if it is in removed, so no
+    # subfolder is checked on the disk again
+    if any(os.path.join(root, dir_) not in removed for dir_ in dirs):
+        return
+    if any(file_ not in SORTER_FILES for file_ in files):
+        return
+    try:
+        shutil.rmtree(root)
+    except OSError:
+        return
+    removed.add(root)
+
+
+def _remove_empty_subtree(path):
+    removed = set()
+    for root, dirs, files in os.walk(path, topdown=False):
+        _remove_if_empty(root, dirs, files, removed)
+    return removed
+
+
+def remove_empty_tree(path, workers=1):
+    """Remove the folders below path that hold nothing but SORTER_FILES
+    once their empty subfolders are gone. path itself is never removed, as
+    in remove_drained.
+
+    The whole tree is walked, bottom-up, each subfolder of path by one of
+    workers threads. Return the set of folders removed.
+    """
+    try:
+        root, dirs, _ = next(os.walk(path))
+    except StopIteration:
+        return set()
+    subtrees = [os.path.join(root, dir_) for dir_ in dirs
+                if not os.path.islink(os.path.join(root, dir_))]
+    removed = set()
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        for subtree_removed in executor.map(_remove_empty_subtree, subtrees):
+            removed.update(subtree_removed)
+    return removed
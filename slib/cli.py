@@ -0,0 +1,293 @@
+#! /usr/bin/env python3
+"""Sort a folder without the GUI.
+
+Progress and the report are written to stdout as JSON lines, one object per
+line, each with an "event" key:
+
+    message - a progress update: msg, weight and, once known, percent
+    move - a file moved: id, filename, source, destination, added_at (with
+        --watch, written as the files are moved, without id and added_at)
+    undone - a move reversed by --undo: id
+    done - the summary of the run: run_id, moved, cancelled, elapsed, and
+        undone and failed for --undo
+
+The exit status is one of the EXIT_* values below.
+
+Run from the project root:
+
+    python -m slib.cli SOURCE [-d DESTINATION] [options]
+    python -m slib.cli --undo RUN_ID
+    python -m slib.cli SOURCE --watch [options]
+
+With --watch the files arriving in SOURCE are sorted until SIGINT or
+SIGTERM, which end the run normally.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import threading
+
+# Only the standard library is imported until the arguments are parsed,
+# so that --help and usage errors return at once
+
+EXIT_OK = 0
+
+EXIT_ERROR = 1          # The operation failed
+
+EXIT_USAGE = 2          # Invalid arguments or folders
+
+EXIT_PARTIAL = 3        # Some moves could not be undone
+
+EXIT_SIGNAL = 128       # Plus the number of the signal that cancelled the run
+
+CONFLICT_POLICIES = ('rename', 'skip', 'overwrite')     # As in nameindex
+
+JOIN_INTERVAL = 0.1     # Seconds between two checks for signals
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m slib.cli', description=__doc__.splitlines()[0])
+    parser.add_argument('source', nargs='?', help='the folder to sort')
+    parser.add_argument('-d', '--destination', default='',
+                        help='the folder to sort into (default: source)')
+    parser.add_argument('-s', '--search', dest='search_string', default='',
+                        metavar='TEXT', help='only include file and folder names with this value')
+    parser.add_argument('-t', '--types', dest='file_types', nargs='+', default=['*'],
+                        metavar='EXT', help='only include these file extensions')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help='look into sub-folders')
+    parser.add_argument('--full', dest='incremental', action='store_false',
+                        help='with -r, look into every sub-folder, even those unchanged '
+                        'since the last run with the same options')
+    parser.add_argument('-g', '--group', action='store_true',
+                        help='group files into category folders')
+    parser.add_argument('-e', '--by-extension', action='store_true',
+                        help='group files by file type')
+    parser.add_argument('-f', '--group-folder-name', default=None, metavar='NAME',
+                        help='the name of the folder to group files into')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='the number of threads moving files (default 1)')
+    parser.add_argument('-c', '--conflict', choices=CONFLICT_POLICIES, default='rename',
+                        help='what to do when a file name is taken (default rename)')
+    parser.add_argument('--cleanup', nargs='?', const='moved', choices=('moved', 'full'),
+                        help='remove the folders left empty in source: those the run '
+                        'moved files out of (default), or every folder (full)')
+    parser.add_argument('--undo', type=int, metavar='RUN_ID',
+                        help='move the files of a run back instead of sorting')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep sorting the files that arrive in source, until stopped')
+    parser.add_argument('--settle', type=float, default=None, metavar='SECONDS',
+                        help='with --watch, how long a file must stay unchanged before '
+                        'it is sorted (default 2)')
+    parser.add_argument('--poll', action='store_true',
+                        help='with --watch, list source every second instead of using inotify')
+    parser.add_argument('--db', default=None,
+                        help='the history database (default: the one of the GUI)')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='only write the done line (implies --no-report)')
+    parser.add_argument('--no-report', dest='report', action='store_false',
+                        help='do not write a line per file moved')
+    return parser
+
+
+class JsonLines(object):
+    """Writes events to a stream as JSON lines, from any thread."""
+
+    def __init__(self, stream, quiet=False):
+        self.stream = stream
+        self.quiet = quiet
+        self._lock = threading.Lock()
+
+    def write(self, event, flush=True, **values):
+        values['event'] = event
+        line = json.dumps(values, default=str, sort_keys=True)
+        with self._lock:
+            self.stream.write(line + '\n')
+            if flush:
+                self.stream.flush()
+
+    def send_message(self, through=None, msg='Ready', weight=0, value=100):
+        """A send_message for operations.SorterOps.start."""
+        if self.quiet:
+            return
+        values = {'msg': str(msg), 'weight': weight}
+        if through and 'progress_bar' in through:
+            values['percent'] = value
+        self.write('message', **values)
+
+
+def _run_cancellable(operations, task):
+    """Call task on a thread and cancel operations on SIGINT or SIGTERM.
+
+    Return the value returned by task, and the number of the signal that
+    cancelled it (None if none did). Exceptions raised by task are raised
+    again.
+    """
+    outcome = {}
+    received = []
+
+    def target():
+        try:
+            outcome['value'] = task()
+        except BaseException as error:
+            outcome['error'] = error
+
+    def on_signal(signum, frame):
+        received.append(signum)
+        operations.cancel()
+
+    handlers = {}
+    # Signal handlers can only be set from the main thread
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            handlers[signum] = signal.signal(signum, on_signal)
+    try:
+        thread = threading.Thread(target=target)
+        thread.start()
+        while thread.is_alive():
+            thread.join(JOIN_INTERVAL)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('value'), (received[0] if received else None)
+
+
+def _get_sort_options(args):
+    return {
+        'search_string': args.search_string,
+        'file_types': args.file_types,
+        'recursive': args.recursive,
+        'by_extension': args.by_extension,
+        'group_folder_name': args.group_folder_name,
+        'group': args.group or any([args.group_folder_name, args.search_string,
+                                    args.by_extension]),
+        'workers': args.workers,
+        'conflict': args.conflict,
+        'incremental': args.incremental,
+    }
+
+
+def _sort(args, operations, output):
+    kwargs = _get_sort_options(args)
+    start = time.perf_counter()
+    statistics, signum = _run_cancellable(operations, lambda: operations.start(
+        args.source, args.destination, output.send_message, **kwargs))
+    if statistics is None:
+        output.write('done', error='invalid source or destination folder')
+        return EXIT_USAGE
+
+    run_id = statistics.run_id
+    if args.report:
+        for record in operations.db_helper.iter_report_records(run_id):
+            output.write('move', flush=False, id=record.id, filename=record.filename,
+                         source=record.source, destination=record.destination,
+                         added_at=record.added_at)
+    if args.cleanup == 'full' and not operations.cancelled:
+        operations.perform_cleanup(os.path.abspath(args.source), args.workers)
+    elif args.cleanup and not operations.cancelled:
+        operations.cleanup_drained(os.path.abspath(args.source))
+    output.write('done', run_id=run_id, moved=statistics.moved,
+                 cancelled=operations.cancelled,
+                 elapsed=round(time.perf_counter() - start, 3))
+    if signum is not None:
+        return EXIT_SIGNAL + signum
+    return EXIT_OK
+
+
+def _watch(args, operations, output):
+    from slib.watch import SETTLE_TIME
+    kwargs = _get_sort_options(args)
+    kwargs['settle'] = SETTLE_TIME if args.settle is None else args.settle
+    kwargs['polling'] = args.poll
+    moved = []
+
+    def on_sorted(moves):
+        moved.append(len(moves))
+        if args.report:
+            for move in moves:
+                output.write('move', flush=False, filename=os.path.basename(move.source),
+                             source=move.source, destination=move.destination)
+            output.stream.flush()
+
+    start = time.perf_counter()
+    run_id, _ = _run_cancellable(operations, lambda: operations.watch(
+        args.source, args.destination, output.send_message, on_sorted=on_sorted,
+        **kwargs))
+    if run_id is None:
+        output.write('done', error='invalid source or destination folder')
+        return EXIT_USAGE
+    output.write('done', run_id=run_id, moved=sum(moved), cancelled=False,
+                 elapsed=round(time.perf_counter() - start, 3))
+    return EXIT_OK
+
+
+def _undo(args, operations, output):
+    if operations.db_helper.get_run(args.undo) is None:
+        output.write('done', run_id=args.undo, error='no such run')
+        return EXIT_USAGE
+    start = time.perf_counter()
+    result, signum = _run_cancellable(operations, lambda: operations.undo_run(
+        args.undo, output.send_message, workers=args.workers))
+    if args.report:
+        for path_id in result.undone:
+            output.write('undone', flush=False, id=path_id)
+    output.write('done', run_id=args.undo, undone=len(result.undone),
+                 failed=len(result.failed), cancelled=operations.cancelled,
+                 elapsed=round(time.perf_counter() - start, 3))
+    if signum is not None:
+        return EXIT_SIGNAL + signum
+    if result.failed:
+        return EXIT_PARTIAL
+    return EXIT_OK
+
+
+def main(argv=None, stream=None):
+    """Run the command line interface with the arguments argv (default
+    sys.argv[1:]), writing to stream (default sys.stdout). Return the exit
+    status."""
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if (args.source is None) == (args.undo is None):
+        parser.error('give either a source folder or --undo RUN_ID')
+    if not args.watch and (args.settle is not None or args.poll):
+        parser.error('--settle and --poll need --watch')
+    if args.watch and args.recursive:
+        parser.error('--watch does not look into sub-folders')
+    if args.quiet:
+        args.report = False
+    output = JsonLines(stream or sys.stdout, quiet=args.quiet)
+    logging.basicConfig(format='%(levelname)s %(message)s', level=logging.WARNING)
+
+    from slib.helpers import DatabaseHelper
+    from slib.operations import SorterOps
+    if args.db is None:
+        from data.settings import DB_NAME
+        args.db = DB_NAME
+
+    try:
+        db_helper = DatabaseHelper(args.db)
+        if not db_helper.initialise_db():
+            output.write('done', error='database initialisation failed')
+            return EXIT_ERROR
+        operations = SorterOps(db_helper)
+        if args.undo is not None:
+            return _undo(args, operations, output)
+        if args.watch:
+            return _watch(args, operations, output)
+        return _sort(args, operations, output)
+    except Exception as error:
+        logging.exception('Sorter operations failed.')
+        output.write('done', error=str(error))
+        return EXIT_ERROR
+
+
+if __name__ == '__main__':
+    sys.exit(main())
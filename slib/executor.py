@@ -0,0 +1,177 @@
+#! /usr/bin/env python3
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from slib.sdir import File, Folder
+from slib.nameindex import OVERWRITE
+
+
+class RunControl(object):
+    """Lets another thread pause, resume or cancel a running operation.
+
+    The operation calls wait between two units of work; pausing and
+    cancelling take effect there, so a move in progress is always
+    completed.
+
+    data attributes:
+        cancelled - True once cancel has been called
+        paused - True while the operation is paused
+
+    methods:
+        cancel
+        pause
+        resume
+        reset
+        wait
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # A paused operation has to wake up to notice it was cancelled
+        self._running.set()
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def reset(self):
+        """Clear a previous cancel or pause, before a new operation."""
+        self._cancelled.clear()
+        self._running.set()
+
+    def wait(self):
+        """Block while paused. Return False if the operation was cancelled,
+        else True."""
+        self._running.wait()
+        return not self.cancelled
+
+
+class MoveExecutor(object):
+    """Carries out the moves of a planner.MovePlan on a pool of worker
+    threads.
+
+    Moves into the same destination folder are serialised by a lock held
+    per folder, so identity file writes for a folder never interleave.
+    Moves into different folders run concurrently. With a single worker,
+    moves run on the calling thread.
+
+    Results are handed back to the calling thread in the order of the
+    plan, so that the caller alone talks to the user interface and the
+    database.
+
+    data attributes:
+        workers - the number of worker threads
+        send_message - method through which the progress of copies
+            across devices is reported, used with a single worker only
+        control - the RunControl checked before each move, if any
+        count - the number of files handled so far
+        elapsed - the number of seconds spent handling files so far
+        throughput - files handled per second
+
+    methods:
+        run
+        close
+    """
+
+    def __init__(self, workers=1, send_message=None, control=None):
+        self.workers = max(1, int(workers or 1))
+        # Worker threads must not talk to the user interface
+        self.send_message = send_message if self.workers == 1 else None
+        self.control = control
+        self.count = 0
+        self.elapsed = 0.0
+        self._pool = None
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    @property
+    def throughput(self):
+        if not self.elapsed:
+            return 0.0
+        return self.count / self.elapsed
+
+    def _get_lock(self, folder):
+        with self._locks_lock:
+            lock = self._locks.get(folder)
+            if lock is None:
+                lock = self._locks[folder] = threading.Lock()
+            return lock
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _apply(self, move):
+        with self._get_lock(os.path.dirname(move.destination)):
+            if move.kind == 'folder':
+                directory = Folder(move.source)
+            else:
+                directory = File(move.source)
+            # Only the overwrite policy may replace what is at the destination
+            return directory.relocate(move.destination, move.identity_folders,
+                                      self.send_message, overwrite=move.conflict == OVERWRITE)
+
+    def _get_moves(self, moves):
+        for move in moves:
+            if self.control is not None and not self.control.wait():
+                return
+            yield move
+
+    def run(self, moves):
+        """Carry out the planner.PlannedMove instances in moves and yield
+        (move, moved) tuples, moved being False if the move was not done.
+
+        At most workers * 4 moves are pending at a time, so moves is
+        consumed lazily. When self.control is cancelled, no further move is
+        started; the moves already started are still yielded.
+        """
+        start = time.perf_counter()
+        try:
+            if self.workers == 1:
+                for move in self._get_moves(moves):
+                    moved = self._apply(move)
+                    self.count += 1
+                    yield move, moved
+            else:
+                pool = self._get_pool()
+                pending = deque()
+                for move in self._get_moves(moves):
+                    pending.append((move, pool.submit(self._apply, move)))
+                    if len(pending) >= self.workers * 4:
+                        move, future = pending.popleft()
+                        moved = future.result()
+                        self.count += 1
+                        yield move, moved
+                while pending:
+                    move, future = pending.popleft()
+                    moved = future.result()
+                    self.count += 1
+                    yield move, moved
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def close(self):
+        """Shut down the worker threads, if any were started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,112 @@
+#! /usr/bin/env python3
+
+import os
+import time
+from collections import namedtuple
+
+# Folders modified this close to the time they were looked at are looked at
+# again, as a later change may not have moved their modification time (FAT
+# has a two second resolution)
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+FolderState = namedtuple('FolderState', ['mtime_ns', 'inode', 'checked_ns'])
+FolderState.__doc__ = """The state of a folder when it was last listed.
+
+mtime_ns - the st_mtime_ns of the folder, taken before it was listed
+inode - the st_ino of the folder
+checked_ns - when the folder was listed, in nanoseconds since the epoch,
+    0 if it must be listed again whatever its state
+"""
+
+
+class FolderIndex(object):
+    """The states of the folders of a tree as last listed by a recursive
+    operation, by which the folders that have not changed since are told
+    apart.
+
+    A folder whose modification time and inode are the same as when it was
+    last listed holds the same entries, so neither its files nor its list
+    of subfolders need to be read again. Its subfolders still have to be
+    checked, as changes deeper down do not reach its modification time.
+
+    data attributes:
+        states - dict of the FolderState of each folder, by path, as loaded
+        visited - dict of the FolderState of each folder reached by the
+            current operation, by path
+        unchanged - the number of folders found unchanged
+        racy_window - how recently, in nanoseconds, a folder may have been
+            modified before it was listed for its state to be trusted
+            (default RACY_WINDOW_NS)
+
+    methods:
+        get_stat
+        is_unchanged
+        get_children
+        keep
+        record
+        invalidate
+        get_changes
+    """
+
+    def __init__(self, states=None, racy_window=None):
+        self.states = dict(states or {})
+        self.visited = {}
+        self.unchanged = 0
+        self.racy_window = RACY_WINDOW_NS if racy_window is None else racy_window
+        self._children = None
+
+    @classmethod
+    def get_stat(cls, path):
+        """Return the os.stat_result of the folder path, with the time it
+        was taken in nanoseconds, or (None, 0) if it cannot be read."""
+        checked_ns = int(time.time() * 10 ** 9)
+        try:
+            return os.stat(path), checked_ns
+        except OSError:
+            return None, 0
+
+    def is_unchanged(self, path, stat):
+        """Return True if the folder path, whose os.stat_result is stat, has
+        not changed since it was last listed."""
+        state = self.states.get(path)
+        if state is None or stat is None:
+            return False
+        if (stat.st_mtime_ns, stat.st_ino) != (state.mtime_ns, state.inode):
+            return False
+        return state.mtime_ns < state.checked_ns - self.racy_window
+
+    def get_children(self, path):
+        """Return the paths of the known subfolders of path, sorted."""
+        if self._children is None:
+            self._children = {}
+            for folder in self.states:
+                parent = os.path.dirname(folder)
+                if parent != folder:
+                    self._children.setdefault(parent, []).append(folder)
+            for children in self._children.values():
+                children.sort()
+        return self._children.get(path, [])
+
+    def keep(self, path):
+        """Keep the state of the unchanged folder path."""
+        self.visited[path] = self.states[path]
+        self.unchanged += 1
+
+    def record(self, path, stat, checked_ns):
+        """Record the state of the folder path, listed after stat was taken
+        at checked_ns."""
+        self.visited[path] = FolderState(stat.st_mtime_ns, stat.st_ino, checked_ns)
+
+    def invalidate(self, path):
+        """Make the next operation list the folder path again."""
+        state = self.visited.get(path)
+        if state is not None:
+            self.visited[path] = state._replace(checked_ns=0)
+
+    def get_changes(self):
+        """Return the dict of the states that changed, by path, and the list
+        of the folders that were not reached by the current operation."""
+        changed = {path: state for path, state in self.visited.items()
+                   if self.states.get(path) != state}
+        removed = [path for path in self.states if path not in self.visited]
+        return changed, removed
@@ -3,18 +3,205 @@
 import os
 import logging
 import sqlite3
+import threading
+from collections import namedtuple, deque
 from datetime import datetime
+from slib.history import HistoryWriter, connect
+from slib.folderindex import FolderIndex, FolderState
 
 logger = logging.getLogger(__name__)
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "data.settings")
+PROGRESS_LOG_SIZE = 1000    # Lines kept by a ProgressLog
+
+# Each migration is the list of statements that brings the schema from the
+# previous version to its own (PRAGMA user_version). Databases created before
+# versioning have the version 0 schema, hence IF NOT EXISTS in the first one.
+# Do not alter released migrations, append new ones.
+MIGRATIONS = (
+    (1, (
+        """CREATE TABLE IF NOT EXISTS "data_file" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "filename" text NOT NULL, "filepath_hash" text NOT NULL, "last_modified" datetime NOT NULL, "added_at" datetime NOT NULL);""",
+        """CREATE TABLE IF NOT EXISTS "data_path" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "source" text NOT NULL, "destination" text NOT NULL, "accepted" bool NOT NULL, "added_at" datetime NOT NULL, "filename_id" integer NOT NULL REFERENCES "data_file" ("id"));""",
+        """CREATE INDEX IF NOT EXISTS "data_path_filename_id_1d40e5f2" ON "data_path" ("filename_id");""",
+    )),
+    (2, (
+        """CREATE TABLE "data_run" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "source" text NOT NULL, "destination" text NOT NULL, "started_at" datetime NOT NULL, "finished_at" datetime NULL);""",
+        """ALTER TABLE "data_file" ADD COLUMN "run_id" integer NULL REFERENCES "data_run" ("id");""",
+        """ALTER TABLE "data_path" ADD COLUMN "run_id" integer NULL REFERENCES "data_run" ("id");""",
+        """CREATE INDEX "data_file_run_id" ON "data_file" ("run_id");""",
+        """CREATE INDEX "data_path_run_id" ON "data_path" ("run_id");""",
+    )),
+    (3, (
+        # Looked up by alter_path when a move is undone
+        """CREATE INDEX "data_path_source_destination_added_at" ON "data_path" ("source", "destination", "added_at");""",
+        # Covers the accepted check of get_history, replaces the filename_id index
+        """CREATE INDEX "data_path_filename_id_accepted" ON "data_path" ("filename_id", "accepted");""",
+        """DROP INDEX IF EXISTS "data_path_filename_id_1d40e5f2";""",
+    )),
+    (4, (
+        # The folder states of folderindex.FolderIndex, per set of options
+        """CREATE TABLE "data_folder" ("scope" text NOT NULL, "path" text NOT NULL, "mtime_ns" integer NOT NULL, "inode" integer NOT NULL, "entries" integer NOT NULL, "checked_ns" integer NOT NULL, PRIMARY KEY ("scope", "path"));""",
+    )),
+    (5, (
+        # The folder states are a cache, so they are dropped rather than copied
+        """DROP TABLE "data_folder";""",
+        # Keyed by source folder too, so that the states of other scopes can be pruned
+        """CREATE TABLE "data_folder" ("scope" text NOT NULL, "source" text NOT NULL, "path" text NOT NULL, "mtime_ns" integer NOT NULL, "inode" integer NOT NULL, "checked_ns" integer NOT NULL, PRIMARY KEY ("scope", "path"));""",
+        """CREATE INDEX "data_folder_source" ON "data_folder" ("source");""",
+    )),
+    (6, (
+        # Moves are undone by id (mark_undone), so this index only slowed inserts
+        """DROP INDEX IF EXISTS "data_path_source_destination_added_at";""",
+    )),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+HISTORY_PAGE_SIZE = 100
+
+REPORT_CHUNK_SIZE = 500
+
+REPORT_QUERY = (
+    'SELECT "data_file"."filename", "data_path"."source", "data_path"."destination", '
+    '"data_path"."added_at" FROM "data_path" INNER JOIN "data_file" '
+    'ON "data_path"."filename_id" = "data_file"."id" '
+    'WHERE "data_path"."run_id" = ? ORDER BY "data_path"."id" DESC')
+
+REPORT_PAGE_SIZE = 100
+
+REPORT_PAGE_QUERY = (
+    'SELECT "data_path"."id", "data_file"."filename", "data_path"."source", '
+    '"data_path"."destination", "data_path"."added_at", "data_path"."accepted" '
+    'FROM "data_path" INNER JOIN "data_file" '
+    'ON "data_path"."filename_id" = "data_file"."id" '
+    'WHERE "data_path"."run_id" = ? AND "data_path"."id" < ? '
+    'ORDER BY "data_path"."id" DESC LIMIT ?')
+
+_MAX_ID = 2 ** 63 - 1
+
+# The original location is the source of the first data_path row of a file and
+# the current location the destination of its last one, both found through the
+# ("filename_id", "accepted") index. Window functions are not used, so that
+# SQLite versions before 3.25 can run it
+HISTORY_PAGE_QUERY = """
+SELECT "f"."id", "f"."filename", "first"."source", "last"."destination"
+FROM "data_file" AS "f"
+INNER JOIN "data_path" AS "first" ON "first"."id" = (
+    SELECT MIN("id") FROM "data_path" WHERE "filename_id" = "f"."id")
+INNER JOIN "data_path" AS "last" ON "last"."id" = (
+    SELECT MAX("id") FROM "data_path" WHERE "filename_id" = "f"."id")
+WHERE "f"."id" < ? AND EXISTS (SELECT 1 FROM "data_path"
+                               WHERE "filename_id" = "f"."id" AND "accepted")
+ORDER BY "f"."id" DESC LIMIT ?
+"""
+
+PATH_COLUMNS = ('id', 'source', 'destination', 'accepted', 'added_at', 'filename_id', 'run_id')
+
+HistoryRecord = namedtuple('HistoryRecord', ['id', 'filename', 'original_location',
+                                             'current_location'])
+HistoryRecord.__doc__ = """A file in the history, as returned by
+DatabaseHelper.get_history.
+
+id - the id of the data_file row
+filename - the name of the file when it was first moved
+original_location - where the file was before it was first moved
+current_location - where the file was moved to last
+"""
+
+ReportRecord = namedtuple('ReportRecord', ['id', 'filename', 'source', 'destination',
+                                           'added_at', 'accepted'])
+ReportRecord.__doc__ = """A move of a run, as returned by
+DatabaseHelper.get_report_page.
+
+id - the id of the data_path row
+filename - the name of the file
+source, destination - where the file was moved from and to
+added_at - when the move was recorded
+accepted - False if the move has been undone
+"""
+
+
+Run = namedtuple('Run', ['id', 'source', 'destination', 'started_at', 'finished_at'])
+Run.__doc__ = """A run, as returned by DatabaseHelper.get_run.
+
+id - the id of the data_run row
+source, destination - the folders the run sorted from and into
+started_at, finished_at - when the run started and finished (None if it
+    has not finished)
+"""
+
+
+RunStatistics = namedtuple('RunStatistics', ['run_id', 'moved', 'undone', 'started_at',
+                                             'finished_at'])
+RunStatistics.__doc__ = """The statistics of a run, as returned by
+DatabaseHelper.get_run_statistics.
+
+run_id - the id of the data_run row
+moved - the number of moves recorded for the run
+undone - how many of them have been moved back
+started_at, finished_at - when the run started and finished (None if it
+    has not finished)
+"""
+
+
+class SchemaVersionError(sqlite3.DatabaseError):
+    """Raise when the database was created by a newer version of Sorter."""
+
+
+def parse_datetime(value):
+    """Return the datetime stored as text in value, as written by the
+    sqlite3 datetime adapter."""
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f')
+    except ValueError:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+
+class ProgressLog(object):
+    """The most recent lines of the progress log.
+
+    Lines are only ever appended. Once maxlen lines are held, the oldest
+    are dropped, so memory use does not grow with the length of a run.
+    Listeners are called with each new line as it is added, so a view of
+    the log only has to insert that line.
 
+    data attributes:
+        maxlen - the number of lines kept
+
+    methods:
+        append
+        add_listener
+        remove_listener
+    """
+
+    def __init__(self, maxlen=PROGRESS_LOG_SIZE):
+        self.maxlen = maxlen
+        self._lines = deque(maxlen=maxlen)
+        self._listeners = []
 
-from django.core.wsgi import get_wsgi_application
-application = get_wsgi_application()
+    def __iter__(self):
+        return iter(list(self._lines))
 
-from data.models import File as DB_FILE, Path as DB_PATH
-from django.db.utils import OperationalError as DjangoOperationalError
+    def __len__(self):
+        return len(self._lines)
+
+    def append(self, line):
+        self._lines.append(line)
+        for listener in list(self._listeners):
+            listener(line)
+
+    def add_listener(self, listener):
+        """Call listener with every line appended from now on."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        try:
+            self._listeners.remove(listener)
+        except ValueError:
+            pass
 
 
 class InterfaceHelper(object):
@@ -27,19 +214,19 @@ class InterfaceHelper(object):
         status_config - ttk.Label.config
         messagebox - tkinter.messagebox
         progress_text - tkinter.text_widget
-        progress_info - StringVar() for progress logs
+        progress_log - ProgressLog of the messages shown to the user
 
     methods:
         message_user
     """
 
-    def __init__(self, progress_bar, progress_var, status, messagebox, progress_info):
+    def __init__(self, progress_bar, progress_var, status, messagebox, progress_log):
         progress_bar.configure(maximum=100)
         self.progress_bar = progress_bar
         self.progress_var = progress_var
         self.status = status
         self.messagebox = messagebox
-        self.progress_info = progress_info
+        self.progress_log = progress_log
 
     def message_user(self, through=None, msg='Ready', weight=0, value=100):
         """Show a message to the user.
@@ -62,10 +249,8 @@ class InterfaceHelper(object):
             self._update_progress_window(str(msg))
 
     def _update_progress_window(self, msg):
-        prev_text = self.progress_info.get()
-        _text = '{}{}  {}\n'.format(prev_text, str(datetime.now()), msg)
-        logger.debug(_text)
-        self.progress_info.set(_text)
+        logger.debug(msg)
+        self.progress_log.append('{}  {}\n'.format(datetime.now(), msg))
 
     def _use_status(self, msg, weight):
         _msg = str(msg)[:50]
@@ -98,116 +283,318 @@ class InterfaceHelper(object):
 class DatabaseHelper(object):
     """A helper class that interacts with the database.
 
+    Statements are run through a single sqlite3 connection, whose statement
+    cache keeps them prepared. ':memory:' can be used as db_name for an
+    in-memory database, e.g. in tests.
+
     data attributes:
         DB_NAME - the path to the database
-        db_path_objects - DB_PATH.objects
-        db_file_objects - DB_FILE.objects
         db_ready - True if database table have been created
 
     methods:
         initialise_db
-        get_start_value
+        get_schema_version
+        close
+        delete_db
+        start_run
+        finish_run
         get_report
-        update
-        alter_value
+        iter_report
+        get_run_statistics
+        get_writer
+        get_folder_index
+        save_folder_index
+        alter_path
         get_history
+        get_history_page
+        iter_history
     """
 
     def __init__(self, db_name):
         self.DB_NAME = db_name
-        self.db_file_objects = DB_FILE.objects
-        self.db_path_objects = DB_PATH.objects
         self.db_ready = False
+        self._connection = None
+        self._lock = threading.RLock()
+
+    @property
+    def connection(self):
+        with self._lock:
+            if self._connection is None:
+                self._connection = connect(self.DB_NAME, check_same_thread=False)
+            return self._connection
+
+    def _execute(self, query, parameters=()):
+        with self._lock:
+            return self.connection.execute(query, parameters).fetchall()
+
+    def close(self):
+        """Close the connection to the database. The next query opens a new
+        one, once initialise_db has been called again."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+            self.db_ready = False
+
+    def delete_db(self):
+        """Close the connection and remove the database file, with the
+        -wal and -shm files of its write-ahead log.
+
+        Stale log files next to a new database could be replayed into it,
+        so they are removed first. OSError is raised if a file cannot be
+        removed.
+        """
+        with self._lock:
+            self.close()
+            if self.DB_NAME == ':memory:':
+                return
+            for suffix in ('-wal', '-shm', ''):
+                try:
+                    os.remove(self.DB_NAME + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def get_schema_version(self):
+        """Return the schema version of the database (PRAGMA user_version)."""
+        return self._execute('PRAGMA user_version')[0][0]
 
     def initialise_db(self, test=False):
-        """Initialise database, set self.db_ready to True.
+        """Bring the database schema to SCHEMA_VERSION, set self.db_ready to
+        True.
 
+        Only the migrations newer than the version of the database are run.
         If test is True (for tests), drop tables first.
         """
         if not self.db_ready:
-            connection = sqlite3.connect(self.DB_NAME)
-            cursor = connection.cursor()
-
-            if test:
-                query1 = 'DROP TABLE IF EXISTS data_file'
-                query2 = 'DROP TABLE IF EXISTS data_path'
-                query3 = 'DROP TABLE IF EXISTS data_path_filename_id_1d40e5f2'
-                cursor.execute(query1)
-                cursor.execute(query2)
-                cursor.execute(query3)
-                connection.commit()
-            # Create tables
-            # Do not alter the queries, may not work with subsequent database
-            # operations
-            query1 = """CREATE TABLE IF NOT EXISTS "data_file" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "filename" text NOT NULL, "filepath_hash" text NOT NULL, "last_modified" datetime NOT NULL, "added_at" datetime NOT NULL);"""
-            query2 = """CREATE TABLE IF NOT EXISTS "data_path" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "source" text NOT NULL, "destination" text NOT NULL, "accepted" bool NOT NULL, "added_at" datetime NOT NULL, "filename_id" integer NOT NULL REFERENCES "data_file" ("id"));"""
-            query3 = """CREATE INDEX IF NOT EXISTS "data_path_filename_id_1d40e5f2" ON "data_path" ("filename_id");"""
-            cursor.execute(query1)
-            cursor.execute(query2)
-            cursor.execute(query3)
-            connection.commit()
-            connection.close()
+            with self._lock:
+                connection = self.connection
+                if test:
+                    with connection:
+                        # Indexes are dropped with their tables
+                        for table in ('data_path', 'data_file', 'data_run', 'data_folder'):
+                            connection.execute('DROP TABLE IF EXISTS "{0}"'.format(table))
+                        connection.execute('PRAGMA user_version = 0')
+
+                version = self.get_schema_version()
+                if version > SCHEMA_VERSION:
+                    raise SchemaVersionError(
+                        'database schema version {0} is newer than {1}'.format(
+                            version, SCHEMA_VERSION))
+                for number, statements in MIGRATIONS:
+                    if number <= version:
+                        continue
+                    logger.info('Migrating database to version %s', number)
+                    with connection:
+                        for statement in statements:
+                            connection.execute(statement)
+                        connection.execute('PRAGMA user_version = {0:d}'.format(number))
             self.db_ready = True
 
         return self.db_ready
 
-    def get_start_value(self):
-        """Return the index of the last database entry in the
-        db_file_objects table.
-
-        Return 0 if table has no entry.
+    def start_run(self, source, destination):
+        """Record the start of a run sorting source into destination and
+        return its id."""
+        with self._lock:
+            with self.connection:
+                cursor = self.connection.execute(
+                    'INSERT INTO "data_run" ("source", "destination", "started_at") '
+                    'VALUES (?, ?, ?)', (source, destination, datetime.now()))
+            return cursor.lastrowid
+
+    def finish_run(self, run_id):
+        """Record the end of the run run_id."""
+        with self._lock:
+            with self.connection:
+                self.connection.execute(
+                    'UPDATE "data_run" SET "finished_at" = ? WHERE "id" = ?',
+                    (datetime.now(), run_id))
+
+    def get_report(self, run_id):
+        """Return the (filename, source, destination, added_at) tuples
+        recorded by the run run_id, latest first."""
+        return list(self.iter_report(run_id))
+
+    def get_report_page(self, run_id, count, before_id=None):
+        """Return, latest first, ReportRecord tuples of up to count moves of
+        the run run_id, including those that have been undone.
+
+        Pages are keyed by id: pass the id of the last record of a page as
+        before_id to get the next one.
+        """
+        rows = self._execute(REPORT_PAGE_QUERY, (
+            run_id, _MAX_ID if before_id is None else before_id, count))
+        return [ReportRecord(id_, filename, source, destination,
+                             parse_datetime(added_at), bool(accepted))
+                for id_, filename, source, destination, added_at, accepted in rows]
+
+    def iter_report_records(self, run_id, page_size=REPORT_PAGE_SIZE):
+        """Yield, latest first, ReportRecord tuples of the moves of the run
+        run_id.
+
+        The records are read page_size at a time, as they are consumed, and
+        no cursor is left open in between.
         """
+        before_id = None
+        while True:
+            page = self.get_report_page(run_id, page_size, before_id)
+            yield from page
+            if len(page) < page_size:
+                return
+            before_id = page[-1].id
+
+    def iter_report(self, run_id, chunk_size=REPORT_CHUNK_SIZE):
+        """Yield the (filename, source, destination, added_at) tuples
+        recorded by the run run_id, latest first.
+
+        The rows are read from a single cursor, chunk_size at a time, so
+        memory use does not depend on the size of the run.
+        """
+        with self._lock:
+            cursor = self.connection.execute(REPORT_QUERY, (run_id,))
         try:
-            start_value = self.db_file_objects.last().id
-        except (AttributeError, DjangoOperationalError):
-            start_value = 0
-        return start_value
-
-    def get_report(self, start_value):
-        """Return the objects created by the current operations."""
-        paths = self.db_path_objects.filter(
-            id__gte=start_value).order_by('-pk')
-
-        report = []
-        for path in paths:
-            row_tup = (path.filename.filename, path.source,
-                       path.destination, path.added_at)
-            report.append(row_tup)
-        return report
-
-    def update(self, database_dict):
-        """Insert values of the current operations into the database."""
-        now = datetime.now()
-        file_list = []
-        for filename in database_dict.keys():
-            filename_dict = database_dict[filename]
-            this_filename = DB_FILE(added_at=now, **filename_dict['file'])
-            file_list.append(this_filename)
-        self.db_file_objects.bulk_create(file_list)
-
-        file_objects = DB_FILE.objects.filter(added_at=now)
-        path_list = []
-        for file_ in file_objects:
-            this_file = DB_PATH(
-                filename=file_, added_at=now, **database_dict[file_.filename]['path'])
-            path_list.append(this_file)
-        self.db_path_objects.bulk_create(path_list)
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for filename, source, destination, added_at in rows:
+                    yield filename, source, destination, parse_datetime(added_at)
+        finally:
+            cursor.close()
+
+    def get_run(self, run_id):
+        """Return the Run run_id, None if there is no such run."""
+        rows = self._execute(
+            'SELECT "id", "source", "destination", "started_at", "finished_at" '
+            'FROM "data_run" WHERE "id" = ?', (run_id,))
+        if not rows:
+            return None
+        id_, source, destination, started_at, finished_at = rows[0]
+        return Run(id_, source, destination, parse_datetime(started_at),
+                   parse_datetime(finished_at))
+
+    def get_run_statistics(self, run_id):
+        """Return the RunStatistics of the run run_id, None if there is no
+        such run."""
+        rows = self._execute(
+            'SELECT "data_run"."started_at", "data_run"."finished_at", '
+            '(SELECT COUNT(*) FROM "data_path" WHERE "run_id" = "data_run"."id"), '
+            '(SELECT COUNT(*) FROM "data_path" WHERE "run_id" = "data_run"."id" '
+            'AND NOT "accepted") FROM "data_run" WHERE "data_run"."id" = ?', (run_id,))
+        if not rows:
+            return None
+        started_at, finished_at, moved, undone = rows[0]
+        return RunStatistics(run_id, moved, undone, parse_datetime(started_at),
+                             parse_datetime(finished_at))
+
+    def get_writer(self, run_id=None, batch_size=None):
+        """Return a history.HistoryWriter that records the moves of the run
+        run_id into the database, batch_size moves per transaction."""
+        kwargs = {'run_id': run_id}
+        if batch_size is not None:
+            kwargs['batch_size'] = batch_size
+        if self.DB_NAME == ':memory:':
+            # Every connection to ':memory:' is a separate database
+            kwargs['connection'] = self.connection
+        return HistoryWriter(self.DB_NAME, **kwargs)
+
+    def get_folder_index(self, scope):
+        """Return a folderindex.FolderIndex of the folder states saved for
+        scope, the key of a source folder and a set of options."""
+        rows = self._execute(
+            'SELECT "path", "mtime_ns", "inode", "checked_ns" '
+            'FROM "data_folder" WHERE "scope" = ?', (scope,))
+        return FolderIndex({path: FolderState(*state) for path, *state in rows})
+
+    def save_folder_index(self, scope, index, source):
+        """Save the folder states of index that changed for scope, and
+        forget the folders it did not reach, in a single transaction.
+
+        Only the states of the last scope saved for the source folder
+        source are kept, those of its other scopes are deleted.
+        """
+        changed, removed = index.get_changes()
+        with self._lock:
+            with self.connection:
+                self.connection.execute(
+                    'DELETE FROM "data_folder" WHERE "source" = ? AND "scope" != ?',
+                    (source, scope))
+                self.connection.executemany(
+                    'DELETE FROM "data_folder" WHERE "scope" = ? AND "path" = ?',
+                    ((scope, path) for path in removed))
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO "data_folder" ("scope", "source", "path", '
+                    '"mtime_ns", "inode", "checked_ns") VALUES (?, ?, ?, ?, ?, ?)',
+                    ((scope, source, path) + tuple(state)
+                     for path, state in changed.items()))
+
+    @classmethod
+    def _get_conditions(cls, values, separator):
+        for column in values:
+            if column not in PATH_COLUMNS:
+                raise ValueError('unknown data_path column {!r}'.format(column))
+        return separator.join('"{0}" = ?'.format(column) for column in sorted(values))
 
     def alter_path(self, alter_value, finders):
-        """Alter the value of db_file_objects instance in the database.
+        """Alter the value of data_path rows in the database.
 
         finders - the key,value pairs to use to search for the entry in the
             table
         alter_value - the key,value pair of the value to alter in the database
             table
         """
-        self.db_path_objects.filter(**finders).update(**alter_value)
+        query = 'UPDATE "data_path" SET {0} WHERE {1}'.format(
+            self._get_conditions(alter_value, ', '),
+            self._get_conditions(finders, ' AND '))
+        parameters = [alter_value[key] for key in sorted(alter_value)] + \
+            [finders[key] for key in sorted(finders)]
+        with self._lock:
+            with self.connection:
+                self.connection.execute(query, parameters)
+
+    def mark_undone(self, path_ids):
+        """Set accepted to False on the data_path rows with the ids in
+        path_ids, in a single transaction."""
+        with self._lock:
+            with self.connection:
+                self.connection.executemany(
+                    'UPDATE "data_path" SET "accepted" = 0 WHERE "id" = ?',
+                    ((path_id,) for path_id in path_ids))
+
+    def get_history_page(self, count, before_id=None):
+        """Return, latest first, HistoryRecord tuples of up to count files
+        that have not been moved back.
+
+        Pages are keyed by id: pass the id of the last record of a page as
+        before_id to get the next one.
+        """
+        try:
+            rows = self._execute(HISTORY_PAGE_QUERY, (
+                _MAX_ID if before_id is None else before_id, count))
+        except sqlite3.OperationalError:
+            logger.exception('Reading the history from %s failed', self.DB_NAME)
+            raise
+        return [HistoryRecord(*row) for row in rows]
+
+    def iter_history(self, count=None, page_size=HISTORY_PAGE_SIZE):
+        """Yield, latest first, HistoryRecord tuples of up to count files (all
+        if count is None) that have not been moved back.
+
+        The records are read page_size at a time, as they are consumed.
+        """
+        before_id = None
+        while count is None or count > 0:
+            size = page_size if count is None else min(page_size, count)
+            page = self.get_history_page(size, before_id)
+            yield from page
+            if len(page) < size:
+                return
+            before_id = page[-1].id
+            if count is not None:
+                count -= len(page)
 
     def get_history(self, count):
-        """Return the number of db_file_objects instances as specified by count."""
-        try:
-            files = self.db_file_objects.all().order_by(
-                '-pk').select_related().filter(filename_path__accepted=True)[:count]
-        except (DjangoOperationalError, sqlite3.OperationalError):
-            files = ''
-        return files
+        """Return, latest first, HistoryRecord tuples of the last count
+        files that have not been moved back."""
+        return self.get_history_page(count)
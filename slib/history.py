@@ -0,0 +1,109 @@
+#! /usr/bin/env python3
+
+import sqlite3
+from datetime import datetime
+
+BATCH_SIZE = 500    # Moves written per transaction
+
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-8000',     # 8 MiB
+)
+
+INSERT_FILE = ('INSERT INTO "data_file" ("filename", "filepath_hash", "last_modified", '
+               '"added_at", "run_id") VALUES (?, ?, ?, ?, ?)')
+
+INSERT_PATH = ('INSERT INTO "data_path" ("source", "destination", "accepted", "added_at", '
+               '"filename_id", "run_id") VALUES (?, ?, 1, ?, ?, ?)')
+
+
+def connect(db_name, **kwargs):
+    """Return a sqlite3 connection to db_name with the PRAGMAS applied.
+
+    kwargs are passed to sqlite3.connect.
+    """
+    connection = sqlite3.connect(db_name, **kwargs)
+    for pragma in PRAGMAS:
+        connection.execute(pragma)
+    return connection
+
+
+class HistoryWriter(object):
+    """Writes the moves of an operation to the history database as they
+    happen.
+
+    Moves are buffered and written batch_size at a time, each batch in a
+    single transaction, so memory use does not grow with the number of
+    moves. Each data_path row is linked to the id of its data_file row, and
+    both to the run they belong to.
+
+    The writer has to be used from the thread that created it.
+
+    data attributes:
+        DB_NAME - the path to the database
+        run_id - the id of the data_run row of the moves
+        batch_size - the number of moves written per transaction
+        count - the number of moves written so far
+
+    methods:
+        add
+        flush
+        close
+    """
+
+    def __init__(self, db_name, batch_size=BATCH_SIZE, connection=None, run_id=None):
+        self.DB_NAME = db_name
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.count = 0
+        self._pending = []
+        self._connection = connection
+        self._own_connection = connection is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _get_connection(self):
+        if self._connection is None:
+            self._connection = connect(self.DB_NAME)
+        return self._connection
+
+    def add(self, filename, filepath_hash, last_modified, source, destination):
+        """Record the move of the file filename from source to destination.
+
+        last_modified is a datetime.
+        """
+        self._pending.append(
+            (filename, filepath_hash, last_modified, source, destination))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered moves in a single transaction."""
+        if not self._pending:
+            return
+        now = datetime.now()
+        connection = self._get_connection()
+        with connection:
+            cursor = connection.cursor()
+            for filename, filepath_hash, last_modified, source, destination in self._pending:
+                cursor.execute(INSERT_FILE, (filename, filepath_hash, last_modified, now,
+                                             self.run_id))
+                cursor.execute(INSERT_PATH, (source, destination, now, cursor.lastrowid,
+                                             self.run_id))
+        self.count += len(self._pending)
+        self._pending = []
+
+    def close(self):
+        """Write the remaining moves and close the connection."""
+        try:
+            self.flush()
+        finally:
+            if self._own_connection and self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,115 @@
+#! /usr/bin/env python3
+
+import os
+
+RENAME = 'rename'
+
+SKIP = 'skip'
+
+OVERWRITE = 'overwrite'     # Overwrite only if the incoming file is newer
+
+CONFLICT_POLICIES = (RENAME, SKIP, OVERWRITE)
+
+
+class _FolderNames(object):
+    """The names in one destination folder.
+
+    names maps each name to the modification time of the file, None if
+    it has not been needed yet. counters maps (stem, suffix) to the next
+    duplicate number to try.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.names = {}
+        self.counters = {}
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    self.names[entry.name] = None
+        except OSError:
+            pass
+
+    def get_mtime(self, name):
+        mtime = self.names[name]
+        if mtime is None:
+            try:
+                mtime = os.stat(os.path.join(self.folder, name)).st_mtime
+            except OSError:
+                mtime = 0.0
+            self.names[name] = mtime
+        return mtime
+
+
+class NameIndex(object):
+    """An index of the names in every destination folder used in a run.
+
+    Each folder is listed once, the first time a name is claimed in it.
+    Names claimed afterwards are added to the index, and the next free
+    duplicate number is kept per file stem, so resolving a name conflict
+    does not probe the disk.
+
+    data attributes:
+        policy - what to do when a name is taken:
+            rename - use the next free duplicate name (see
+                sdir.File.get_duplicate_name)
+            skip - leave the file where it is
+            overwrite - replace the existing file if the incoming one is
+                newer, skip it otherwise
+
+    methods:
+        claim
+        forget
+    """
+
+    def __init__(self, policy=RENAME):
+        if policy not in CONFLICT_POLICIES:
+            raise ValueError('unknown conflict policy {!r}'.format(policy))
+        self.policy = policy
+        self._folders = {}
+
+    def _get_folder(self, folder):
+        folder_names = self._folders.get(folder)
+        if folder_names is None:
+            folder_names = self._folders[folder] = _FolderNames(folder)
+        return folder_names
+
+    def _get_duplicate_name(self, folder_names, file_instance):
+        key = (file_instance.stem, file_instance.suffix)
+        count = folder_names.counters.get(key, 1)
+        name = file_instance.get_duplicate_name(count)
+        while name in folder_names.names:
+            count += 1
+            name = file_instance.get_duplicate_name(count)
+        folder_names.counters[key] = count + 1
+        return name
+
+    def claim(self, folder, file_instance, last_modified=None):
+        """Claim a name for file_instance (an sdir.File) in folder.
+
+        last_modified is the modification time of the incoming file, used
+        by the overwrite policy.
+
+        Return a tuple of the name to use, None if the file is to be
+        skipped, and the resolution: 'none' if the name was free, else
+        'rename', 'skip' or 'overwrite'.
+        """
+        folder_names = self._get_folder(folder)
+        name = file_instance.name
+        if name not in folder_names.names:
+            resolution = 'none'
+        elif self.policy == RENAME:
+            name = self._get_duplicate_name(folder_names, file_instance)
+            resolution = RENAME
+        elif self.policy == OVERWRITE and last_modified is not None and \
+                last_modified > folder_names.get_mtime(name):
+            resolution = OVERWRITE
+        else:
+            return None, SKIP
+        folder_names.names[name] = last_modified
+        return name, resolution
+
+    def forget(self, folder):
+        """Forget the names of folder, so that it is listed again the next
+        time a name is claimed in it."""
+        self._folders.pop(folder, None)
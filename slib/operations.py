@@ -1,12 +1,17 @@
 #! /usr/bin/env python3
 
 import os
-import shutil
 import hashlib
-from glob import iglob
-from slib.sdir import File, Folder, has_signore_file
+from slib.planner import MovePlanner
+from slib.nameindex import NameIndex
+from slib.sdir import HiddenPathCache
+from slib.executor import MoveExecutor, RunControl
+from slib.progress import ProgressAggregator
+from slib.undo import RunReverser
+from slib.cleanup import remove_drained, remove_empty_tree
+from slib.scanner import Scanner
+from slib.watch import FolderWatcher, SETTLE_TIME
 from datetime import datetime
-from data.settings import SORTER_IGNORE_FILENAME, SORTER_FOLDER_IDENTITY_FILENAME
 
 
 class SorterOps(object):
@@ -17,36 +22,69 @@ class SorterOps(object):
         dst - destination path
         search_string - the value to use in filename searching
         search_string_pattern - the pattern to use in searching for
-            files using iglob
+            files and folders
         glob_pattern - the final pattern to use in glob, which caters
             for inclusion and/or exclusion of certain file extensions
         group - boolean value which determines whether the files will
             be grouped by category or group_folder_name
         recursive - loop through all the subdirectories sorting files
             using the other parameters
-        file_types - the file types to include in iglob searching, in
-            in lower case
+        file_types - the file types to include in the search, in
+            lower case
         by_extension - boolean value which determins whether the files
             will be group by their extensions too
         group_folder_name - name of the final folder to which the files
             will be moved to
         status - an instance of a tkinter status bar, for interfacing
             with the user
-        database_dict - contains the values to be inserted into and/or
-            retrieved from the database tables after operations
+        history - the history.HistoryWriter recording the moves of the
+            current operation into the database
+        run_id - the id of the current operation in the database
+        last_run_id - the id of the last operation started, kept once it
+            is done
+        drained - the set of the folders the current operation moved
+            files or folders out of
+        last_drained - drained, for the last operation, kept once it is done
+        progress - the progress.ProgressAggregator of the current
+            operation, which the moves of each plan are counted by
+        workers - the number of threads used to move files
+        executor - the executor.MoveExecutor instance moving files for
+            the current operation
+        conflict - what to do when a file name is taken in the destination,
+            one of nameindex.CONFLICT_POLICIES
+        name_index - the nameindex.NameIndex of the destination folders
+            for the current operation
+        hidden_cache - the sdir.HiddenPathCache of the current operation
+        incremental - in recursive operations, leave out the folders that
+            have not changed since the last one with the same options
+        watcher - the watch.FolderWatcher of the current watch operation
+        control - the executor.RunControl through which another thread
+            pauses, resumes or cancels the current operation
+        cancelled - True if the last operation was cancelled
 
     class methods:
         is_writable
         perform_cleanup
 
     instance methods:
+        cleanup_drained
+        cancel
+        pause
+        resume
         form_search_pattern
+        undo_run
+        plan_files
+        execute_plan
         sort_files
         start
+        watch
     """
 
     def __init__(self, db_helper):
         self.db_helper = db_helper
+        self.control = RunControl()
+        self.last_run_id = None
+        self.last_drained = set()
         self._set_defaults()
 
     def _set_defaults(self):
@@ -62,7 +100,45 @@ class SorterOps(object):
         self.group_folder_name = None
         self.status = None
         self.parser = None
-        self.database_dict = {}
+        self.history = None
+        self.progress = None
+        self.run_id = None
+        self.drained = set()
+        self.workers = 1
+        self.executor = None
+        self.conflict = 'rename'
+        self.name_index = None
+        self.hidden_cache = None
+        self.incremental = True
+        self.watcher = None
+
+    @property
+    def cancelled(self):
+        return self.control.cancelled
+
+    def cancel(self):
+        """Stop the running operation once the moves in progress are done.
+
+        Safe to call from any thread.
+        """
+        self.control.cancel()
+        watcher = self.watcher
+        if watcher is not None:
+            watcher.stop()
+
+    def pause(self):
+        """Hold the running operation before its next move.
+
+        Safe to call from any thread.
+        """
+        self.control.pause()
+
+    def resume(self):
+        """Continue a paused operation.
+
+        Safe to call from any thread.
+        """
+        self.control.resume()
 
     @classmethod
     def is_writable(cls, folder_path):
@@ -85,39 +161,29 @@ class SorterOps(object):
         return ''.join(map(either, string))
 
     @classmethod
-    def perform_cleanup(cls, path):
+    def perform_cleanup(cls, path, workers=1):
         """Walks through the subdirectories and removes any empty subdirectory.
 
         Empty subdirectories include those which contain only the SORTER_IGNORE_FILENAME
-        and/or SORTER_FOLDER_IDENTITY_FILENAME files.
+        and/or SORTER_FOLDER_IDENTITY_FILENAME files. The whole tree is walked,
+        by workers threads (see cleanup.remove_empty_tree); after a run,
+        cleanup_drained only looks at the folders the run emptied.
         """
-        sorter_files = [SORTER_IGNORE_FILENAME,
-                        SORTER_FOLDER_IDENTITY_FILENAME]
-        if os.name != 'nt':
-            sorter_files.append('.directory')
-
-        def has_other_files(files):
-            count = 0
-            len_sorter_files = len(sorter_files)
-            for file_ in files:
-                count += 1
-                if file_ not in sorter_files:
-                    return True
-                if count > len_sorter_files:
-                    break
-            return False
+        return remove_empty_tree(path, workers)
 
-        def has_existent_dirs(root, dirs):
-            for dir_ in dirs:
-                if os.path.isdir(os.path.join(root, dir_)):
-                    return True
-            return False
+    def cleanup_drained(self, path, folders=None):
+        """Remove the folders below path that the moves of a run left with
+        nothing but Sorter's files, then the parents they leave in the same
+        state (see cleanup.remove_drained).
 
-        for root, dirs, files in os.walk(path, topdown=False):
-            if not has_existent_dirs(root, dirs):
-                keep = has_other_files(files)
-                if not keep:
-                    shutil.rmtree(root)
+        folders - the folders the run moved files or folders out of.
+            Defaults to self.last_drained, those of the last operation.
+
+        Return the list of folders removed.
+        """
+        if folders is None:
+            folders = self.last_drained
+        return remove_drained(folders, path)
 
     def form_search_pattern(self, search_string):
         """Return a search pattern if search_string is provided.
@@ -137,51 +203,89 @@ class SorterOps(object):
                     '?'.join(insensitive_string.split())
             return search_string_pattern
 
-    def sort_files(self, src=None, send_message=None):
-        """Move files in relation to their extensions and categories.
+    def undo_run(self, run_id, send_message=None, workers=1, selected=None):
+        """Move the files of the run run_id back to where they came from,
+        all at once (see undo.RunReverser), or only those of the data_path
+        ids in selected.
 
-        This function runs according to the patterns of the sdir module.
+        The reversal can be paused, resumed or cancelled like start.
+        Return an undo.UndoResult.
+        """
+        self.control.reset()
+        reverser = RunReverser(self.db_helper, workers, send_message, self.control)
+        return reverser.undo_run(run_id, selected=selected)
+
+    def _get_planner(self):
+        return MovePlanner(self.file_types, self.search_string_pattern, group=self.group,
+                           by_extension=self.by_extension, group_folder_name=self.group_folder_name,
+                           name_index=self.name_index or NameIndex(self.conflict),
+                           hidden_cache=self.hidden_cache)
+
+    def plan_files(self, src=None, recursive=False, send_message=None, index=None):
+        """Return a planner.MovePlan of the files to be sorted, without
+        moving anything.
+
+        The source folder is listed once by a scanner.Scanner, whatever
+        the number of file types selected. index is as in
+        planner.MovePlanner.plan_files.
         """
         source_path = src or self.src
         destination_path = self.dst or source_path
-        string_pattern = self.search_string_pattern
-        file_types = self.file_types
-        glob_pattern = self.glob_pattern
-        group_folder_name = self.group_folder_name
-
-        string_glob_pattern = string_pattern + glob_pattern
-
-        glob_files = (i for item in file_types for i in iglob(os.path.join(
-            source_path, string_glob_pattern + item)) if os.path.isfile(i))
-        send_message(through=['status'],
-                     msg='Searching for files...', weight=1)
-
-        for file_ in glob_files:
-            file_instance = File(os.path.join(source_path, file_))
-
-            initial_path = file_instance.path
-            initial_name = file_instance.name
-            last_modified = os.path.getmtime(initial_path)
-
-            file_instance.move_to(destination_path, group=self.group,
-                                  group_folder_name=group_folder_name, by_extension=self.by_extension)
-            new_path = file_instance.path
-            if initial_path != new_path:
-                msg = 'Moved {} to {}'.format(file_instance.name, new_path)
-                send_message(through=['status'], msg=msg, weight=1)
-                # Write to DB
-                hash_path = hashlib.md5(
-                    initial_path.encode('utf-8')).hexdigest()
-
-                file_dict = {'filename': initial_name, 'filepath_hash': hash_path,
-                             'last_modified': datetime.fromtimestamp(last_modified)}
-                path_dict = {'source': initial_path,
-                             'destination': new_path}
+        if send_message is not None:
+            send_message(through=['status'],
+                         msg='Searching for files...', weight=1)
+        planner = self._get_planner()
+        if recursive:
+            return planner.plan_files(source_path, self.dst, recursive=True,
+                                      send_message=send_message, control=self.control,
+                                      index=index)
+        return planner.plan_files(source_path, destination_path)
+
+    def execute_plan(self, plan, send_message):
+        """Carry out the moves in plan and record them through self.history.
+
+        The moves are done by self.executor (an executor.MoveExecutor) and
+        counted by self.progress, if set. Return the list of the
+        planner.PlannedMove instances carried out.
+        """
+        executor = self.executor or MoveExecutor(self.workers, send_message, self.control)
+        if self.progress is not None:
+            self.progress.add_total(len(plan), plan.size)
+        done = []
+        try:
+            for move, moved in executor.run(plan):
+                if moved:
+                    msg = 'Moved {} to {}'.format(
+                        os.path.basename(move.destination), move.destination)
+                    send_message(through=['status'], msg=msg, weight=1)
+                    self._record_move(move)
+                    self.drained.add(os.path.dirname(move.source))
+                    done.append(move)
+                if self.progress is not None:
+                    self.progress.advance(move.size)
+        finally:
+            if executor is not self.executor:
+                executor.close()
+        return done
+
+    def _record_move(self, move):
+        if self.history is None:
+            return
+        hash_path = hashlib.md5(
+            move.source.encode('utf-8')).hexdigest()
+        self.history.add(os.path.basename(move.source), hash_path,
+                         datetime.fromtimestamp(move.last_modified),
+                         move.source, move.destination)
 
-                this_file_dict = {initial_name: {
-                    'file': file_dict, 'path': path_dict}}
+    def sort_files(self, src=None, send_message=None):
+        """Move files in relation to their extensions and categories.
 
-                self.database_dict.update(this_file_dict)
+        This function runs according to the patterns of the sdir module.
+        The moves are planned first (see plan_files) then carried out by
+        execute_plan.
+        """
+        plan = self.plan_files(src, send_message=send_message)
+        self.execute_plan(plan, send_message)
 
     def _verify_path(self, path, path_name=''):
         if not os.path.isdir(path) or not os.path.isabs(path):
@@ -216,66 +320,70 @@ class SorterOps(object):
             self.glob_pattern = '*.'
         return self.glob_pattern
 
+    def _get_index_scope(self):
+        """Return the key under which the folder states of a recursive
+        operation with the current options are saved.
+
+        The folders left unchanged by one set of options may hold files
+        another would move, so each set has its own states. Only those of
+        the last set used on a source folder are kept.
+        """
+        options = (self.src, self.dst, sorted(self.file_types), self.search_string_pattern,
+                   self.group, self.by_extension, self.group_folder_name, self.conflict)
+        return hashlib.md5(repr(options).encode('utf-8')).hexdigest()
+
     def _recursive_operation(self, send_message):
-        source_path = self.src
-        for root, dirs, files in os.walk(source_path):
-            msg = 'Checking directory {}'.format(root)
-            send_message(
-                through=['status'], msg=msg, weight=1)
-            self.sort_files(root, send_message=send_message)
-            if not dirs and not files:
-                try:
-                    os.rmdir(root)
-                except PermissionError:
-                    msg = 'Could not delete {}. May have hidden files.'.format(
-                        root)
-                    send_message(
-                        through=['status'], msg=msg, weight=1)
+        index = scope = None
+        if self.incremental:
+            scope = self._get_index_scope()
+            index = self.db_helper.get_folder_index(scope)
+        plan = self.plan_files(recursive=True, send_message=send_message, index=index)
+        if index is not None and index.unchanged:
+            msg = 'Skipped {} unchanged folders'.format(index.unchanged)
+            send_message(through=['status'], msg=msg, weight=1)
+        done = self.execute_plan(plan, send_message)
+        if self.cancelled:
+            return
+        # Folders empty when planned may have been moved into since
+        filled = set(os.path.dirname(move.destination) for move in done)
+        for folder in plan.empty_folders:
+            if folder in filled:
+                continue
+            try:
+                os.rmdir(folder)
+                self.drained.add(os.path.dirname(folder))
+            except OSError:
+                msg = 'Could not delete {}. May have hidden files.'.format(
+                    folder)
+                send_message(
+                    through=['status'], msg=msg, weight=1)
+        if index is not None:
+            # Files left behind are looked at again by the next operation
+            moved = set(move.source for move in done)
+            for move in plan.skipped + plan.moves:
+                if move.source not in moved:
+                    index.invalidate(os.path.dirname(move.source))
+            self.db_helper.save_folder_index(scope, index, self.src)
 
     def _sort_folders_operation(self, send_message):
         source_path = self.src
         destination_path = self.dst or self.src
-        search_string_pattern = self.search_string_pattern
-        search_string = self.search_string
 
-        folder_list_matching_pattern = iglob(os.path.join(
-            source_path, search_string_pattern + '*'))
-        folders = (folder for folder in folder_list_matching_pattern if os.path.isdir(
-            folder) and not has_signore_file(folder))
+        # The folders are planned once the files are moved, so they are
+        # counted apart rather than added to the total of the files
+        if self.progress is not None:
+            self.progress.start_phase('Folders')
         send_message(through=['status'],
                      msg='Searching for folders...', weight=1)
+        plan = self._get_planner().plan_folders(
+            source_path, destination_path, group_folder_name=self.search_string)
+        self.execute_plan(plan, send_message)
 
-        for folder in folders:
-            folder_path = os.path.join(source_path, folder)
-            folder_instance = Folder(folder_path)
-
-            initial_path = folder_instance.path
-            initial_name = folder_instance.name
-            last_modified = os.path.getmtime(initial_path)
-
-            msg = 'Moving {} to {}'.format(
-                folder_instance.path, destination_path)
-            send_message(through=['status'], msg=msg, weight=1)
-            folder_instance.move_to(
-                destination_path, group_folder_name=search_string)
-
-            new_path = folder_instance.path
-            if initial_path != new_path:
-                msg = 'Moved {} to {}'.format(folder_instance.name, new_path)
-                send_message(through=['status'], msg=msg, weight=1)
-                # Write to DB
-                hash_path = hashlib.md5(
-                    initial_path.encode('utf-8')).hexdigest()
-
-                file_dict = {'filename': initial_name, 'filepath_hash': hash_path,
-                             'last_modified': datetime.fromtimestamp(last_modified)}
-                path_dict = {'source': initial_path,
-                             'destination': new_path}
-
-                this_file_dict = {initial_name: {
-                    'file': file_dict, 'path': path_dict}}
-
-                self.database_dict.update(this_file_dict)
+    def _report_throughput(self, send_message):
+        executor = self.executor
+        msg = 'Handled {0} files in {1:.2f}s ({2:.1f} files/s, {3} workers)'.format(
+            executor.count, executor.elapsed, executor.throughput, executor.workers)
+        send_message(through=['status'], msg=msg, weight=1)
 
     def _set_group_folder_name(self, group_folder_name):
         if group_folder_name:
@@ -285,10 +393,51 @@ class SorterOps(object):
         else:
             return None
 
+    def _prepare(self, src, dst, send_message, kwargs):
+        """Check src and dst and set the options in kwargs for an operation,
+        as described in start.
+
+        Return False, once the user has been told why, if src or dst cannot
+        be used, else True.
+        """
+        proceed, msg = self._check_source_path(src)
+        if proceed:
+            proceed, msg = self._check_dst_path(dst)
+        if not proceed:
+            send_message(through=['status', 'progress_bar',
+                                  'dialog'], msg=msg, weight=2)
+            return False
+
+        self.search_string = kwargs.get('search_string', None)
+        self.search_string_pattern = self.form_search_pattern(
+            self.search_string)
+        self.file_types = kwargs.get('file_types', ['*'])
+        self.glob_pattern = self._set_glob_pattern()
+        self.recursive = kwargs.get('recursive', False)
+        self.group = kwargs.get('group', False)
+        self.by_extension = kwargs.get('by_extension', False)
+        self.group_folder_name = self._set_group_folder_name(
+            kwargs.get('group_folder_name', None))
+        self.workers = kwargs.get('workers', 1)
+        self.conflict = kwargs.get('conflict', 'rename')
+        self.incremental = kwargs.get('incremental', True)
+        self.name_index = NameIndex(self.conflict)
+        self.hidden_cache = HiddenPathCache()
+        self.control.reset()
+        return True
+
     def start(self, src, dst, send_message, **kwargs):
         """Initiate Sorter operations.
 
-        Execution starts from here once the Run button is clicked.
+        Execution starts from here once the Run button is clicked. start
+        may run on a background thread, in which case send_message must be
+        safe to call from it. The operation can be paused, resumed or
+        cancelled from another thread through pause, resume and cancel;
+        a cancelled operation returns once the moves in progress are done.
+
+        Return the helpers.RunStatistics of the run, whose moves are read
+        through DatabaseHelper.iter_report_records, or None if src or dst is
+        not a valid folder.
 
         src/source_path - path of origin
         dst/destination_path - destined root path
@@ -304,72 +453,122 @@ class SorterOps(object):
             group_folder_name - the name to give the destination folder.
             group - boolean value determining whether to group into category or
                 group_folder_name value.
+            workers - the number of threads used to move files. Defaults to 1.
+            conflict - what to do when a file name is taken in the destination:
+                'rename' (default), 'skip' or 'overwrite' (if newer).
+            incremental - with recursive, only look into the folders that
+                changed since the last operation with the same options.
+                Defaults to True.
 
         group:
          - into folder/group_folder_name
          - by search value/search_string
          - by extension/file type
         """
-        proceed, msg = self._check_source_path(src)
-
-        if not proceed:
-            send_message(through=['status', 'progress_bar',
-                                  'dialog'], msg=msg, weight=2)
+        if not self._prepare(src, dst, send_message, kwargs):
             return None
-        else:
-            proceed, msg = self._check_dst_path(dst)
 
-            if not proceed:
-                send_message(
-                    through=['status', 'progress_bar', 'dialog'], msg=msg, weight=2)
-                return None
-            else:
-                self.search_string = kwargs.get('search_string', None)
-                self.search_string_pattern = self.form_search_pattern(
-                    self.search_string)
-                self.file_types = kwargs.get('file_types', ['*'])
-                self.glob_pattern = self._set_glob_pattern()
-                self.recursive = kwargs.get('recursive', False)
-                self.group = kwargs.get('group', False)
-                self.by_extension = kwargs.get('by_extension', False)
-                self.group_folder_name = self._set_group_folder_name(
-                    kwargs.get('group_folder_name', None))
-
-                send_message(through=['status', 'progress_bar'],
-                             msg='10% - running...', value=10)
-
-                # Get last row in database
-                start_value = self.db_helper.get_start_value()
-
-                send_message(through=['status', 'progress_bar'],
-                             msg='25% - running...', value=25)
+        # Per-file messages are coalesced into progress updates
+        self.progress = ProgressAggregator(send_message)
+        send_message = self.progress
+        self.executor = MoveExecutor(self.workers, send_message, self.control)
+
+        # Every move of this run is recorded against its id
+        self.run_id = self.last_run_id = self.db_helper.start_run(self.src, self.dst)
+        self.drained = self.last_drained = set()
 
+        # Moves are written to the database as they happen
+        self.history = self.db_helper.get_writer(self.run_id)
+        try:
+            try:
                 if self.recursive:
                     self._recursive_operation(send_message=send_message)
                 else:
                     self.sort_files(send_message=send_message)
+            finally:
+                self.executor.close()
+            self._report_throughput(send_message)
+            self.progress.flush()
 
-                send_message(through=['status', 'progress_bar'],
-                             msg='40% - running...', value=50)
+            send_message(through=['status'],
+                         msg='Saving data to database...', weight=1)
+            self.history.flush()
 
-                # Call database helper
+            if self.cancelled:
                 send_message(through=['status'],
-                             msg='Saving data to database...', weight=1)
-                self.db_helper.update(self.database_dict)
-
-                send_message(through=['status', 'progress_bar'],
-                             msg='60% - running...', value=50)
+                             msg='Sorting cancelled', weight=1)
+            elif self.search_string:
+                self._sort_folders_operation(send_message=send_message)
+        finally:
+            self.history.close()
+            self.db_helper.finish_run(self.run_id)
+            self.progress.flush()
 
-                if self.search_string:
-                    self.database_dict = {}
-                    self._sort_folders_operation(send_message=send_message)
-                    self.db_helper.update(self.database_dict)
+        statistics = self.db_helper.get_run_statistics(self.run_id)
 
-                send_message(through=['status', 'progress_bar'],
-                             msg='75% - running...', value=75)
-
-                report = self.db_helper.get_report(start_value)
+        self._set_defaults()
 
-                self._set_defaults()
+        return statistics
+
+    def _sort_batch(self, paths, send_message, on_sorted=None):
+        # The name index of the run is kept from one batch to the next, so
+        # only the folders of the moves that failed are listed again
+        plan = self._get_planner().plan_paths(paths, self.dst)
+        done = self.execute_plan(plan, send_message)
+        moved = set(move.source for move in done)
+        for move in plan.moves:
+            if move.source not in moved:
+                self.name_index.forget(os.path.dirname(move.destination))
+        self.history.flush()
+        self.progress.flush()
+        if on_sorted is not None:
+            on_sorted(done)
+
+    def watch(self, src, dst, send_message, on_sorted=None, settle=SETTLE_TIME,
+              polling=False, **kwargs):
+        """Sort the files that arrive in src until cancel is called.
+
+        The files are sorted in batches, once they are complete (see
+        watch.FolderWatcher), by the same rules as start. The files already
+        in src are sorted first. Subfolders are not watched, and folders are
+        not sorted.
+
+        src, dst, send_message and kwargs are as in start, except recursive
+        which is ignored.
+        on_sorted - called with the list of planner.PlannedMove instances
+            carried out, after each batch
+        settle - seconds a file's size must stay the same to be complete
+        polling - list the folder every second instead of using inotify
+
+        All the moves are recorded in one run. Return its id, None if src
+        or dst cannot be used.
+        """
+        if not self._prepare(src, dst, send_message, kwargs):
+            return None
 
-                return report
+        self.progress = ProgressAggregator(send_message)
+        send_message = self.progress
+        self.executor = MoveExecutor(self.workers, send_message, self.control)
+        self.run_id = self.last_run_id = self.db_helper.start_run(self.src, self.dst)
+        self.drained = self.last_drained = set()
+        self.history = self.db_helper.get_writer(self.run_id)
+        self.watcher = FolderWatcher(
+            self.src, Scanner(self.file_types, self.search_string_pattern),
+            settle=settle, control=self.control, polling=polling)
+        send_message(through=['status'], msg='Watching {}'.format(self.src), weight=1)
+        self.progress.flush()
+        try:
+            try:
+                self.watcher.run(lambda paths: self._sort_batch(
+                    paths, send_message, on_sorted))
+            finally:
+                self.executor.close()
+                self.watcher.close()
+        finally:
+            self.history.close()
+            self.db_helper.finish_run(self.run_id)
+            self.progress.flush()
+
+        run_id = self.run_id
+        self._set_defaults()
+        return run_id
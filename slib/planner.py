@@ -0,0 +1,258 @@
+#! /usr/bin/env python3
+
+import os
+import re
+import fnmatch
+from collections import namedtuple
+from slib.sdir import File, Folder, HiddenPathCache, has_signore_file
+from slib.scanner import Scanner
+from slib.nameindex import NameIndex
+from data.settings import SORTER_FOLDER_IDENTITY_FILENAME
+
+
+PlannedMove = namedtuple('PlannedMove', ['source', 'destination', 'kind', 'size',
+                                         'conflict', 'last_modified', 'identity_folders'])
+PlannedMove.__doc__ = """A single move in a MovePlan.
+
+source - the current path of the file or folder
+destination - the full path it is to be moved to
+kind - 'file' or 'folder'
+size - the size in bytes (the total size of the contents, for folders)
+conflict - how the destination name was resolved, as returned by
+    nameindex.NameIndex.claim: 'none', 'rename', 'skip' or 'overwrite'
+last_modified - the modification time of the source, as a timestamp
+identity_folders - (folder, ignore_file) pairs of the folders that get
+    identity files once the move is done
+"""
+
+
+class MovePlan(object):
+    """An in-memory list of PlannedMove instances, in the order in which
+    they are to be carried out.
+
+    data attributes:
+        moves - list of PlannedMove instances
+        skipped - list of PlannedMove instances left out because of a name
+            conflict (see nameindex.NameIndex)
+        empty_folders - folders found empty while planning, to be removed
+            once the plan has been executed
+        size - the total size in bytes of all the moves
+
+    methods:
+        add
+    """
+
+    def __init__(self):
+        self.moves = []
+        self.skipped = []
+        self.empty_folders = []
+
+    def __iter__(self):
+        return iter(self.moves)
+
+    def __len__(self):
+        return len(self.moves)
+
+    @property
+    def size(self):
+        return sum(move.size for move in self.moves)
+
+    def add(self, move):
+        if move.conflict == 'skip':
+            self.skipped.append(move)
+        else:
+            self.moves.append(move)
+
+
+class MovePlanner(object):
+    """Walks a source folder and works out where each file or folder is to
+    be moved to, without moving anything.
+
+    Destination names are resolved by a nameindex.NameIndex, against the
+    files already in the destination folders and the names claimed earlier
+    in the same run, so a plan can be executed in any order or in parallel.
+
+    data attributes:
+        scanner - the scanner.Scanner used to list files
+        name_index - the nameindex.NameIndex used to resolve names
+        hidden_cache - the sdir.HiddenPathCache used to leave out hidden
+            folders when planning recursively
+        search_pattern - the glob pattern folder names must match
+        group, by_extension, group_folder_name - as defined in
+            sdir.File.move_to
+
+    methods:
+        plan_files
+        plan_paths
+        plan_folders
+    """
+
+    def __init__(self, file_types=None, search_pattern='', group=False,
+                 by_extension=False, group_folder_name=None, name_index=None,
+                 hidden_cache=None):
+        self.scanner = Scanner(file_types, search_pattern)
+        self.name_index = name_index or NameIndex()
+        self.hidden_cache = hidden_cache or HiddenPathCache()
+        self.search_pattern = search_pattern or ''
+        self.group = group
+        self.by_extension = by_extension
+        self.group_folder_name = group_folder_name
+
+    def _add_file(self, plan, path, get_stat, destination_path):
+        file_instance = File(path)
+        final_dir, go_back, ignore_file = file_instance.get_destination(
+            destination_path, group=self.group, by_extension=self.by_extension,
+            group_folder_name=self.group_folder_name)
+        if os.path.dirname(file_instance.path) == final_dir:
+            return
+        stat = get_stat()
+        name, conflict = self.name_index.claim(
+            final_dir, file_instance, stat.st_mtime)
+        plan.add(PlannedMove(
+            source=file_instance.path,
+            destination=os.path.join(final_dir, name or file_instance.name),
+            kind='file',
+            size=stat.st_size,
+            conflict=conflict,
+            last_modified=stat.st_mtime,
+            identity_folders=File.get_identity_folders(
+                final_dir, go_back, ignore_file)))
+
+    def _add_files(self, plan, source_path, destination_path, entries=None):
+        if entries is None:
+            found = self.scanner.scan(source_path)
+        else:
+            found = self.scanner.select(entries)
+        for entry in found:
+            self._add_file(plan, entry.path, entry.stat, destination_path)
+
+    def plan_paths(self, paths, destination_path=None):
+        """Return a MovePlan for the files at paths.
+
+        destination_path defaults to the folder each file is in. Paths that
+        are not files, or whose names the scanner would leave out, are left
+        out.
+        """
+        plan = MovePlan()
+        for path in paths:
+            if not self.scanner.match(os.path.basename(path)) or not os.path.isfile(path):
+                continue
+            self._add_file(plan, path, lambda path=path: os.stat(path),
+                           destination_path or os.path.dirname(path))
+        return plan
+
+    def _list_folder(self, path):
+        try:
+            with os.scandir(path) as entries:
+                return list(entries)
+        except OSError:
+            return None
+
+    def _is_subfolder(self, entry):
+        try:
+            return entry.is_dir(follow_symlinks=False) and \
+                not self.hidden_cache.is_hidden(entry.path)
+        except OSError:
+            return False
+
+    def plan_files(self, source_path, destination_path=None, recursive=False,
+                   send_message=None, control=None, index=None):
+        """Return a MovePlan for the files in source_path.
+
+        destination_path defaults to the folder the files are in.
+        If recursive is True, the subfolders of source_path are included and
+        the folders found empty are listed in MovePlan.empty_folders. Hidden
+        subfolders, and those created by Sorter (with a
+        SORTER_FOLDER_IDENTITY_FILENAME file), are left out, together with
+        everything inside them. The whole tree is walked before the plan is
+        returned, so the folders created when it is executed are never
+        walked.
+        Planning stops between two folders once control (an
+        executor.RunControl) is cancelled, and waits while it is paused.
+
+        If index (a folderindex.FolderIndex) is given, the folders it
+        reports unchanged are not listed, and the state of the others is
+        recorded in it.
+        """
+        plan = MovePlan()
+        if not recursive:
+            self._add_files(plan, source_path, destination_path or source_path)
+            return plan
+
+        # Top-down, in the same order as os.walk
+        pending = [source_path]
+        while pending:
+            if control is not None and not control.wait():
+                break
+            root = pending.pop()
+            if index is not None:
+                stat, checked_ns = index.get_stat(root)
+                if index.is_unchanged(root, stat):
+                    index.keep(root)
+                    pending.extend(reversed([
+                        folder for folder in index.get_children(root)
+                        if not self.hidden_cache.is_hidden(folder)]))
+                    continue
+            if root != source_path and has_signore_file(root, SORTER_FOLDER_IDENTITY_FILENAME):
+                # Holds files already sorted. An unchanged folder cannot
+                # have become one, so only those about to be listed are checked
+                continue
+            entries = self._list_folder(root)
+            if index is not None and stat is not None:
+                # A folder that cannot be listed is tried again next time
+                index.record(root, stat, checked_ns if entries is not None else 0)
+            if entries is None:
+                continue
+            if not entries:
+                plan.empty_folders.append(root)
+            if send_message is not None:
+                msg = 'Checking directory {}'.format(root)
+                send_message(through=['status'], msg=msg, weight=1)
+            self._add_files(plan, root, destination_path or root, entries)
+            pending.extend(reversed([
+                entry.path for entry in entries if self._is_subfolder(entry)]))
+        return plan
+
+    @classmethod
+    def _get_folder_size(cls, path):
+        size = 0
+        for root, dirs, files in os.walk(path):
+            for file_ in files:
+                try:
+                    size += os.path.getsize(os.path.join(root, file_))
+                except OSError:
+                    pass
+        return size
+
+    def plan_folders(self, source_path, destination_path, group_folder_name=None):
+        """Return a MovePlan for the folders in source_path whose names match
+        the search pattern.
+
+        Folders with a SORTER_IGNORE_FILENAME file are left out.
+        """
+        plan = MovePlan()
+        matcher = re.compile(fnmatch.translate(self.search_pattern + '*'))
+        try:
+            entries = list(os.scandir(source_path))
+        except OSError:
+            return plan
+
+        for entry in entries:
+            if entry.name.startswith('.') or not matcher.match(entry.name):
+                continue
+            if not entry.is_dir() or has_signore_file(entry.path):
+                continue
+            folder_instance = Folder(entry.path)
+            if folder_instance.path == destination_path:
+                continue
+            final_dst, identity_folders = folder_instance.get_destination(
+                destination_path, group_folder_name)
+            plan.add(PlannedMove(
+                source=folder_instance.path,
+                destination=final_dst,
+                kind='folder',
+                size=self._get_folder_size(folder_instance.path),
+                conflict='none',
+                last_modified=entry.stat().st_mtime,
+                identity_folders=identity_folders))
+        return plan
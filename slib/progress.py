@@ -0,0 +1,141 @@
+#! /usr/bin/env python3
+
+import time
+from datetime import timedelta
+
+FRAME_RATE = 10     # Progress updates sent to the user per second
+
+
+def format_eta(seconds):
+    """Return seconds as H:MM:SS."""
+    return str(timedelta(seconds=int(seconds)))
+
+
+class ProgressAggregator(object):
+    """Sits between an operation and the send_message of the user
+    interface, and turns the per-file events of the operation into at
+    most frame_rate progress updates per second.
+
+    The totals of the moves are counted before they are carried out (see
+    add_total), so the percentage done and the time left are worked out
+    from the files and bytes handled so far. Renames cost about the same
+    per file and copies about the same per byte, so both count for half.
+
+    The aggregator is itself a send_message. Status messages are held and
+    only the latest one is shown on the next update, with the percentage
+    and the time left. Dialogs and warnings (weight 2) are sent at once.
+
+    data attributes:
+        send_message - the method the updates are sent through
+        interval - the minimum number of seconds between two updates
+        files, size - the total number of files and bytes to be handled
+        done_files, done_size - the number of files and bytes handled
+        percent - the percentage done, 0 until a total is known
+        eta - the estimated seconds left, None until a file is handled
+        phase - the name of the current phase, shown before the percentage,
+            None for the first one
+
+    methods:
+        add_total
+        advance
+        start_phase
+        flush
+    """
+
+    def __init__(self, send_message, frame_rate=FRAME_RATE, clock=time.monotonic):
+        self.send_message = send_message
+        self.interval = 1.0 / frame_rate
+        self.files = 0
+        self.size = 0
+        self.done_files = 0
+        self.done_size = 0
+        self.phase = None
+        self._clock = clock
+        self._start = None
+        self._last_update = None
+        self._pending = None
+        self._dirty = False
+
+    @property
+    def percent(self):
+        fractions = []
+        if self.files:
+            fractions.append(self.done_files / self.files)
+        if self.size:
+            fractions.append(self.done_size / self.size)
+        if not fractions:
+            return 0
+        return min(100, int(100 * sum(fractions) / len(fractions)))
+
+    @property
+    def eta(self):
+        percent = self.percent
+        if self._start is None or not percent:
+            return None
+        elapsed = self._clock() - self._start
+        return elapsed * (100 - percent) / percent
+
+    def add_total(self, files, size):
+        """Count files more files of size bytes in total to be handled."""
+        if self._start is None:
+            self._start = self._clock()
+        self.files += files
+        self.size += size
+
+    def advance(self, size):
+        """Count one file of size bytes as handled."""
+        self.done_files += 1
+        self.done_size += size
+        self._dirty = True
+        self._update()
+
+    def start_phase(self, name):
+        """Send the progress so far, then count the moves added from now on
+        as a new phase called name, from 0%.
+
+        Used for moves that cannot be counted before the earlier ones are
+        done, so that the percentage of a phase never goes down.
+        """
+        self.flush()
+        self.files = self.size = 0
+        self.done_files = self.done_size = 0
+        self._start = None
+        self.phase = name
+
+    def __call__(self, through=None, msg='Ready', weight=0, value=100):
+        through = through or ['status']
+        if weight == 2 or 'dialog' in through:
+            self.flush()
+            self.send_message(through=through, msg=msg, weight=weight, value=value)
+            return
+        self._pending = (msg, weight)
+        self._dirty = True
+        self._update()
+
+    def _update(self):
+        now = self._clock()
+        if self._last_update is not None and now - self._last_update < self.interval:
+            return
+        self._last_update = now
+        self.flush()
+
+    def flush(self):
+        """Send the held status message and the progress so far, if
+        anything happened since the last update."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        msg, weight = self._pending or ('running...', 1)
+        if not self.files:
+            self.send_message(through=['status'], msg=msg, weight=weight)
+            return
+        eta = self.eta
+        if eta is None:
+            progress = '{}%'.format(self.percent)
+        else:
+            progress = '{}% ({} left)'.format(self.percent, format_eta(eta))
+        if self.phase is not None:
+            progress = '{}: {}'.format(self.phase, progress)
+        self.send_message(through=['status', 'progress_bar'],
+                          msg='{} - {}'.format(progress, msg),
+                          weight=weight, value=self.percent)
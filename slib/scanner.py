@@ -0,0 +1,118 @@
+#! /usr/bin/env python3
+
+import os
+import re
+import fnmatch
+
+
+class Scanner(object):
+    """Lists a directory for the files that are to be sorted.
+
+    Each directory is listed once using os.scandir and the file type
+    information cached in the DirEntry objects is used instead of a
+    stat call per file. Extensions are matched, case-insensitively,
+    against a precomputed set so the cost of a scan does not grow with
+    the number of selected file types.
+
+    data attributes:
+        extensions - frozenset of the lower case extensions to include,
+            None if all files are to be included
+        search_pattern - the glob pattern (as formed by
+            SorterOps.form_search_pattern) that file names must match
+        name_matcher - the compiled search_pattern, None if no search
+            pattern was given
+
+    methods:
+        compile_extensions
+        compile_search_pattern
+        match
+        scan
+        select
+    """
+
+    def __init__(self, file_types=None, search_pattern=''):
+        self.extensions = self.compile_extensions(file_types)
+        self.search_pattern = search_pattern or ''
+        self.name_matcher = self.compile_search_pattern(self.search_pattern)
+
+    @classmethod
+    def compile_extensions(cls, file_types):
+        """Return a frozenset of lower case extensions from file_types.
+
+        Return None if file_types is empty or contains '*' i.e. all files
+        are to be included.
+        """
+        if not file_types or '*' in file_types:
+            return None
+        return frozenset(item.lower().lstrip('.') for item in file_types)
+
+    @classmethod
+    def compile_search_pattern(cls, search_pattern):
+        """Return a compiled regular expression of search_pattern.
+
+        The trailing wildcard is added here, the same way it is added to
+        the glob pattern in SorterOps.sort_files. Return None if
+        search_pattern is empty.
+        """
+        if not search_pattern:
+            return None
+        return re.compile(fnmatch.translate(search_pattern + '*'))
+
+    def _match_extension(self, name):
+        """Return the index of the dot that starts the matching extension,
+        -1 if no extension in self.extensions matches name.
+
+        Every dot in the name is tried so that multi-dot extensions such as
+        tar.gz are matched too.
+        """
+        lower_name = name.lower()
+        position = lower_name.find('.')
+        while position != -1:
+            if lower_name[position + 1:] in self.extensions:
+                return position
+            position = lower_name.find('.', position + 1)
+        return -1
+
+    def match(self, name):
+        """Return True if the file name should be included, else False.
+
+        Hidden files (names starting with a dot) are never included.
+        """
+        if name.startswith('.'):
+            return False
+        if self.extensions is None:
+            stem = name
+        else:
+            position = self._match_extension(name)
+            if position == -1:
+                return False
+            stem = name[:position]
+        if self.name_matcher is not None:
+            return self.name_matcher.match(stem) is not None
+        return True
+
+    def scan(self, path):
+        """Iterate over path and yield an os.DirEntry for every file that
+        should be included.
+
+        Yield nothing if path cannot be listed.
+        """
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return
+        with entries:
+            yield from self.select(entries)
+
+    def select(self, entries):
+        """Yield the os.DirEntry objects in entries, a listing of a
+        directory, of the files that should be included."""
+        for entry in entries:
+            if not self.match(entry.name):
+                continue
+            try:
+                is_file = entry.is_file()
+            except OSError:
+                continue
+            if is_file:
+                yield entry
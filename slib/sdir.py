@@ -1,12 +1,16 @@
 #! /usr/bin/env python3
 
 import os
-import shutil
+import errno
 import ctypes
+import logging
 from glob import iglob
-from data.filegroups import typeGroups, typeList
+from data.filegroups import typeList, extensionIndex, categories, get_extension
 from data.settings import SORTER_IGNORE_FILENAME, SORTER_FOLDER_IDENTITY_FILENAME
 from pathlib import Path
+from slib import transfer
+
+logger = logging.getLogger(__name__)
 
 
 def has_signore_file(path, filename=SORTER_IGNORE_FILENAME):
@@ -19,6 +23,19 @@ def has_signore_file(path, filename=SORTER_IGNORE_FILENAME):
         return True
 
 
+def is_hidden(path):
+    """Return True if the file or folder in path is hidden, regardless of
+    its parents."""
+    if os.name == 'nt':
+        try:
+            attrs = ctypes.windll.kernel32.GetFileAttributesW(path)
+        except AttributeError:
+            return False
+        return bool(attrs & 2)
+    base_name = os.path.basename(path)
+    return base_name.startswith('.') or base_name.startswith('__')
+
+
 def write_identity_file(path, ignore_file=False):
     """Create a SORTER_FOLDER_IDENTITY_FILENAME file in path."""
     files = []
@@ -49,9 +66,16 @@ class EmptyNameError(ValueError):
     """Raise when the given value is empty."""
 
 
+_UNSET = object()     # Marks a lazily evaluated attribute not computed yet
+
+
 class Directory(object):
     """A path object that can be a file or folder.
 
+    Only the path is stored when an instance is created. The other
+    attributes are derived from it when first needed, and setting path
+    (e.g. after a move) discards them instead of re-creating the instance.
+
     data attributes:
         Path - a pathlib.Path instance of this path
         path - the absolute path to this Directory instance
@@ -68,20 +92,23 @@ class Directory(object):
         in_hidden_path
     """
 
+    __slots__ = ('_path', '_Path', '_hidden_path')
+
+    # Slots reset to _UNSET whenever the path changes
+    _lazy_slots = ('_Path', '_hidden_path')
+
     def __init__(self, path):
-        if not os.path.isabs(path):
-            raise RelativePathError('relative paths cannot be used')
-        self.Path = Path(os.path.abspath(path))
-        self._path = self.Path.absolute().__str__()
-        self._parent = self.Path.parent.absolute().__str__()
-        self._name = self.Path.name
-        self._hidden_path = self.in_hidden_path(self._path)
-        self._suffix = self.Path.suffix
-        self._stem = self.Path.stem
+        self._set_path(path)
 
     def __str__(self):
         return self.path
 
+    @property
+    def Path(self):
+        if self._Path is _UNSET:
+            self._Path = Path(self._path)
+        return self._Path
+
     @property
     def path(self):
         return self._get_path()
@@ -92,55 +119,81 @@ class Directory(object):
 
     @property
     def parent(self):
-        return self._parent
+        return os.path.dirname(self._path)
 
     @property
     def name(self):
-        return self._name
+        return os.path.basename(self._path)
 
     @property
     def hidden_path(self):
+        if self._hidden_path is _UNSET:
+            self._hidden_path = self.in_hidden_path(self._path)
         return self._hidden_path
 
     @property
     def suffix(self):
-        return self._suffix
+        name = self.name
+        i = name.rfind('.')
+        # Same rules as pathlib.PurePath.suffix
+        if 0 < i < len(name) - 1:
+            return name[i:]
+        return ''
 
     @property
     def stem(self):
-        return self._stem
+        name = self.name
+        i = name.rfind('.')
+        if 0 < i < len(name) - 1:
+            return name[:i]
+        return name
 
     def _get_path(self):
         return self._path
 
     def _set_path(self, value):
-        self.__init__(value)
+        if not os.path.isabs(value):
+            raise RelativePathError('relative paths cannot be used')
+        self._path = os.path.abspath(value)
+        for slot in self._lazy_slots:
+            setattr(self, slot, _UNSET)
 
     def in_hidden_path(self, full_path):
         """Return True if any parent folder, or this instance, is hidden,
         False otherwise.
+
+        Recursive runs do not call this for each file: the planner leaves
+        hidden folders out, with everything inside them, as it walks.
         """
-        paths = full_path.split(os.sep)
+        path = full_path
+        while True:
+            if is_hidden(path):
+                return True
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+            path = parent
 
-        if os.name == 'nt':
-            get_hidden_attribute = ctypes.windll.kernel32.GetFileAttributesW
-            for i in range(len(paths) + 1):
-                path = os.sep.join(paths[:i])
-                try:
-                    attrs = get_hidden_attribute(path)
-                    result = bool(attrs & 2)
-                except AttributeError:
-                    result = False
-                if result:
-                    return True
-        else:
-            for i in range(len(paths) + 1):
-                path = str(os.sep).join(paths[:i])
-                base_name = os.path.basename(path)
-                if base_name.startswith('.') or base_name.startswith('__'):
-                    return True
 
-        return False
+class HiddenPathCache(object):
+    """Remembers which folders are hidden, so that each is checked once by
+    a run (see planner.MovePlanner). Create a new instance when the file
+    system may have changed e.g. once per run.
+
+    methods:
+        is_hidden
+    """
+
+    def __init__(self):
+        self._hidden = {}
+
+    def is_hidden(self, path):
+        """Return True if the folder in path is hidden, regardless of its
+        parents."""
+        hidden = self._hidden.get(path)
+        if hidden is None:
+            hidden = self._hidden[path] = is_hidden(path)
+        return hidden
 
 
 class File(Directory):
@@ -163,29 +216,32 @@ class File(Directory):
         touch
         get_category
         find_suitable_name
+        get_duplicate_name
         move_to
+        get_destination
+        get_identity_folders
+        relocate
     """
 
-    default_category = 'UNDEFINED'
+    __slots__ = ('_category',)
 
-    def __init__(self, path):
-        super(File, self).__init__(path)
-        extension = self.Path.suffix[1:]
-        self._extension = extension or self.default_category
-        self._category = self.get_category(extension)
-        self._exists = self.Path.is_file
+    _lazy_slots = Directory._lazy_slots + __slots__
+
+    default_category = 'UNDEFINED'
 
     @property
     def extension(self):
-        return self._extension
+        return self.suffix[1:] or self.default_category
 
     @property
     def category(self):
+        if self._category is _UNSET:
+            self._category = self.get_category(get_extension(self.name))
         return self._category
 
     @property
     def exists(self):
-        return self._exists()
+        return os.path.isfile(self._path)
 
     def touch(self, **kwargs):
         """Creates this file on the hard drive.
@@ -200,16 +256,12 @@ class File(Directory):
         """Return the category of the file instance as determined by its
         extension.
 
-        Categories are determined in the filegroups module.
+        Categories are looked up in filegroups.extensionIndex.
 
         The return value is not a full path, just the base name.
         """
         if extension:
-            file_extension = set([extension.upper()])
-            for key in typeGroups.keys():
-                common = set(typeGroups[key]) & file_extension
-                if common:
-                    return key
+            return extensionIndex.get(extension.upper(), self.default_category)
         return self.default_category
 
     def find_suitable_name(self, file_path):
@@ -221,14 +273,18 @@ class File(Directory):
         count = 1
 
         while os.path.isfile(file_path):
-            new_filename = '{0} - dup ({1}){2}'.format(
-                self.stem, count, self.suffix)
+            new_filename = self.get_duplicate_name(count)
             file_path = os.path.join(dirname, new_filename)
             count += 1
 
         return new_filename
 
-    def move_to(self, dst_root_path, group=False, by_extension=False, group_folder_name=None):
+    def get_duplicate_name(self, count):
+        """Return the name given to the count-th duplicate of this file."""
+        return '{0} - dup ({1}){2}'.format(self.stem, count, self.suffix)
+
+    def move_to(self, dst_root_path, group=False, by_extension=False, group_folder_name=None,
+                name_index=None):
         """Move the file instance to the location relative to the
         specified dst_root_path.
 
@@ -260,38 +316,89 @@ class File(Directory):
 
                 '/home/User/<group_folder_name>/<extension>/<this file>'
                 - group=True,by_extension=True,group_folder_name=<some name>
+
+        If a nameindex.NameIndex is given as name_index, name conflicts are
+        resolved through it instead of find_suitable_name, and the file may
+        be skipped depending on its conflict policy.
+        """
+        final_dir, go_back, ignore_file = self.get_destination(
+            dst_root_path, group=group, by_extension=by_extension,
+            group_folder_name=group_folder_name)
+
+        if not os.path.dirname(self.path) == final_dir:
+            overwrite = False
+            if name_index is None:
+                final_dst = self._set_final_destination(final_dir)
+            else:
+                name, resolution = name_index.claim(
+                    final_dir, self, os.path.getmtime(self.path))
+                if name is None:
+                    return
+                final_dst = os.path.join(final_dir, name)
+                overwrite = resolution == 'overwrite'
+            identity_folders = self.get_identity_folders(
+                final_dir, go_back, ignore_file)
+            self.relocate(final_dst, identity_folders, overwrite=overwrite)
+
+    def relocate(self, final_dst, identity_folders=(), send_message=None, overwrite=False):
+        """Move the file instance to final_dst, the full path of its new
+        location, and map self.path to it.
+
+        identity_folders - (folder, ignore_file) pairs of the folders in which
+            to write identity files once the file has been moved
+        send_message - method through which the progress of copies across
+            devices is reported (see transfer.move)
+        overwrite - replace a file already at final_dst, as decided by the
+            nameindex.NameIndex overwrite policy. Otherwise the file is not
+            moved if final_dst has been taken since it was planned.
+
+        Return True if the file was moved, False if it could not be, e.g.
+        because it was removed since it was planned or the disk is full.
+        """
+        try:
+            os.makedirs(os.path.dirname(final_dst), exist_ok=True)
+            transfer.move(self.path, final_dst, send_message, overwrite)
+        except OSError as error:
+            logger.warning('Not moved, %s: %s', self.path, error)
+            return False
+        for folder, ignore_file in identity_folders:
+            write_identity_file(folder, ignore_file=ignore_file)
+        self.path = final_dst
+        return True
+
+    @classmethod
+    def get_identity_folders(cls, final_dir, go_back, ignore_file):
+        """Return the (folder, ignore_file) pairs of the folders that get
+        identity files when a file is moved into final_dir.
+
+        go_back and ignore_file are as returned by get_destination.
+        """
+        if go_back == 2:
+            return [(os.path.dirname(final_dir), ignore_file), (final_dir, False)]
+        if go_back == 1:
+            return [(final_dir, ignore_file)]
+        return []
+
+    def get_destination(self, dst_root_path, group=False, by_extension=False, group_folder_name=None):
+        """Return a tuple of the folder this file would be moved to by
+        move_to, the number of parent folders (go_back) that get identity
+        files and whether the top one gets an ignore file.
+
+        The arguments are as defined in move_to. Nothing on the disk is
+        checked, the file name is resolved when the file is moved.
         """
         if group:
             if group_folder_name is None:
-                final_dst, go_back, ignore_file = self._set_category_filename_dst(
-                    dst_root_path, by_extension)
+                return self._get_category_dst(dst_root_path, by_extension)
             elif not group_folder_name.strip():
                 raise EmptyNameError('blank name not allowed')
             else:
-                final_dst, go_back, ignore_file = self._set_group_folder_dst(
+                return self._get_group_folder_dst(
                     dst_root_path, by_extension, group_folder_name.strip())
         else:
-            final_dst, go_back, ignore_file = self._set_extension_filename_dst(
-                dst_root_path)
+            return self._get_extension_dst(dst_root_path)
 
-        final_dir = os.path.dirname(final_dst)
-
-        if not os.path.dirname(self.path) == final_dir:
-            os.makedirs(final_dir, exist_ok=True)
-            try:
-                shutil.move(self.path, final_dst)
-            except PermissionError:
-                pass
-            else:
-                if go_back == 2:
-                    write_identity_file(os.path.dirname(
-                        os.path.dirname(final_dst)), ignore_file=ignore_file)
-                    write_identity_file(os.path.dirname(final_dst))
-                if go_back == 1:
-                    write_identity_file(os.path.dirname(final_dst), ignore_file=ignore_file)
-                self.path = final_dst
-
-    def _set_group_folder_dst(self, root_path, by_extension, group_folder_name):
+    def _get_group_folder_dst(self, root_path, by_extension, group_folder_name):
         if by_extension:
             group_folder_dst = os.path.join(
                 root_path, group_folder_name, self.extension.upper())
@@ -301,9 +408,9 @@ class File(Directory):
             group_folder_dst = os.path.join(root_path, group_folder_name)
             go_back = 1
             ignore_file = True
-        return self._set_final_destination(group_folder_dst), go_back, ignore_file
+        return group_folder_dst, go_back, ignore_file
 
-    def _set_category_filename_dst(self, root_path, by_extension):
+    def _get_category_dst(self, root_path, by_extension):
         if by_extension:
             category_dst = os.path.join(
                 root_path, self.category, self.extension.upper())
@@ -313,13 +420,13 @@ class File(Directory):
             category_dst = os.path.join(root_path, self.category)
             go_back = 1
             ignore_file = True
-        return self._set_final_destination(category_dst), go_back, ignore_file
+        return category_dst, go_back, ignore_file
 
-    def _set_extension_filename_dst(self, root_path):
+    def _get_extension_dst(self, root_path):
         extension_dst = os.path.join(root_path, self.extension.upper())
         go_back = 1
         ignore_file = False
-        return self._set_final_destination(extension_dst), go_back, ignore_file
+        return extension_dst, go_back, ignore_file
 
     def _set_final_destination(self, parent_path):
         dst = os.path.join(parent_path, self.name)
@@ -345,27 +452,31 @@ class Folder(Directory):
     methods:
         glob
         move_to
+        get_destination
+        relocate
         group
     """
 
-    default_category = 'FOLDERS'
+    __slots__ = ('_for_sorter', '_category_folder')
 
-    def __init__(self, path):
-        super(Folder, self).__init__(path)
-        self._exists = self.Path.is_dir
-        self._for_sorter = self._is_sorter_folder()
-        self._category_folder = self._get_category_folder()
+    _lazy_slots = Directory._lazy_slots + __slots__
+
+    default_category = 'FOLDERS'
 
     @property
     def exists(self):
-        return self._exists()
+        return os.path.isdir(self._path)
 
     @property
     def for_sorter(self):
+        if self._for_sorter is _UNSET:
+            self._for_sorter = self._is_sorter_folder()
         return self._for_sorter
 
     @property
     def category_folder(self):
+        if self._category_folder is _UNSET:
+            self._category_folder = self._get_category_folder()
         return self._category_folder
 
     def create(self, **kwargs):
@@ -401,10 +512,11 @@ class Folder(Directory):
             # For compatibility
             dirname = self.name
             if dirname.isupper():
-                if dirname == self.default_category or dirname in typeList:
+                if dirname == self.default_category or dirname in typeList \
+                        or dirname in extensionIndex:
                     return True
             else:
-                if dirname in typeGroups.keys():
+                if dirname in categories:
                     return True
         else:
             return True
@@ -414,11 +526,9 @@ class Folder(Directory):
     def _get_category_folder(self):
         # category folder is not full path
         if self.for_sorter:
-            if self.name.upper() in typeList:
-                category = [key for key in typeGroups.keys() if set(
-                    typeGroups[key]) & set([self.name])][0]
-                return category
-            if self.name in typeGroups.keys():
+            if self.name.upper() in extensionIndex:
+                return extensionIndex[self.name.upper()]
+            if self.name in categories:
                 return None
 
         return self.default_category
@@ -444,7 +554,17 @@ class Folder(Directory):
             else:
                 return
 
-        group_folder_name = kwargs.get('group_folder_name', None)
+        final_dst, identity_folders = self.get_destination(
+            dst_root_path, kwargs.get('group_folder_name', None))
+        self.relocate(final_dst, identity_folders)
+
+    def get_destination(self, dst_root_path, group_folder_name=None):
+        """Return a tuple of the path this folder would be moved to by
+        move_to and the (folder, ignore_file) pairs of the folders that get
+        identity files.
+
+        Nothing on the disk is changed.
+        """
         if group_folder_name:
             category_dst = os.path.join(dst_root_path, group_folder_name)
             create_category_identity_file = True
@@ -456,18 +576,42 @@ class Folder(Directory):
             create_category_identity_file = True
 
         final_dst = os.path.join(category_dst, self.name)
-        self._move_contents(final_dst)
+        identity_folders = []
         if self.for_sorter:
-            write_identity_file(final_dst)
+            identity_folders.append((final_dst, False))
         if create_category_identity_file:
-            write_identity_file(category_dst)
+            identity_folders.append((category_dst, False))
+        return final_dst, identity_folders
+
+    def relocate(self, final_dst, identity_folders=(), send_message=None, overwrite=False):
+        """Move the contents of this folder to final_dst, remove the folder
+        if it is left empty and map self.path to final_dst.
+
+        identity_folders - (folder, ignore_file) pairs of the folders in which
+            to write identity files once the contents have been moved
+        send_message - method through which the progress of copies across
+            devices is reported (see transfer.move)
+        overwrite - ignored, the contents of a folder are merged into
+            final_dst without replacing anything
+
+        Return True if the contents were moved, False if they could not all
+        be.
+        """
+        try:
+            self._move_contents(final_dst, send_message=send_message)
+        except OSError as error:
+            logger.warning('Not moved, %s: %s', self.path, error)
+            return False
+        for folder, ignore_file in identity_folders:
+            write_identity_file(folder, ignore_file=ignore_file)
         try:
             os.rmdir(self.path)
         except OSError:
             pass
         self.path = final_dst
+        return True
 
-    def _move_contents(self, dst, src=None):
+    def _move_contents(self, dst, src=None, send_message=None):
         if src is None:
             path_gen = self.glob('*')
         else:
@@ -480,22 +624,24 @@ class Folder(Directory):
         for i in contents:
             item = str(i)
             if os.path.isfile(item):
+                file_dst = os.path.join(dst, os.path.basename(item))
                 try:
-                    open(os.path.join(dst, os.path.basename(item)), 'r').close()
+                    open(file_dst, 'r').close()
                 except FileNotFoundError:
-                    shutil.move(item, dst)
+                    transfer.move(item, file_dst, send_message)
             if os.path.isdir(item):
                 dir_ = os.path.join(dst, os.path.basename(item))
                 try:
                     os.makedirs(dir_)
                 except FileExistsError:
-                    self._move_contents(dst, src=item)
+                    self._move_contents(dst, src=item, send_message=send_message)
                 else:
                     os.rmdir(dir_)
                     try:
-                        shutil.move(item, dst)
-                    except shutil.Error:
-                        pass
+                        transfer.move(item, dir_, send_message)
+                    except OSError as error:
+                        if error.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                            raise
 
     def group(self, dst_root_path, **kwargs):
         """Relocate files in relation to dst_root_path and delete this
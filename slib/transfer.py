@@ -0,0 +1,270 @@
+#! /usr/bin/env python3
+
+import os
+import time
+import errno
+import shutil
+import tempfile
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+VERIFY_CHUNK_SIZE = 1024 * 1024
+
+PROGRESS_INTERVAL = 0.5     # Seconds between two progress messages
+
+# Errors that mean a copy primitive is not supported for the given files
+_UNSUPPORTED_ERRNOS = {errno.ENOSYS, errno.EINVAL, errno.EXDEV,
+                       errno.EBADF, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+# Errors that mean hard links are not supported, e.g. on FAT
+_NO_LINK_ERRNOS = {errno.EPERM, errno.ENOSYS, errno.ENOTSUP, errno.EOPNOTSUPP,
+                   errno.EMLINK, errno.EACCES}
+
+
+class TransferError(OSError):
+    """Raise when a copied file does not match its source."""
+
+
+def _get_device(path):
+    """Return the st_dev of path or, if it does not exist yet, of its
+    nearest existing parent."""
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except FileNotFoundError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                raise
+            path = parent
+
+
+def same_device(src, dst):
+    """Return True if src and the location dst are on the same device."""
+    return _get_device(src) == _get_device(os.path.dirname(dst))
+
+
+def format_rate(count, seconds):
+    """Return a human readable transfer rate of count bytes in seconds."""
+    rate = count / seconds if seconds else 0.0
+    for unit in ('B/s', 'KB/s', 'MB/s'):
+        if rate < 1024:
+            return '{0:.1f} {1}'.format(rate, unit)
+        rate /= 1024
+    return '{0:.1f} GB/s'.format(rate)
+
+
+class _Progress(object):
+    """Reports the bytes copied for one file through send_message, at most
+    once every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, name, size, send_message=None):
+        self.name = name
+        self.size = size
+        self.send_message = send_message
+        self.copied = 0
+        self.start = self.last_report = time.perf_counter()
+
+    def update(self, count):
+        self.copied += count
+        if self.send_message is None:
+            return
+        now = time.perf_counter()
+        if now - self.last_report >= PROGRESS_INTERVAL:
+            self.last_report = now
+            percent = int(self.copied * 100 / self.size) if self.size else 100
+            msg = 'Copying {0}: {1}% ({2})'.format(
+                self.name, percent, format_rate(self.copied, now - self.start))
+            self.send_message(through=['status'], msg=msg, weight=1)
+
+    def finish(self):
+        if self.send_message is not None:
+            elapsed = time.perf_counter() - self.start
+            msg = 'Copied {0} ({1})'.format(
+                self.name, format_rate(self.copied, elapsed))
+            self.send_message(through=['status'], msg=msg, weight=1)
+
+
+def _copy_file_range(infd, outfd, offset, count):
+    return os.copy_file_range(infd, outfd, count, offset, offset)
+
+
+def _sendfile(infd, outfd, offset, count):
+    os.lseek(outfd, offset, os.SEEK_SET)
+    return os.sendfile(outfd, infd, offset, count)
+
+
+def _read_write(infd, outfd, offset, count):
+    os.lseek(infd, offset, os.SEEK_SET)
+    os.lseek(outfd, offset, os.SEEK_SET)
+    data = os.read(infd, count)
+    written = 0
+    while written < len(data):
+        written += os.write(outfd, data[written:])
+    return len(data)
+
+
+def _get_copiers():
+    """Return the available copy primitives, fastest first."""
+    copiers = []
+    if hasattr(os, 'copy_file_range'):
+        copiers.append(_copy_file_range)
+    if hasattr(os, 'sendfile') and os.name != 'nt':
+        copiers.append(_sendfile)
+    copiers.append(_read_write)
+    return copiers
+
+
+def verify_copy(src, dst):
+    """Return True if the files src and dst have the same contents.
+
+    The files are compared VERIFY_CHUNK_SIZE bytes at a time.
+    """
+    if os.path.getsize(src) != os.path.getsize(dst):
+        return False
+    with open(src, 'rb') as fsrc, open(dst, 'rb') as fdst:
+        while True:
+            src_chunk = fsrc.read(VERIFY_CHUNK_SIZE)
+            if src_chunk != fdst.read(VERIFY_CHUNK_SIZE):
+                return False
+            if not src_chunk:
+                return True
+
+
+def _place(src, dst, overwrite=False):
+    """Rename src to dst, on the same device.
+
+    If overwrite is False, FileExistsError is raised if dst exists. Files
+    are hard linked to dst then unlinked, so that a file that appeared at
+    dst in the meantime is never replaced; where hard links are not
+    supported, and for folders, dst is checked just before the rename. If
+    overwrite is True, an existing file at dst is replaced, but not a
+    folder (IsADirectoryError).
+    """
+    if overwrite:
+        if os.path.isdir(dst) and not os.path.islink(dst):
+            raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), dst)
+        os.replace(src, dst)
+        return
+    if os.path.isfile(src) and not os.path.islink(src):
+        try:
+            os.link(src, dst)
+        except OSError as error:
+            if error.errno not in _NO_LINK_ERRNOS:
+                raise
+        else:
+            os.unlink(src)
+            return
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+    os.rename(src, dst)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def copy_file(src, dst, send_message=None, verify=True, overwrite=True):
+    """Copy the file src to dst in CHUNK_SIZE chunks, reporting the bytes
+    copied per second through send_message.
+
+    os.copy_file_range or os.sendfile are used where available, with a
+    plain read/write loop as the fallback. The data is written to a hidden
+    temporary file next to dst, synced to the disk and, if verify is True,
+    compared to src (TransferError is raised if they differ). Only then is
+    it renamed to dst, so a failed copy never leaves a partial file at dst
+    nor replaces a file already there; the temporary file is removed on
+    any error. If overwrite is False, FileExistsError is raised instead of
+    replacing a file at dst (see _place).
+    """
+    copiers = _get_copiers()
+    fd, temp_path = tempfile.mkstemp(prefix='.{}.'.format(os.path.basename(dst)),
+                                     suffix='.part', dir=os.path.dirname(dst))
+    try:
+        with open(src, 'rb') as fsrc, os.fdopen(fd, 'wb') as fdst:
+            infd, outfd = fsrc.fileno(), fdst.fileno()
+            size = os.fstat(infd).st_size
+            progress = _Progress(os.path.basename(src), size, send_message)
+            offset = 0
+            while offset < size:
+                count = min(CHUNK_SIZE, size - offset)
+                try:
+                    copied = copiers[0](infd, outfd, offset, count)
+                except OSError as error:
+                    if error.errno not in _UNSUPPORTED_ERRNOS or len(copiers) == 1:
+                        raise
+                    copiers.pop(0)
+                    continue
+                if not copied:
+                    break
+                offset += copied
+                progress.update(copied)
+            os.ftruncate(outfd, offset)
+            os.fsync(outfd)
+        progress.finish()
+
+        if verify and not verify_copy(src, temp_path):
+            raise TransferError(errno.EIO, 'copy does not match source', src)
+        shutil.copystat(src, temp_path)
+        _place(temp_path, dst, overwrite)
+    except BaseException:
+        _remove(temp_path)
+        raise
+    return dst
+
+
+def _move_tree(src, dst, send_message=None):
+    for root, dirs, files in os.walk(src):
+        dst_root = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(dst_root, exist_ok=True)
+        for file_ in files:
+            src_file = os.path.join(root, file_)
+            dst_file = os.path.join(dst_root, file_)
+            if os.path.islink(src_file):
+                os.symlink(os.readlink(src_file), dst_file)
+            else:
+                copy_file(src_file, dst_file, send_message, overwrite=False)
+    for root, dirs, files in os.walk(src, topdown=False):
+        shutil.copystat(root, os.path.join(dst, os.path.relpath(root, src)))
+    shutil.rmtree(src)
+
+
+def move(src, dst, send_message=None, overwrite=False):
+    """Move the file or folder src to dst, the full path of its new location.
+
+    When src and the location of dst are on the same device, the file is
+    renamed. Otherwise, the files are copied by copy_file, which reports
+    progress through send_message, and src is removed once the copies have
+    been verified.
+
+    Nothing at dst is replaced unless overwrite is True, in which case an
+    existing file (not a folder) is, on every platform. FileExistsError or
+    IsADirectoryError is raised otherwise, leaving src where it is.
+
+    Return dst.
+    """
+    if same_device(src, dst):
+        try:
+            _place(src, dst, overwrite)
+        except OSError as error:
+            # Bind mounts share a device but cannot be renamed across
+            if error.errno != errno.EXDEV:
+                raise
+        else:
+            return dst
+
+    if os.path.isdir(src) and not os.path.islink(src):
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+        _move_tree(src, dst, send_message)
+    elif os.path.islink(src):
+        os.symlink(os.readlink(src), dst)
+        os.unlink(src)
+    else:
+        if overwrite and os.path.isdir(dst) and not os.path.islink(dst):
+            raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), dst)
+        copy_file(src, dst, send_message, overwrite=overwrite)
+        os.unlink(src)
+    return dst
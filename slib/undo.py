@@ -0,0 +1,147 @@
+#! /usr/bin/env python3
+
+import os
+import logging
+from collections import namedtuple
+from slib import transfer
+from slib.cleanup import remove_drained
+from slib.executor import MoveExecutor
+from slib.planner import MovePlan, PlannedMove
+from slib.progress import ProgressAggregator
+
+logger = logging.getLogger(__name__)
+
+UndoResult = namedtuple('UndoResult', ['undone', 'failed', 'removed'])
+UndoResult.__doc__ = """The outcome of RunReverser.undo_run.
+
+undone - the ids of the data_path rows whose moves were undone
+failed - the ids of the data_path rows whose moves could not be undone,
+    because the file is gone or its original location is taken
+removed - the folders removed because the reversal left them empty
+"""
+
+
+class UndoExecutor(MoveExecutor):
+    """A MoveExecutor that moves files back to where they came from.
+
+    Nothing is overwritten, and no identity files are written.
+    """
+
+    def _apply(self, move):
+        with self._get_lock(os.path.dirname(move.destination)):
+            if os.path.lexists(move.destination):
+                logger.warning('Not undone, %s exists', move.destination)
+                return False
+            try:
+                os.makedirs(os.path.dirname(move.destination), exist_ok=True)
+                transfer.move(move.source, move.destination, self.send_message)
+            except OSError as error:
+                logger.warning('Not undone, %s: %s', move.source, error)
+                return False
+            return True
+
+
+class RunReverser(object):
+    """Undoes all the moves of a run at once.
+
+    The reverse moves are planned from the run's report, carried out by an
+    UndoExecutor and recorded in a single transaction. Only the folders the
+    moved files were taken out of, and their parents, are then checked for
+    removal.
+
+    data attributes:
+        db_helper - the helpers.DatabaseHelper the run is recorded in
+        workers - the number of threads used to move files
+        send_message - method for returning information to the user, as
+            in operations.SorterOps.start
+        control - the executor.RunControl checked before each move, if any
+
+    methods:
+        plan_undo
+        undo_run
+    """
+
+    def __init__(self, db_helper, workers=1, send_message=None, control=None):
+        self.db_helper = db_helper
+        self.workers = workers
+        self.send_message = send_message
+        self.control = control
+
+    def plan_undo(self, run_id, selected=None):
+        """Return a planner.MovePlan of the reverse moves of the run run_id,
+        the list of the data_path ids of its moves, in the same order, and
+        the list of the ids of the moves whose file is gone.
+
+        Moves already undone are left out, and so are those whose id is not
+        in selected, if given. Those whose file is gone are listed in
+        MovePlan.skipped.
+        """
+        plan = MovePlan()
+        path_ids = []
+        missing = []
+        for record in self.db_helper.iter_report_records(run_id):
+            if not record.accepted:
+                continue
+            if selected is not None and record.id not in selected:
+                continue
+            try:
+                stat = os.lstat(record.destination)
+            except OSError:
+                stat = None
+            move = PlannedMove(
+                source=record.destination,
+                destination=record.source,
+                kind='folder' if os.path.isdir(record.destination) else 'file',
+                size=stat.st_size if stat is not None else 0,
+                conflict='none' if stat is not None else 'skip',
+                last_modified=stat.st_mtime if stat is not None else 0.0,
+                identity_folders=())
+            plan.add(move)
+            if stat is not None:
+                path_ids.append(record.id)
+            else:
+                missing.append(record.id)
+        return plan, path_ids, missing
+
+    def undo_run(self, run_id, root=None, selected=None):
+        """Move the files of the run run_id back to where they came from,
+        only those of the data_path ids in selected if given.
+
+        The undone moves are marked as not accepted in one transaction.
+        Folders below root (the destination of the run by default) that
+        are left with nothing but Sorter's files are removed.
+
+        Return an UndoResult.
+        """
+        if root is None:
+            run = self.db_helper.get_run(run_id)
+            root = run.destination if run is not None else None
+
+        send_message = self.send_message or (lambda **kwargs: None)
+        progress = ProgressAggregator(send_message)
+        plan, path_ids, failed = self.plan_undo(run_id, selected)
+        progress(through=['status'], msg='Reversing {} operations.'.format(len(plan)),
+                 weight=1)
+        progress.add_total(len(plan), plan.size)
+
+        undone, folders = [], set()
+        executor = UndoExecutor(self.workers, progress, self.control)
+        try:
+            for path_id, (move, moved) in zip(path_ids, executor.run(plan)):
+                if moved:
+                    undone.append(path_id)
+                    folders.add(os.path.dirname(move.source))
+                    progress(through=['status'], msg='Reversed {}'.format(
+                        os.path.basename(move.source)), weight=1)
+                else:
+                    failed.append(path_id)
+                progress.advance(move.size)
+        finally:
+            executor.close()
+            self.db_helper.mark_undone(undone)
+
+        removed = remove_drained(folders, root) if root else []
+        progress(through=['status'], msg='Reversed {} of {} operations.'.format(
+            len(undone), len(undone) + len(failed)), weight=1)
+        progress.flush()
+        return UndoResult(undone, failed, removed)
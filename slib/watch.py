@@ -0,0 +1,350 @@
+#! /usr/bin/env python3
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+from stat import S_ISREG
+
+logger = logging.getLogger(__name__)
+
+SETTLE_TIME = 2.0       # Seconds a file's size must stay the same to be complete
+
+BATCH_SIZE = 500        # Files sorted at a time, at most
+
+BATCH_DELAY = 1.0       # Seconds a complete file waits for others to join its batch
+
+POLL_INTERVAL = 1.0     # Seconds between two listings, without inotify
+
+# inotify(7) constants
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+# Only arrivals and completed writes are watched, not every write
+WATCH_MASK = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO | IN_ATTRIB | \
+    IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+_EVENT = struct.Struct('iIII')
+
+_READ_SIZE = 64 * 1024
+
+
+class WatchError(OSError):
+    """Raise when the watched folder goes away."""
+
+
+def _get_libc():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class _Wakeup(object):
+    """A pipe that interrupts a wait from another thread."""
+
+    def __init__(self):
+        self.read_fd, self.write_fd = os.pipe()
+        os.set_blocking(self.read_fd, False)
+        os.set_blocking(self.write_fd, False)
+
+    def set(self):
+        try:
+            os.write(self.write_fd, b'x')
+        except OSError:
+            pass
+
+    def clear(self):
+        try:
+            while os.read(self.read_fd, _READ_SIZE):
+                pass
+        except OSError:
+            pass
+
+    def close(self):
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+
+class InotifySource(object):
+    """Reports the names that arrive in a folder, from inotify(7) events.
+
+    Waiting costs nothing until something happens in the folder.
+
+    methods:
+        wait
+        close
+    """
+
+    def __init__(self, path, libc=None):
+        self.path = path
+        self._libc = libc or _get_libc()
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, os.strerror(error), path)
+
+    def _read(self):
+        names = set()
+        rescan = False
+        while True:
+            try:
+                data = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    raise WatchError(errno.ENOENT, 'watched folder is gone', self.path)
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                elif name:
+                    names.add(os.fsdecode(name))
+        return names, rescan
+
+    def wait(self, timeout, wakeup):
+        """Wait up to timeout seconds (None for no limit) for names to
+        arrive, or for wakeup to be set.
+
+        Return the set of names seen and whether events were lost, in which
+        case the folder has to be listed again.
+        """
+        readable, _, _ = select.select([self.fd, wakeup.read_fd], [], [], timeout)
+        if self.fd in readable:
+            return self._read()
+        return set(), False
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource(object):
+    """Reports the names that arrive in a folder by comparing listings
+    taken every interval seconds.
+
+    Used where inotify is not available. Each listing costs one scandir of
+    the folder.
+
+    methods:
+        wait
+        close
+    """
+
+    def __init__(self, path, interval=POLL_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._snapshot = self._list()
+
+    def _list(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            raise WatchError(errno.ENOENT, 'watched folder is gone', self.path)
+        return snapshot
+
+    def wait(self, timeout, wakeup):
+        """As InotifySource.wait. The folder is listed at most every
+        interval seconds."""
+        if timeout is None or timeout > self.interval:
+            timeout = self.interval
+        readable, _, _ = select.select([wakeup.read_fd], [], [], timeout)
+        if readable:
+            return set(), False
+        snapshot = self._list()
+        names = {name for name, value in snapshot.items()
+                 if self._snapshot.get(name) != value}
+        self._snapshot = snapshot
+        return names, False
+
+    def close(self):
+        pass
+
+
+def get_source(path, polling=False):
+    """Return an InotifySource for path where inotify is available and
+    polling is False, else a PollingSource."""
+    if not polling:
+        try:
+            return InotifySource(path)
+        except OSError as error:
+            if isinstance(error, WatchError) or error.errno == errno.ENOENT:
+                raise
+            logger.info('inotify not available (%s), polling %s', error, path)
+    return PollingSource(path)
+
+
+class FolderWatcher(object):
+    """Watches a folder for new files and hands them over in batches once
+    they are complete.
+
+    A file is complete once its size and modification time have not
+    changed for settle seconds. Only the files that arrived are looked at,
+    so the work done grows with the number of arrivals, not with the
+    number of files in the folder (except with the polling fallback, which
+    lists the folder every POLL_INTERVAL seconds). Subfolders are not
+    watched.
+
+    data attributes:
+        path - the folder watched
+        scanner - the scanner.Scanner deciding which names to include
+        settle - seconds a file must stay unchanged to be complete
+        batch_size - the most files handed over at a time
+        batch_delay - seconds a complete file waits for others to join
+            its batch
+        control - the executor.RunControl checked before each batch, if any
+
+    methods:
+        run
+        stop
+        close
+    """
+
+    def __init__(self, path, scanner, settle=SETTLE_TIME, batch_size=BATCH_SIZE,
+                 batch_delay=BATCH_DELAY, control=None, polling=False, clock=time.monotonic):
+        self.path = path
+        self.scanner = scanner
+        self.settle = settle
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.control = control
+        self.polling = polling
+        self._clock = clock
+        self._wakeup = _Wakeup()
+        self._stopped = False
+        # name -> (size, mtime_ns, time of the last change seen)
+        self._pending = {}
+        self._ready = []
+        self._ready_since = None
+
+    def stop(self):
+        """Make run return. Safe to call from any thread."""
+        self._stopped = True
+        wakeup = self._wakeup
+        if wakeup is not None:
+            wakeup.set()
+
+    def close(self):
+        """Release the pipe used by stop, once run has returned."""
+        wakeup, self._wakeup = self._wakeup, None
+        if wakeup is not None:
+            wakeup.close()
+
+    def _track(self, names, now):
+        for name in names:
+            if not self.scanner.match(name):
+                continue
+            try:
+                stat = os.lstat(os.path.join(self.path, name))
+            except OSError:
+                self._pending.pop(name, None)
+                continue
+            if not S_ISREG(stat.st_mode):
+                continue
+            state = (stat.st_size, stat.st_mtime_ns)
+            previous = self._pending.get(name)
+            if previous is None or previous[:2] != state:
+                self._pending[name] = state + (now,)
+
+    def _list_names(self):
+        try:
+            with os.scandir(self.path) as entries:
+                return [entry.name for entry in entries]
+        except FileNotFoundError:
+            raise WatchError(errno.ENOENT, 'watched folder is gone', self.path)
+
+    def _check_settled(self, now):
+        for name, (size, mtime_ns, changed_at) in list(self._pending.items()):
+            if now - changed_at < self.settle:
+                continue
+            try:
+                stat = os.lstat(os.path.join(self.path, name))
+            except OSError:
+                del self._pending[name]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self._pending[name] = (stat.st_size, stat.st_mtime_ns, now)
+                continue
+            del self._pending[name]
+            self._ready.append(os.path.join(self.path, name))
+            if self._ready_since is None:
+                self._ready_since = now
+
+    def _get_timeout(self, now):
+        """Return the seconds until something is due, None if nothing is."""
+        due = [changed_at + self.settle for _, _, changed_at in self._pending.values()]
+        if self._ready_since is not None:
+            due.append(self._ready_since + self.batch_delay)
+        if not due:
+            return None
+        return max(0.0, min(due) - now)
+
+    def _batch_due(self, now):
+        if not self._ready:
+            return False
+        return len(self._ready) >= self.batch_size or not self._pending or \
+            now - self._ready_since >= self.batch_delay
+
+    def run(self, on_batch):
+        """Call on_batch with lists of the paths of complete files, until
+        stop is called or control is cancelled.
+
+        The files already in the folder are handed over first. WatchError
+        is raised if the folder goes away.
+        """
+        source = get_source(self.path, self.polling)
+        try:
+            self._track(self._list_names(), self._clock())
+            while not self._stopped:
+                if self.control is not None and self.control.cancelled:
+                    break
+                now = self._clock()
+                self._check_settled(now)
+                if self._batch_due(now):
+                    if self.control is not None and not self.control.wait():
+                        break
+                    batch = self._ready[:self.batch_size]
+                    del self._ready[:self.batch_size]
+                    self._ready_since = now if self._ready else None
+                    on_batch(batch)
+                    continue
+                names, rescan = source.wait(self._get_timeout(now), self._wakeup)
+                if rescan:
+                    names = self._list_names()
+                self._track(names, self._clock())
+        finally:
+            source.close()
+            self._wakeup.clear()
@@ -1,50 +1,72 @@
 #! /usr/bin/env python3.4
 
 import logging
-from gui.tkgui import TkGui
+
+# Only the splash screen is imported before it is shown, the rest is
+# loaded in the background by Loader.load
 from gui.loader import Loader
-from slib.operations import SorterOps
-from slib.helpers import DatabaseHelper
-from data.settings import DATABASES, LOG_FILE, DEBUG, SETTINGS
 from data.version import SORTER_VERSION
 
 __version__ = SORTER_VERSION
 
-DB_NAME = DATABASES['default']['NAME']
+
+class Startup(object):
+    """The steps run in the background while the splash screen is shown.
+
+    Each step stores what it loads on this instance, for the next steps
+    and for the GUI.
+    """
+
+    def __init__(self):
+        self.settings = None
+        self.db_helper = None
+        self.operations = None
+        self.gui_class = None
+
+    def get_tasks(self):
+        return [
+            ('Loading settings...', self.load_settings),
+            ('Starting logger...', self.start_logger),
+            ('Loading database helper...', self.load_database_helper),
+            ('Connecting to database and checking tables...', self.initialise_database),
+            ('Loading operations...', self.load_operations),
+            ('Loading interface...', self.load_gui),
+        ]
+
+    def load_settings(self):
+        from data import settings
+        self.settings = settings
+
+    def start_logger(self):
+        settings = self.settings
+        logging.basicConfig(filename=settings.LOG_FILE,
+                            format='%(asctime)s %(levelname)s %(message)s',
+                            level=logging.DEBUG if settings.DEBUG else logging.INFO)
+        logging.info('Logger ready at %s', settings.LOG_FILE)
+
+    def load_database_helper(self):
+        from slib.helpers import DatabaseHelper
+        self.db_helper = DatabaseHelper(self.settings.DB_NAME)
+
+    def initialise_database(self):
+        self.db_helper.initialise_db()
+
+    def load_operations(self):
+        from slib.operations import SorterOps
+        self.operations = SorterOps(self.db_helper)
+
+    def load_gui(self):
+        from gui.tkgui import TkGui
+        self.gui_class = TkGui
+
 
 if __name__ == '__main__':
-    # Initialise logger
-    logging.basicConfig(filename=LOG_FILE,
-                        format='%(asctime)s %(levelname)s %(message)s',
-                        level=logging.DEBUG if DEBUG else logging.INFO)
-    logging.info('Logger ready at %s', LOG_FILE)
-
-    sorter_loader = Loader()
-
-    # Load database helper
-    sorter_loader.report_progress(
-        30, 'Loading database helper with database file at "{}"'.format(DB_NAME))
-    db_helper = DatabaseHelper(DB_NAME)
-    sorter_loader.report_progress(40, 'Database helper loaded.')
-
-    # Create database tables
-    sorter_loader.report_progress(
-        50, 'Connecting to database and checking tables...')
-    db_helper.initialise_db()
-    sorter_loader.report_progress(60, 'Database initalised.')
-
-    # Initialise operations
-    sorter_loader.report_progress(70, 'Loading operations...')
-    operations = SorterOps(db_helper)
-    sorter_loader.report_progress(
-        90, 'Operations initialised. Database helper configured.')
-
-    # Close loader
-    sorter_loader.report_progress(100, 'Initialising UI.')
-    sorter_loader.tk_run()
+    startup = Startup()
+    Loader().load(startup.get_tasks())
 
     # Initialise GUI
-    app = TkGui(operations=operations, settings=SETTINGS)
+    app = startup.gui_class(operations=startup.operations,
+                            settings=startup.settings.SETTINGS)
 
     # Show window
     app.tk_run()
@@ -0,0 +1,76 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+from testfixtures import TempDirectory, compare
+from slib.cleanup import is_drained, remove_drained, remove_empty_tree
+from data.settings import SORTER_FOLDER_IDENTITY_FILENAME, SORTER_IGNORE_FILENAME
+
+
+class TestCleanupTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_returns_false_if_drained_wrong(self):
+        self.temp.write(os.path.join('sorter', SORTER_FOLDER_IDENTITY_FILENAME), '')
+        self.temp.write(os.path.join('sorter', SORTER_IGNORE_FILENAME), '')
+        self.temp.write('user/abc.txt', '')
+        self.temp.makedir('parent/child')
+        data = [
+            ('sorter', True),
+            ('user', False),
+            ('parent', False),
+            ('parent/child', True),
+            ('missing', False),
+        ]
+        for folder, expected in data:
+            with self.subTest(folder):
+                compare(expected, is_drained(os.path.join(self.tempdir, folder)))
+
+    def test_returns_false_if_other_folders_removed(self):
+        self.temp.write(os.path.join('dst', 'image', SORTER_IGNORE_FILENAME), '')
+        self.temp.write(os.path.join('dst', 'image', 'JPG', SORTER_FOLDER_IDENTITY_FILENAME), '')
+        self.temp.write(os.path.join('dst', 'document', 'TXT', 'abc.txt'), '')
+        self.temp.makedir('dst/empty')
+        root = os.path.join(self.tempdir, 'dst')
+        removed = remove_drained([os.path.join(root, 'image', 'JPG'),
+                                  os.path.join(root, 'document', 'TXT')], root)
+        with self.subTest(1):
+            compare([os.path.join(root, 'image', 'JPG'), os.path.join(root, 'image')], removed)
+        with self.subTest(2):
+            self.temp.compare(['document/', 'document/TXT/', 'document/TXT/abc.txt', 'empty/'],
+                              path=root)
+
+    def test_returns_false_if_root_removed(self):
+        root = self.temp.makedir('dst')
+        compare([], remove_drained([root, self.tempdir], root))
+
+    def test_returns_false_if_empty_tree_root_removed(self):
+        self.temp.write(os.path.join('src', 'a', SORTER_IGNORE_FILENAME), '')
+        self.temp.write(os.path.join('src', SORTER_FOLDER_IDENTITY_FILENAME), '')
+        root = os.path.join(self.tempdir, 'src')
+        with self.subTest(1):
+            compare({os.path.join(root, 'a')}, remove_empty_tree(root))
+        with self.subTest(2):
+            self.temp.compare([SORTER_FOLDER_IDENTITY_FILENAME], path=root)
+
+    def test_returns_false_if_empty_tree_left(self):
+        self.temp.write(os.path.join('src', 'a', 'b', SORTER_FOLDER_IDENTITY_FILENAME), '')
+        self.temp.write(os.path.join('src', 'a', SORTER_IGNORE_FILENAME), '')
+        self.temp.makedir('src/c/d/e')
+        self.temp.write('src/f/abc.txt', '')
+        self.temp.makedir('src/f/g')
+        root = os.path.join(self.tempdir, 'src')
+        for workers in (1, 3):
+            with self.subTest(workers):
+                removed = remove_empty_tree(root, workers)
+                compare(6, len(removed))
+                self.temp.compare(['f/', 'f/abc.txt'], path=root)
+            self.temp.write(os.path.join('src', 'a', 'b', SORTER_FOLDER_IDENTITY_FILENAME), '')
+            self.temp.makedir('src/c/d/e')
+            self.temp.makedir('src/f/g')
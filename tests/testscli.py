@@ -0,0 +1,101 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+import io
+import sys
+import json
+import subprocess
+from unittest import mock
+from testfixtures import TempDirectory, compare
+from slib import cli
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = """
+import sys
+from slib import cli
+from slib import operations, helpers
+print('tkinter' in sys.modules)
+"""
+
+
+class TestCliTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+        self.db = os.path.join(self.tempdir, 'operations.db')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def run_cli(self, *argv):
+        stream = io.StringIO()
+        status = cli.main(list(argv) + ['--db', self.db], stream=stream)
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        return status, events
+
+    def test_returns_false_if_sort_output_wrong(self):
+        self.temp.write('src/a.txt', '')
+        self.temp.write('src/b.jpg', '')
+        src = os.path.join(self.tempdir, 'src')
+        status, events = self.run_cli(src, '-g', '-w', '2')
+        with self.subTest(1):
+            compare(cli.EXIT_OK, status)
+        with self.subTest(2):
+            compare(['a.txt', 'b.jpg'], sorted(event['filename'] for event in events
+                                               if event['event'] == 'move'))
+        with self.subTest(3):
+            compare(('done', 2, False), (events[-1]['event'], events[-1]['moved'],
+                                         events[-1]['cancelled']))
+        with self.subTest(4):
+            self.temp.compare(['document/', 'document/.signore', 'document/.sorter',
+                               'document/a.txt', 'image/', 'image/.signore',
+                               'image/.sorter', 'image/b.jpg'], path=src)
+
+        status, events = self.run_cli('--undo', str(events[-1]['run_id']), '-q')
+        with self.subTest(5):
+            compare(cli.EXIT_OK, status)
+        with self.subTest(6):
+            compare((2, 0), (events[-1]['undone'], events[-1]['failed']))
+        with self.subTest(7):
+            self.temp.compare(['a.txt', 'b.jpg'], path=src)
+
+    def test_returns_false_if_exit_status_wrong(self):
+        data = [
+            ((os.path.join(self.tempdir, 'missing'),), cli.EXIT_USAGE),
+            (('--undo', '10'), cli.EXIT_USAGE),
+        ]
+        for argv, expected in data:
+            with self.subTest(argv):
+                status, events = self.run_cli(*argv)
+                compare((expected, 'done'), (status, events[-1]['event']))
+
+    def test_returns_false_if_quiet_not_quiet(self):
+        self.temp.write('src/a.txt', '')
+        status, events = self.run_cli(os.path.join(self.tempdir, 'src'), '-q')
+        with self.subTest(1):
+            compare(['done'], [event['event'] for event in events])
+        status, events = self.run_cli('--undo', str(events[-1]['run_id']), '-q')
+        with self.subTest(2):
+            compare(['done'], [event['event'] for event in events])
+
+    def test_returns_false_if_gui_imported(self):
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_SCRIPT], cwd=PROJECT_ROOT,
+            universal_newlines=True)
+        compare('False', output.strip())
+
+    def test_returns_false_if_watch_options_accepted(self):
+        data = [
+            (self.tempdir, '--poll'),
+            (self.tempdir, '--settle', '1'),
+            (self.tempdir, '--watch', '-r'),
+        ]
+        for argv in data:
+            with self.subTest(argv):
+                with mock.patch('sys.stderr', io.StringIO()):
+                    with self.assertRaises(SystemExit) as context:
+                        self.run_cli(*argv)
+                compare(cli.EXIT_USAGE, context.exception.code)
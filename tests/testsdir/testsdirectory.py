@@ -5,7 +5,7 @@ import os
 import ctypes
 import shutil
 from testfixtures import TempDirectory, compare
-from slib.sdir import Directory, RelativePathError
+from slib.sdir import Directory, HiddenPathCache, RelativePathError
 
 
 class TestDirectoryTestCase(unittest.TestCase):
@@ -129,6 +129,20 @@ class TestDirectoryTestCase(unittest.TestCase):
         with self.subTest(5):
             compare(False, dir_5.hidden_path)
 
+    @unittest.skipIf(os.name == 'nt', 'Hidden path tests for UNIX systems')
+    def test_returns_false_if_hidden_cache_not_match_unix(self):
+        cache = HiddenPathCache()
+        data = [
+            ('abc/.kin', True),
+            ('abc/kin', False),
+            ('abc/__pycache__', True),
+            ('abc/.kin/one', False),
+        ]
+        for path, expected in data:
+            with self.subTest(path):
+                full_path = os.path.join(self.tempdir.path, path)
+                compare(expected, cache.is_hidden(full_path))
+
     @unittest.skipIf(os.name == 'nt', 'Hidden path tests for UNIX systems')
     def test_returns_false_if_attributes_are_not_reevaluated(self):
         d = Directory(self.tempdir.path)
@@ -75,6 +75,21 @@ class TestFileTestCase(unittest.TestCase):
         with self.subTest(2):
             compare('my awesome cat', d.stem)
 
+    def test_returns_false_if_attributes_not_reevaluated(self):
+        d = File(os.path.join(self.tempdir.path, 'abc', 'photo.jpg'))
+        with self.subTest(1):
+            compare('image', d.category)
+        d.path = os.path.join(self.tempdir.path, '.def', 'song.mp3')
+        with self.subTest(2):
+            compare(['song.mp3', 'mp3', 'audio'], [d.name, d.extension, d.category])
+        with self.subTest(3):
+            compare(os.path.join(self.tempdir.path, '.def'), d.parent)
+        if os.name != 'nt':
+            with self.subTest(4):
+                compare(True, d.hidden_path)
+        with self.subTest(5):
+            self.assertFalse(hasattr(d, '__dict__'))
+
     def test_returns_false_if_file_moving_fails(self):
         dir_1 = self.tempdir.makedir('abc/fig/')
         dir_2 = self.tempdir.makedir('one/twp/')
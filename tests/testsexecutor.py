@@ -0,0 +1,108 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+import threading
+from testfixtures import TempDirectory, LogCapture, compare
+from slib.executor import MoveExecutor, RunControl
+from slib.planner import MovePlanner
+from data.settings import SORTER_FOLDER_IDENTITY_FILENAME
+
+
+class TestMoveExecutorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def plan_same_named_files(self, count, dst):
+        for i in range(count):
+            self.temp.write(os.path.join('src', str(i), 'IMG_0001.jpg'), '')
+        planner = MovePlanner(group=True)
+        return planner.plan_files(os.path.join(self.tempdir, 'src'), dst, recursive=True)
+
+    def test_returns_false_if_duplicate_names_clash(self):
+        dst = self.temp.makedir('dst')
+        plan = self.plan_same_named_files(40, dst)
+        executor = MoveExecutor(workers=8)
+        results = list(executor.run(plan))
+        executor.close()
+        expected = ['IMG_0001.jpg'] + ['IMG_0001 - dup ({}).jpg'.format(i)
+                                       for i in range(1, 40)]
+        with self.subTest(1):
+            compare(sorted(expected + [SORTER_FOLDER_IDENTITY_FILENAME, '.signore']),
+                    sorted(os.listdir(os.path.join(dst, 'image'))))
+        with self.subTest(2):
+            compare(plan.moves, [move for move, _ in results])
+        with self.subTest(3):
+            compare([True] * 40, [moved for _, moved in results])
+
+    def test_returns_false_if_throughput_not_recorded(self):
+        dst = self.temp.makedir('dst')
+        plan = self.plan_same_named_files(5, dst)
+        executor = MoveExecutor()
+        list(executor.run(plan))
+        with self.subTest(1):
+            compare(1, executor.workers)
+        with self.subTest(2):
+            compare(5, executor.count)
+        with self.subTest(3):
+            compare(True, executor.throughput > 0)
+
+    def test_returns_false_if_cancel_not_honoured(self):
+        dst = self.temp.makedir('dst')
+        plan = self.plan_same_named_files(5, dst)
+        control = RunControl()
+        executor = MoveExecutor(control=control)
+        results = []
+        for result in executor.run(plan):
+            results.append(result)
+            control.cancel()
+        with self.subTest(1):
+            compare(1, len(results))
+        with self.subTest(2):
+            compare(True, os.path.isfile(plan.moves[1].source))
+
+    def test_returns_false_if_pause_not_honoured(self):
+        dst = self.temp.makedir('dst')
+        plan = self.plan_same_named_files(3, dst)
+        control = RunControl()
+        control.pause()
+        executor = MoveExecutor(control=control)
+        thread = threading.Thread(target=lambda: list(executor.run(plan)))
+        thread.start()
+        thread.join(0.2)
+        with self.subTest(1):
+            compare((True, 0), (thread.is_alive(), executor.count))
+        control.resume()
+        thread.join()
+        with self.subTest(2):
+            compare(3, executor.count)
+
+    def test_returns_false_if_vanished_file_aborts_run(self):
+        dst = self.temp.makedir('dst')
+        plan = self.plan_same_named_files(4, dst)
+        os.remove(plan.moves[1].source)
+        executor = MoveExecutor(workers=2)
+        with LogCapture('slib.sdir') as log:
+            results = list(executor.run(plan))
+        executor.close()
+        with self.subTest(1):
+            compare([True, False, True, True], [moved for _, moved in results])
+        with self.subTest(2):
+            compare(True, plan.moves[1].source in str(log))
+
+    def test_returns_false_if_late_destination_replaced(self):
+        dst = self.temp.makedir('dst')
+        plan = self.plan_same_named_files(1, dst)
+        self.temp.write(plan.moves[0].destination, 'late')
+        executor = MoveExecutor()
+        with LogCapture('slib.sdir'):
+            results = list(executor.run(plan))
+        with self.subTest(1):
+            compare([False], [moved for _, moved in results])
+        with self.subTest(2):
+            compare('late', self.temp.read(plan.moves[0].destination))
@@ -0,0 +1,61 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+from testfixtures import TempDirectory, compare
+from data.filegroups import typeGroups, extensionIndex, build_extension_index, get_extension
+from slib.sdir import File
+
+
+class TestFileGroupsTestCase(unittest.TestCase):
+
+    def test_returns_false_if_index_incomplete(self):
+        for category, extensions in typeGroups.items():
+            for extension in extensions:
+                with self.subTest(extension):
+                    self.assertIn(extension, extensionIndex)
+
+    def test_returns_false_if_index_writable(self):
+        with self.assertRaises(TypeError):
+            extensionIndex['XYZ'] = 'image'
+
+    def test_returns_false_if_first_category_not_kept(self):
+        index = build_extension_index({'one': ['ZIP'], 'two': ['zip']})
+        compare('one', index['ZIP'])
+
+    def test_returns_false_if_overrides_ignored(self):
+        index = build_extension_index({'image': ['JPG']}, {'jpg': 'photos', '.heic': 'photos'})
+        compare({'JPG': 'photos', 'HEIC': 'photos'}, dict(index))
+
+    def test_returns_false_if_extension_wrong(self):
+        data = [
+            ('file.tar.gz', 'TAR.GZ'),
+            ('my.backup.tar.gz', 'TAR.GZ'),
+            ('file.GZ', 'GZ'),
+            ('file.unknownext', ''),
+            ('.bashrc', ''),
+            ('file', ''),
+        ]
+        for name, expected in data:
+            with self.subTest(name):
+                compare(expected, get_extension(name))
+
+
+class TestFileCategoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory()
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_returns_false_if_category_wrong(self):
+        data = [
+            ('backup.tar.gz', 'archive'),
+            ('photo.JPG', 'image'),
+            ('notes', 'UNDEFINED'),
+            ('notes.unknownext', 'UNDEFINED'),
+        ]
+        for name, category in data:
+            with self.subTest(name):
+                compare(category, File(os.path.join(self.temp.path, name)).category)
@@ -0,0 +1,84 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+from testfixtures import TempDirectory, compare
+from slib.folderindex import FolderIndex, FolderState
+from slib.planner import MovePlanner
+
+
+class TestFolderIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def plan(self, src, index):
+        return MovePlanner(group=True).plan_files(src, src, recursive=True, index=index)
+
+    def reload(self, index):
+        """Return a new FolderIndex with the states index ended with, as if
+        saved and loaded again."""
+        changed, removed = index.get_changes()
+        states = dict(index.states)
+        states.update(changed)
+        for path in removed:
+            del states[path]
+        return FolderIndex(states, racy_window=0)
+
+    def test_returns_false_if_unchanged_folder_listed(self):
+        src = self.temp.makedir('src')
+        self.temp.makedir('src/a/b')
+        self.temp.makedir('src/c')
+        self.temp.write('src/a/b/one.txt', '')
+        index = FolderIndex(racy_window=0)
+        with self.subTest(1):
+            compare(['one.txt'], [os.path.basename(move.source)
+                                  for move in self.plan(src, index)])
+        with self.subTest(2):
+            compare(4, len(index.visited))
+
+        index = self.reload(index)
+        with self.subTest(3):
+            compare([], list(self.plan(src, index)))
+        with self.subTest(4):
+            compare(4, index.unchanged)
+
+        self.temp.write('src/a/b/two.txt', '')
+        index = self.reload(index)
+        with self.subTest(5):
+            compare(['one.txt', 'two.txt'], sorted(os.path.basename(move.source)
+                                                   for move in self.plan(src, index)))
+        with self.subTest(6):
+            compare(3, index.unchanged)
+
+    def test_returns_false_if_racy_folder_trusted(self):
+        src = self.temp.makedir('src')
+        index = FolderIndex(racy_window=0)
+        self.plan(src, index)
+        stat = os.stat(src)
+        data = [
+            # (checked_ns, unchanged)
+            (stat.st_mtime_ns + 10 ** 9, True),
+            (stat.st_mtime_ns + 1, False),
+            (0, False),
+        ]
+        for checked_ns, expected in data:
+            state = FolderState(stat.st_mtime_ns, stat.st_ino, checked_ns)
+            index = FolderIndex({src: state}, racy_window=10 ** 6)
+            with self.subTest(checked_ns):
+                compare(expected, index.is_unchanged(src, stat))
+
+    def test_returns_false_if_removed_folder_kept(self):
+        src = self.temp.makedir('src')
+        self.temp.makedir('src/a')
+        index = FolderIndex(racy_window=0)
+        self.plan(src, index)
+        os.rmdir(os.path.join(src, 'a'))
+        index = self.reload(index)
+        index.states[src] = index.states[src]._replace(checked_ns=0)
+        self.plan(src, index)
+        compare([os.path.join(src, 'a')], index.get_changes()[1])
@@ -0,0 +1,246 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+import sqlite3
+from datetime import datetime
+from testfixtures import TempDirectory, LogCapture, compare
+from slib.folderindex import FolderIndex, FolderState
+from slib.helpers import (DatabaseHelper, ProgressLog, SCHEMA_VERSION,
+                          SchemaVersionError)
+
+
+class TestDatabaseHelperTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.db_helper = DatabaseHelper(':memory:')
+        self.db_helper.initialise_db()
+
+    def add_moves(self, count, start=0):
+        run_id = self.db_helper.start_run('/src', '/dst')
+        with self.db_helper.get_writer(run_id) as writer:
+            for i in range(start, start + count):
+                writer.add('{}.txt'.format(i), str(i), datetime(2018, 1, 1),
+                           '/src/{}.txt'.format(i), '/dst/TXT/{}.txt'.format(i))
+        self.db_helper.finish_run(run_id)
+        return run_id
+
+    def test_returns_false_if_schema_version_not_set(self):
+        compare(SCHEMA_VERSION, self.db_helper.get_schema_version())
+
+    def test_returns_false_if_report_wrong(self):
+        self.add_moves(1)
+        run_id = self.add_moves(2, start=1)
+        report = self.db_helper.get_report(run_id)
+        with self.subTest(1):
+            compare([('2.txt', '/src/2.txt', '/dst/TXT/2.txt'),
+                     ('1.txt', '/src/1.txt', '/dst/TXT/1.txt')],
+                    [row[:3] for row in report])
+        with self.subTest(2):
+            compare(datetime, type(report[0][3]))
+
+    def test_returns_false_if_report_not_streamed(self):
+        run_id = self.add_moves(5)
+        rows = self.db_helper.iter_report(run_id, chunk_size=2)
+        with self.subTest(1):
+            compare(('4.txt', '/src/4.txt', '/dst/TXT/4.txt'), next(rows)[:3])
+        with self.subTest(2):
+            compare(['3.txt', '2.txt', '1.txt', '0.txt'], [row[0] for row in rows])
+
+    def test_returns_false_if_report_pages_wrong(self):
+        self.add_moves(1)
+        run_id = self.add_moves(5, start=1)
+        self.db_helper.alter_path({'accepted': False}, {'source': '/src/5.txt'})
+        first = self.db_helper.get_report_page(run_id, 2)
+        second = self.db_helper.get_report_page(run_id, 2, before_id=first[-1].id)
+        with self.subTest(1):
+            compare([('5.txt', False), ('4.txt', True)],
+                    [(record.filename, record.accepted) for record in first])
+        with self.subTest(2):
+            compare(['3.txt', '2.txt'], [record.filename for record in second])
+        with self.subTest(3):
+            compare(['5.txt', '4.txt', '3.txt', '2.txt', '1.txt'],
+                    [record.filename for record in
+                     self.db_helper.iter_report_records(run_id, page_size=2)])
+
+    def test_returns_false_if_run_statistics_wrong(self):
+        run_id = self.add_moves(3)
+        self.db_helper.alter_path({'accepted': False}, {'source': '/src/0.txt', 'run_id': run_id})
+        statistics = self.db_helper.get_run_statistics(run_id)
+        with self.subTest(1):
+            compare((run_id, 3, 1), statistics[:3])
+        with self.subTest(2):
+            self.assertLessEqual(statistics.started_at, statistics.finished_at)
+        with self.subTest(3):
+            compare(None, self.db_helper.get_run_statistics(run_id + 1))
+
+    def test_returns_false_if_path_not_altered(self):
+        run_id = self.add_moves(2)
+        added_at = self.db_helper.get_report(run_id)[0][3]
+        self.db_helper.alter_path({'accepted': False}, {
+            'source': '/src/1.txt', 'destination': '/dst/TXT/1.txt', 'added_at': added_at})
+        history = self.db_helper.get_history(10)
+        with self.subTest(1):
+            compare(['0.txt'], [record.filename for record in history])
+        with self.subTest(2):
+            compare(('/src/0.txt', '/dst/TXT/0.txt'),
+                    (history[0].original_location, history[0].current_location))
+
+    def test_returns_false_if_history_error_swallowed(self):
+        self.db_helper.connection.execute('DROP TABLE "data_path"')
+        with LogCapture('slib.helpers') as log:
+            self.assertRaises(sqlite3.OperationalError, self.db_helper.get_history_page, 10)
+        compare(True, 'Reading the history' in str(log))
+
+    def test_returns_false_if_other_scopes_kept(self):
+        state = FolderState(1, 2, 3)
+        for scope, source in [('a', '/src'), ('b', '/other'), ('c', '/src')]:
+            index = FolderIndex()
+            index.visited['{}/folder'.format(source)] = state
+            self.db_helper.save_folder_index(scope, index, source)
+        data = [
+            # (scope, states)
+            ('a', {}),
+            ('b', {'/other/folder': state}),
+            ('c', {'/src/folder': state}),
+        ]
+        for scope, states in data:
+            with self.subTest(scope):
+                compare(states, self.db_helper.get_folder_index(scope).states)
+
+    def test_returns_false_if_unknown_column_accepted(self):
+        self.assertRaises(ValueError, self.db_helper.alter_path,
+                          {'accepted; DROP TABLE data_path': False}, {'id': 1})
+
+
+class TestDatabaseFileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory()
+        self.DB_NAME = os.path.join(self.temp.path, 'operations.db')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_returns_false_if_unversioned_database_not_read(self):
+        connection = sqlite3.connect(self.DB_NAME)
+        connection.execute('CREATE TABLE "data_file" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "filename" text NOT NULL, "filepath_hash" text NOT NULL, "last_modified" datetime NOT NULL, "added_at" datetime NOT NULL)')
+        connection.execute('CREATE TABLE "data_path" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "source" text NOT NULL, "destination" text NOT NULL, "accepted" bool NOT NULL, "added_at" datetime NOT NULL, "filename_id" integer NOT NULL REFERENCES "data_file" ("id"))')
+        connection.execute("INSERT INTO data_file VALUES (1, 'a.txt', 'x', '2018-01-01 10:00:00', '2018-01-02 10:00:00.123456')")
+        connection.execute("INSERT INTO data_path VALUES (1, '/src/a.txt', '/dst/a.txt', 1, '2018-01-02 10:00:00.123456', 1)")
+        connection.commit()
+        connection.close()
+        db_helper = DatabaseHelper(self.DB_NAME)
+        db_helper.initialise_db()
+        with self.subTest(1):
+            compare(SCHEMA_VERSION, db_helper.get_schema_version())
+        with self.subTest(2):
+            compare([(1, 'a.txt', '/src/a.txt', '/dst/a.txt')], db_helper.get_history(10))
+
+    def test_returns_false_if_newer_schema_accepted(self):
+        connection = sqlite3.connect(self.DB_NAME)
+        connection.execute('PRAGMA user_version = {}'.format(SCHEMA_VERSION + 1))
+        connection.close()
+        self.assertRaises(SchemaVersionError, DatabaseHelper(self.DB_NAME).initialise_db)
+
+    def test_returns_false_if_write_ahead_log_left(self):
+        db_helper = DatabaseHelper(self.DB_NAME)
+        db_helper.initialise_db()
+        db_helper.start_run('/src', '/dst')
+        with self.subTest(1):
+            compare(True, os.path.exists(self.DB_NAME + '-wal'))
+        db_helper.delete_db()
+        with self.subTest(2):
+            compare([], os.listdir(self.temp.path))
+        db_helper.initialise_db()
+        with self.subTest(3):
+            compare(None, db_helper.get_run(1))
+
+
+class TestDatabaseIndexesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.db_helper = DatabaseHelper(':memory:')
+        self.db_helper.initialise_db()
+
+    def get_plan(self, query, parameters):
+        rows = self.db_helper.connection.execute(
+            'EXPLAIN QUERY PLAN ' + query, parameters).fetchall()
+        return ' '.join(row[-1] for row in rows)
+
+    def test_returns_false_if_undo_scans_table(self):
+        plan = self.get_plan('UPDATE "data_path" SET "accepted" = 0 WHERE "id" = ?', (1,))
+        self.assertIn('INTEGER PRIMARY KEY', plan)
+
+    def test_returns_false_if_unused_index_kept(self):
+        indexes = [row[0] for row in self.db_helper.connection.execute(
+            'SELECT "name" FROM "sqlite_master" WHERE "type" = \'index\' '
+            'AND "tbl_name" = \'data_path\'')]
+        self.assertNotIn('data_path_source_destination_added_at', indexes)
+
+    def test_returns_false_if_history_check_not_covered(self):
+        plan = self.get_plan('SELECT 1 FROM "data_path" WHERE "filename_id" = ? AND "accepted"', (1,))
+        self.assertIn('COVERING INDEX data_path_filename_id_accepted', plan)
+
+
+class TestHistoryPagesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.db_helper = DatabaseHelper(':memory:')
+        self.db_helper.initialise_db()
+        run_id = self.db_helper.start_run('/src', '/dst')
+        with self.db_helper.get_writer(run_id) as writer:
+            for i in range(1, 8):
+                writer.add('{}.txt'.format(i), str(i), datetime(2018, 1, 1),
+                           '/src/{}.txt'.format(i), '/dst/TXT/{}.txt'.format(i))
+        # The file with id 7 is moved again
+        with self.db_helper.connection:
+            self.db_helper.connection.execute(
+                'INSERT INTO data_path (source, destination, accepted, added_at, filename_id) '
+                "VALUES ('/dst/TXT/7.txt', '/dst/document/7.txt', 1, '2018-01-02 00:00:00', 7)")
+        self.db_helper.alter_path({'accepted': False}, {'source': '/src/5.txt'})
+
+    def test_returns_false_if_pages_wrong(self):
+        first = self.db_helper.get_history_page(3)
+        second = self.db_helper.get_history_page(3, before_id=first[-1].id)
+        with self.subTest(1):
+            compare([7, 6, 4], [record.id for record in first])
+        with self.subTest(2):
+            compare([3, 2, 1], [record.id for record in second])
+        with self.subTest(3):
+            compare(('/src/7.txt', '/dst/document/7.txt'),
+                    (first[0].original_location, first[0].current_location))
+
+    def test_returns_false_if_iteration_wrong(self):
+        data = [
+            (None, [7, 6, 4, 3, 2, 1]),
+            (4, [7, 6, 4, 3]),
+            (10, [7, 6, 4, 3, 2, 1]),
+        ]
+        for count, expected in data:
+            with self.subTest(count):
+                compare(expected, [record.id for record in
+                                   self.db_helper.iter_history(count, page_size=2)])
+
+
+class TestProgressLogTestCase(unittest.TestCase):
+
+    def test_returns_false_if_old_lines_kept(self):
+        log = ProgressLog(maxlen=3)
+        for i in range(5):
+            log.append('{}\n'.format(i))
+        with self.subTest(1):
+            compare(['2\n', '3\n', '4\n'], list(log))
+        with self.subTest(2):
+            compare(3, len(log))
+
+    def test_returns_false_if_listener_not_called_once(self):
+        log = ProgressLog()
+        log.append('old\n')
+        lines = []
+        log.add_listener(lines.append)
+        log.append('one\n')
+        log.append('two\n')
+        log.remove_listener(lines.append)
+        log.append('three\n')
+        compare(['one\n', 'two\n'], lines)
@@ -0,0 +1,58 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+import sqlite3
+from datetime import datetime
+from testfixtures import TempDirectory, compare
+from slib.helpers import DatabaseHelper
+from slib.history import HistoryWriter
+
+
+class TestHistoryWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory()
+        self.DB_NAME = os.path.join(self.temp.path, 'operations.db')
+        DatabaseHelper(self.DB_NAME).initialise_db()
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def query(self, sql):
+        connection = sqlite3.connect(self.DB_NAME)
+        try:
+            return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def add_moves(self, writer, count):
+        for i in range(count):
+            source = os.path.join(self.temp.path, 'src', str(i), 'abc.txt')
+            destination = os.path.join(self.temp.path, 'dst', 'abc - dup ({}).txt'.format(i))
+            writer.add('abc.txt', str(i), datetime.now(), source, destination)
+
+    def test_returns_false_if_same_names_overwritten(self):
+        with HistoryWriter(self.DB_NAME) as writer:
+            self.add_moves(writer, 3)
+        rows = self.query('SELECT data_file.filepath_hash, data_path.source FROM data_path '
+                          'JOIN data_file ON data_file.id = data_path.filename_id '
+                          'ORDER BY data_path.id')
+        compare([(str(i), os.path.join(self.temp.path, 'src', str(i), 'abc.txt'))
+                 for i in range(3)], rows)
+
+    def test_returns_false_if_not_flushed_in_batches(self):
+        writer = HistoryWriter(self.DB_NAME, batch_size=4)
+        self.add_moves(writer, 10)
+        with self.subTest(1):
+            compare(8, writer.count)
+        with self.subTest(2):
+            compare([(8,)], self.query('SELECT COUNT(*) FROM data_path'))
+        writer.close()
+        with self.subTest(3):
+            compare([(10,)], self.query('SELECT COUNT(*) FROM data_path'))
+
+    def test_returns_false_if_not_wal(self):
+        with HistoryWriter(self.DB_NAME) as writer:
+            self.add_moves(writer, 1)
+        compare([('wal',)], self.query('PRAGMA journal_mode'))
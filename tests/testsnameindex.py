@@ -0,0 +1,78 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+from testfixtures import TempDirectory, compare
+from slib.nameindex import NameIndex
+from slib.planner import MovePlanner
+from slib.sdir import File
+
+
+class TestNameIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+        self.dst = self.temp.makedir('dst')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_returns_false_if_duplicate_counter_wrong(self):
+        self.temp.write('dst/one.txt', '')
+        self.temp.write('dst/one - dup (2).txt', '')
+        file_instance = File(self.temp.write('src/one.txt', ''))
+        index = NameIndex()
+        names = [index.claim(self.dst, file_instance)[0] for _ in range(3)]
+        compare(['one - dup (1).txt', 'one - dup (3).txt', 'one - dup (4).txt'], names)
+
+    def test_returns_false_if_free_name_renamed(self):
+        file_instance = File(self.temp.write('src/one.txt', ''))
+        compare(('one.txt', 'none'), NameIndex().claim(self.dst, file_instance))
+
+    def test_returns_false_if_skip_policy_moves(self):
+        self.temp.write('dst/one.txt', '')
+        file_instance = File(self.temp.write('src/one.txt', ''))
+        compare((None, 'skip'), NameIndex('skip').claim(self.dst, file_instance))
+
+    def test_returns_false_if_overwrite_policy_ignores_age(self):
+        existing = self.temp.write('dst/one.txt', '')
+        mtime = os.path.getmtime(existing)
+        file_instance = File(self.temp.write('src/one.txt', ''))
+        index = NameIndex('overwrite')
+        with self.subTest(1):
+            compare((None, 'skip'), index.claim(self.dst, file_instance, mtime - 10))
+        with self.subTest(2):
+            compare(('one.txt', 'overwrite'), index.claim(self.dst, file_instance, mtime + 10))
+
+    def test_returns_false_if_forgotten_folder_not_listed(self):
+        file_instance = File(self.temp.write('src/one.txt', ''))
+        index = NameIndex()
+        index.claim(self.dst, file_instance)
+        self.temp.write('dst/two.txt', '')
+        other = File(self.temp.write('src/two.txt', ''))
+        with self.subTest(1):
+            compare(('two.txt', 'none'), index.claim(self.dst, other))
+        index.forget(self.dst)
+        with self.subTest(2):
+            compare(('two - dup (1).txt', 'rename'), index.claim(self.dst, other))
+
+    def test_returns_false_if_unknown_policy_accepted(self):
+        self.assertRaises(ValueError, NameIndex, 'merge')
+
+    def test_returns_false_if_skipped_files_planned(self):
+        self.temp.write('dst/TXT/one.txt', '')
+        self.temp.write('src/one.txt', '')
+        self.temp.write('src/two.txt', '')
+        planner = MovePlanner(name_index=NameIndex('skip'))
+        plan = planner.plan_files(os.path.join(self.tempdir, 'src'), self.dst)
+        with self.subTest(1):
+            compare(['two.txt'], [os.path.basename(move.destination) for move in plan])
+        with self.subTest(2):
+            compare(['one.txt'], [os.path.basename(move.source) for move in plan.skipped])
+
+    def test_returns_false_if_move_to_ignores_index(self):
+        self.temp.write('dst/TXT/one.txt', '')
+        file_instance = File(self.temp.write('src/one.txt', ''))
+        file_instance.move_to(self.dst, by_extension=True, name_index=NameIndex('skip'))
+        compare(os.path.join(self.tempdir, 'src', 'one.txt'), file_instance.path)
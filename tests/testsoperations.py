@@ -3,14 +3,20 @@
 import unittest
 import os
 import hashlib
+from unittest import mock
 from slib.operations import SorterOps
+from slib.progress import ProgressAggregator
+from slib.nameindex import _FolderNames
 from slib.helpers import DatabaseHelper
 from testfixtures import compare, TempDirectory
 from tests.some_files import many_files, few_files
-from data.settings import DATABASES, SORTER_FOLDER_IDENTITY_FILENAME, SORTER_IGNORE_FILENAME
+from data.settings import DB_NAME, SORTER_FOLDER_IDENTITY_FILENAME, SORTER_IGNORE_FILENAME
 from datetime import datetime
 
-DB_NAME = DATABASES['default']['NAME']
+
+def unthrottled_aggregator(send_message):
+    """Return a ProgressAggregator passing every message on."""
+    return ProgressAggregator(send_message, frame_rate=float('inf'))
 
 
 class TestOperationsTestCase(unittest.TestCase):
@@ -47,7 +53,7 @@ class TestOperationsTestCase(unittest.TestCase):
         with self.subTest(1):
             compare(None, self.operations.parser)
         with self.subTest(1):
-            compare({}, self.operations.database_dict)
+            compare(None, self.operations.history)
 
     def test_returns_false_if_search_string_pattern_not_match(self):
         search_string = 'one common 2 $ word'
@@ -249,14 +255,15 @@ class TestOperationsTestCase(unittest.TestCase):
         path = self.temp.write('one/three/abc.txt', '')
         hash_path = hashlib.md5(path.encode('utf-8')).hexdigest()
         self.operations.db_helper.initialise_db(test=True)
-        obj = self.operations.db_helper.db_file_objects.create(
-            filename='abc.txt', filepath_hash=hash_path,
-            last_modified=datetime.now(), added_at=datetime.now())
+        run_id = self.operations.db_helper.start_run(self.tempdir, self.tempdir)
+        with self.operations.db_helper.get_writer(run_id) as writer:
+            writer.add('abc.txt', hash_path, datetime.now(), path,
+                       os.path.join(self.tempdir, 'TXT', 'abc.txt'))
         with self.subTest(1):
-            compare(1, obj.id)
-        count = self.operations.db_helper.db_file_objects.count()
+            compare(1, run_id)
+        report = self.operations.db_helper.get_report(run_id)
         with self.subTest(2):
-            compare(1, count)
+            compare(1, len(report))
 
     def test_returns_false_false_if_start_fails(self):
         def messenger(*args, **kwargs):
@@ -477,3 +484,165 @@ class TestOperationsTestCase(unittest.TestCase):
         with self.subTest(2):
             compare([False, False, False], [os.path.isdir(dir_3),
                                             os.path.isdir(dir_4), os.path.isdir(dir_5)])
+
+    def test_returns_false_if_parallel_start_differs(self):
+        def messenger(*args, **kwargs):
+            pass
+        dir_1 = self.temp.makedir('one/two')
+        dir_2 = self.temp.makedir('three/two')
+        self.add_files_to_path(dir_1, 'many')
+        kwargs = {
+            'group': True,
+            'by_extension': True,
+            'recursive': False,
+            'workers': 4,
+        }
+        self.db_helper.initialise_db(test=True)
+        statistics = self.operations.start(src=dir_1, dst=dir_2,
+                                           send_message=messenger, **kwargs)
+        moved = [i for i in os.listdir(dir_1) if os.path.isfile(os.path.join(dir_1, i))]
+        with self.subTest(1):
+            compare(['.directory', '.~lock.Giant.docx#'], sorted(moved))
+        with self.subTest(2):
+            compare(True, statistics.moved > 0)
+        with self.subTest(3):
+            compare(True, os.path.isfile(os.path.join(
+                dir_2, 'image', 'JPG', 'SUSE_Geeko_plush_toy.jpg')))
+
+    def test_returns_false_if_cancelled_start_continues(self):
+        def messenger(*args, **kwargs):
+            if 'Moved ' in kwargs.get('msg', ''):
+                self.operations.cancel()
+        dir_1 = self.temp.makedir('one/two')
+        self.add_files_to_path(dir_1, 'many')
+        self.db_helper.initialise_db(test=True)
+        # Every message is passed on, so that the first move cancels
+        with mock.patch('slib.operations.ProgressAggregator', unthrottled_aggregator):
+            statistics = self.operations.start(src=dir_1, dst=dir_1, send_message=messenger,
+                                               file_types=['*'], group=False)
+        with self.subTest(1):
+            compare(True, self.operations.cancelled)
+        with self.subTest(2):
+            compare(1, statistics.moved)
+        dir_2 = os.path.dirname(self.temp.write('three/abc.txt', ''))
+        statistics = self.operations.start(src=dir_2, dst=dir_2,
+                                           send_message=lambda **kwargs: None)
+        with self.subTest(3):
+            compare(1, statistics.moved)
+        with self.subTest(4):
+            compare(False, self.operations.cancelled)
+
+    def test_returns_false_if_watched_files_not_sorted(self):
+        self.temp.write('src/a.txt', '')
+        src = os.path.join(self.tempdir, 'src')
+        dst = self.temp.makedir('dst')
+        self.db_helper.initialise_db(test=True)
+        sorted_files = []
+
+        def on_sorted(moves):
+            sorted_files.extend(os.path.basename(move.destination) for move in moves)
+            if 'b.jpg' in sorted_files:
+                self.operations.cancel()
+            else:
+                self.temp.write('src/b.jpg', '')
+        run_id = self.operations.watch(src, dst, lambda **kwargs: None, on_sorted=on_sorted,
+                                       settle=0.1, polling=True, group=True)
+        with self.subTest(1):
+            compare(['a.txt', 'b.jpg'], sorted_files)
+        with self.subTest(2):
+            self.temp.compare(['document/', 'document/.signore', 'document/.sorter',
+                               'document/a.txt', 'image/', 'image/.signore',
+                               'image/.sorter', 'image/b.jpg'], path=dst)
+        with self.subTest(3):
+            compare(2, len(list(self.db_helper.iter_report_records(run_id))))
+        with self.subTest(4):
+            compare(None, self.operations.watcher)
+
+    def test_returns_false_if_destination_listed_per_batch(self):
+        self.temp.write('src/a.txt', '')
+        src = os.path.join(self.tempdir, 'src')
+        dst = self.temp.makedir('dst')
+        self.db_helper.initialise_db(test=True)
+        sorted_files = []
+
+        def on_sorted(moves):
+            sorted_files.extend(os.path.basename(move.destination) for move in moves)
+            if 'b.txt' in sorted_files:
+                self.operations.cancel()
+            else:
+                self.temp.write('src/b.txt', '')
+        with mock.patch('slib.nameindex._FolderNames', wraps=_FolderNames) as folder_names:
+            self.operations.watch(src, dst, lambda **kwargs: None, on_sorted=on_sorted,
+                                  settle=0.1, polling=True, group=True)
+        with self.subTest(1):
+            compare(['a.txt', 'b.txt'], sorted_files)
+        with self.subTest(2):
+            compare([mock.call(os.path.join(dst, 'document'))], folder_names.call_args_list)
+
+    def test_returns_false_if_unchanged_folders_listed(self):
+        src = self.temp.makedir('src')
+        self.temp.write('src/a/one.txt', '')
+        self.temp.write('src/b/c/two.jpg', '')
+        # Hidden files are left alone, so the folders are not removed as empty
+        self.temp.write('src/a/.keep', '')
+        self.temp.write('src/b/c/.keep', '')
+        self.db_helper.initialise_db(test=True)
+        kwargs = {'group': True, 'recursive': True}
+        messages = []
+
+        def messenger(**kwargs):
+            messages.append(kwargs['msg'])
+
+        statistics = self.operations.start(src, src, messenger, **kwargs)
+        with self.subTest(1):
+            compare(2, statistics.moved)
+        with mock.patch('slib.folderindex.RACY_WINDOW_NS', 0), \
+                mock.patch('slib.operations.ProgressAggregator', unthrottled_aggregator):
+            # The first run changed the folders it moved files out of
+            self.operations.start(src, src, messenger, **kwargs)
+            self.temp.write('src/b/c/three.txt', '')
+            del messages[:]
+            statistics = self.operations.start(src, src, messenger, **kwargs)
+        with self.subTest(2):
+            compare([('three.txt', os.path.join(src, 'b', 'c', 'three.txt'),
+                      os.path.join(src, 'document', 'three.txt'))],
+                    [record[1:4] for record in
+                     self.db_helper.iter_report_records(statistics.run_id)])
+        with self.subTest(3):
+            compare(True, any('Skipped' in msg and 'unchanged folders' in msg
+                              for msg in messages))
+        with self.subTest(4):
+            statistics = self.operations.start(src, src, messenger, incremental=False,
+                                               **kwargs)
+            compare(0, statistics.moved)
+
+    def test_returns_false_if_filled_empty_folder_removed(self):
+        src = self.temp.makedir('src')
+        self.temp.makedir('src/TXT')
+        self.temp.write('src/a/one.txt', '')
+        self.db_helper.initialise_db(test=True)
+        statistics = self.operations.start(src, src, lambda **kwargs: None, recursive=True)
+        with self.subTest(1):
+            compare(1, statistics.moved)
+        with self.subTest(2):
+            self.temp.compare(['TXT/', 'TXT/{}'.format(SORTER_FOLDER_IDENTITY_FILENAME),
+                               'TXT/one.txt', 'a/'], path=src)
+
+    def test_returns_false_if_drained_cleanup_failed(self):
+        dst = self.temp.makedir('dst')
+        src = self.temp.makedir('src')
+        self.temp.write('src/a/b/one.txt', '')
+        self.temp.write('src/a/{}'.format(SORTER_IGNORE_FILENAME), '')
+        self.temp.makedir('src/a/empty')
+        self.temp.write('src/untouched/{}'.format(SORTER_FOLDER_IDENTITY_FILENAME), '')
+        self.db_helper.initialise_db(test=True)
+        self.operations.start(src, dst, lambda **kwargs: None, group=True, recursive=True)
+        with self.subTest(1):
+            compare({os.path.join(src, 'a'), os.path.join(src, 'a', 'b')},
+                    self.operations.last_drained)
+        removed = self.operations.cleanup_drained(src)
+        with self.subTest(2):
+            compare([os.path.join(src, 'a', 'b'), os.path.join(src, 'a')], removed)
+        with self.subTest(3):
+            self.temp.compare(['untouched/', 'untouched/{}'.format(
+                SORTER_FOLDER_IDENTITY_FILENAME)], path=src)
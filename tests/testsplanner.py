@@ -0,0 +1,108 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+from testfixtures import TempDirectory, compare
+from slib.planner import MovePlanner
+from data.settings import SORTER_IGNORE_FILENAME, SORTER_FOLDER_IDENTITY_FILENAME
+
+
+class TestMovePlannerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_returns_false_if_plan_touches_disk(self):
+        src = self.temp.makedir('src')
+        dst = self.temp.makedir('dst')
+        self.temp.write('src/one.txt', 'abc')
+        self.temp.write('src/two.jpg', '')
+        plan = MovePlanner(group=True).plan_files(src, dst)
+        with self.subTest(1):
+            compare(sorted([os.path.join(dst, 'document', 'one.txt'),
+                            os.path.join(dst, 'image', 'two.jpg')]),
+                    sorted(move.destination for move in plan))
+        with self.subTest(2):
+            compare(['one.txt', 'two.jpg'], sorted(os.listdir(src)))
+        with self.subTest(3):
+            compare([], os.listdir(dst))
+        with self.subTest(4):
+            compare(3, plan.size)
+
+    def test_returns_false_if_conflicts_not_resolved(self):
+        src = self.temp.makedir('src')
+        dst = self.temp.makedir('dst')
+        self.temp.write('dst/TXT/one.txt', '')
+        self.temp.write('src/a/one.txt', '')
+        self.temp.write('src/b/one.txt', '')
+        plan = MovePlanner().plan_files(src, dst, recursive=True)
+        with self.subTest(1):
+            compare(['one - dup (1).txt', 'one - dup (2).txt'],
+                    sorted(os.path.basename(move.destination) for move in plan))
+        with self.subTest(2):
+            compare(['rename', 'rename'], [move.conflict for move in plan])
+        with self.subTest(3):
+            compare(['file', 'file'], [move.kind for move in plan])
+
+    def test_returns_false_if_empty_folders_not_listed(self):
+        src = self.temp.makedir('src')
+        empty = self.temp.makedir('src/a/empty')
+        self.temp.write('src/a/one.txt', '')
+        plan = MovePlanner().plan_files(src, src, recursive=True)
+        with self.subTest(1):
+            compare([empty], plan.empty_folders)
+        with self.subTest(2):
+            compare([os.path.join(src, 'TXT', 'one.txt')],
+                    [move.destination for move in plan])
+
+    def test_returns_false_if_folders_not_planned(self):
+        src = self.temp.makedir('src')
+        dst = self.temp.makedir('dst')
+        self.temp.write('src/holiday photos/one.jpg', 'ab')
+        self.temp.write('src/holiday ignored/one.jpg', '')
+        self.temp.write('src/holiday ignored/%s' % SORTER_IGNORE_FILENAME, '')
+        self.temp.write('src/holiday.txt', '')
+        planner = MovePlanner(search_pattern='*[hH][oO][lL][iI][dD][aA][yY]')
+        plan = planner.plan_folders(src, dst, group_folder_name='holiday')
+        with self.subTest(1):
+            compare([os.path.join(dst, 'holiday', 'holiday photos')],
+                    [move.destination for move in plan])
+        with self.subTest(2):
+            compare(['folder'], [move.kind for move in plan])
+        with self.subTest(3):
+            compare(2, plan.size)
+
+    @unittest.skipIf(os.name == 'nt', 'Hidden folders start with a dot on UNIX systems only')
+    def test_returns_false_if_hidden_folders_not_pruned(self):
+        src = self.temp.makedir('.src')
+        dst = self.temp.makedir('dst')
+        self.temp.write('.src/one.txt', '')
+        self.temp.write('.src/a/two.txt', '')
+        self.temp.write('.src/.git/three.txt', '')
+        self.temp.write('.src/a/.cache/b/four.txt', '')
+        plan = MovePlanner().plan_files(src, dst, recursive=True)
+        compare(['one.txt', 'two.txt'],
+                sorted(os.path.basename(move.source) for move in plan))
+
+    def test_returns_false_if_sorter_folders_walked(self):
+        src = self.temp.makedir('src')
+        self.temp.write('src/one.txt', '')
+        self.temp.write('src/document/{}'.format(SORTER_FOLDER_IDENTITY_FILENAME), '')
+        self.temp.write('src/document/two.txt', '')
+        self.temp.write('src/a/TXT/{}'.format(SORTER_FOLDER_IDENTITY_FILENAME), '')
+        self.temp.write('src/a/TXT/b/three.txt', '')
+        self.temp.write('src/a/four.txt', '')
+        messages = []
+        plan = MovePlanner(group=True).plan_files(
+            src, src, recursive=True,
+            send_message=lambda **kwargs: messages.append(kwargs['msg']))
+        with self.subTest(1):
+            compare(['four.txt', 'one.txt'],
+                    sorted(os.path.basename(move.source) for move in plan))
+        with self.subTest(2):
+            compare(['Checking directory {}'.format(src),
+                     'Checking directory {}'.format(os.path.join(src, 'a'))], messages)
@@ -0,0 +1,96 @@
+#! /usr/bin/env python3
+
+import unittest
+from testfixtures import compare
+from slib.progress import ProgressAggregator, format_eta
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressAggregatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.messages = []
+        self.clock = Clock()
+        self.progress = ProgressAggregator(self.send_message, frame_rate=10,
+                                           clock=self.clock)
+
+    def send_message(self, **kwargs):
+        self.messages.append(kwargs)
+
+    def test_returns_false_if_events_not_coalesced(self):
+        self.progress.add_total(100, 1000)
+        for i in range(50):
+            self.progress(through=['status'], msg='Moved {}'.format(i), weight=1)
+            self.progress.advance(10)
+        with self.subTest(1):
+            compare(1, len(self.messages))
+        self.clock.now = 0.1
+        self.progress(through=['status'], msg='Moved 50', weight=1)
+        with self.subTest(2):
+            compare(2, len(self.messages))
+        with self.subTest(3):
+            compare((['status', 'progress_bar'], 50), (self.messages[-1]['through'],
+                                                       self.messages[-1]['value']))
+        with self.subTest(4):
+            compare('50% (0:00:00 left) - Moved 50', self.messages[-1]['msg'])
+
+    def test_returns_false_if_percent_wrong(self):
+        data = [
+            # (files done, bytes done, percent)
+            (0, 0, 0),
+            (1, 0, 5),
+            (5, 500, 50),
+            (10, 1000, 100),
+        ]
+        self.progress.add_total(10, 1000)
+        for files, size, percent in data:
+            self.progress.done_files = files
+            self.progress.done_size = size
+            with self.subTest(percent):
+                compare(percent, self.progress.percent)
+
+    def test_returns_false_if_eta_wrong(self):
+        self.progress.add_total(4, 0)
+        with self.subTest(1):
+            compare(None, self.progress.eta)
+        self.clock.now = 10.0
+        self.progress.advance(0)
+        with self.subTest(2):
+            compare(30.0, self.progress.eta)
+        with self.subTest(3):
+            compare('0:00:30', format_eta(self.progress.eta))
+
+    def test_returns_false_if_phase_not_counted_apart(self):
+        self.progress.add_total(2, 0)
+        self.progress.advance(0)
+        self.progress.advance(0)
+        self.progress.start_phase('Folders')
+        with self.subTest(1):
+            compare(100, self.messages[-1]['value'])
+        self.clock.now = 1.0
+        self.progress.add_total(4, 0)
+        self.progress.advance(0)
+        with self.subTest(2):
+            compare(25, self.messages[-1]['value'])
+        with self.subTest(3):
+            compare(True, self.messages[-1]['msg'].startswith('Folders: 25%'))
+
+    def test_returns_false_if_warning_held(self):
+        self.progress(through=['status'], msg='Searching...', weight=1)
+        self.progress(through=['status'], msg='Moved abc.txt', weight=1)
+        self.progress(through=['status', 'dialog'], msg='Failed', weight=2)
+        compare(['Searching...', 'Moved abc.txt', 'Failed'],
+                [message['msg'] for message in self.messages])
+
+    def test_returns_false_if_flush_repeats(self):
+        self.progress(through=['status'], msg='Searching...', weight=1)
+        self.progress.flush()
+        compare(1, len(self.messages))
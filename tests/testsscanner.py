@@ -0,0 +1,57 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+from testfixtures import TempDirectory, compare
+from slib.scanner import Scanner
+from slib.operations import SorterOps
+
+
+class TestScannerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+        for name in ['index.php', 'INDEX2.PHP', 'notes.txt', 'archive.tar.gz',
+                     'song.mp3', 'README', '.hidden.php']:
+            self.temp.write(name, '')
+        self.temp.makedir('folder.php')
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def scan(self, scanner):
+        return sorted(entry.name for entry in scanner.scan(self.tempdir))
+
+    def test_returns_false_if_all_files_not_listed(self):
+        scanner = Scanner(['*'])
+        compare(['INDEX2.PHP', 'README', 'archive.tar.gz', 'index.php',
+                 'notes.txt', 'song.mp3'], self.scan(scanner))
+
+    def test_returns_false_if_extensions_not_case_insensitive(self):
+        scanner = Scanner(['php', 'MP3'])
+        compare(['INDEX2.PHP', 'index.php', 'song.mp3'], self.scan(scanner))
+
+    def test_returns_false_if_multi_dot_extension_not_matched(self):
+        with self.subTest(1):
+            compare(['archive.tar.gz'], self.scan(Scanner(['tar.gz'])))
+        with self.subTest(2):
+            compare(['archive.tar.gz'], self.scan(Scanner(['gz'])))
+
+    def test_returns_false_if_search_pattern_not_applied(self):
+        pattern = SorterOps(None).form_search_pattern('index')
+        with self.subTest(1):
+            compare(['INDEX2.PHP', 'index.php'],
+                    self.scan(Scanner(['*'], pattern)))
+        with self.subTest(2):
+            compare(['INDEX2.PHP', 'index.php'],
+                    self.scan(Scanner(['php'], pattern)))
+        with self.subTest(3):
+            compare([], self.scan(Scanner(['txt'], pattern)))
+        with self.subTest(4):
+            php_pattern = SorterOps(None).form_search_pattern('php')
+            compare([], self.scan(Scanner(['php'], php_pattern)))
+
+    def test_returns_false_if_missing_folder_not_ignored(self):
+        scanner = Scanner(['*'])
+        compare([], list(scanner.scan(os.path.join(self.tempdir, 'missing'))))
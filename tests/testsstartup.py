@@ -0,0 +1,75 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+import sys
+import time
+import subprocess
+from testfixtures import compare
+
+# Seconds, generous enough for slow CI machines
+IMPORT_BUDGET = 1.5
+
+STARTUP_BUDGET = 3.0
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import sorter
+startup = sorter.Startup()
+startup.load_settings()
+startup.load_database_helper()
+startup.load_operations()
+startup.load_gui()
+print(time.perf_counter() - start)
+print('django' in sys.modules)
+"""
+
+
+def has_tkinter():
+    try:
+        import tkinter
+    except ImportError:
+        return False
+    return True
+
+
+def has_display():
+    if not has_tkinter():
+        return False
+    from tkinter import Tk, TclError
+    try:
+        Tk().destroy()
+    except TclError:
+        return False
+    return True
+
+
+class TestStartupTestCase(unittest.TestCase):
+
+    @unittest.skipUnless(has_tkinter(), 'The GUI needs tkinter')
+    def test_returns_false_if_import_budget_exceeded(self):
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_SCRIPT], cwd=PROJECT_ROOT,
+            universal_newlines=True)
+        elapsed, django_loaded = output.split()
+        with self.subTest(1):
+            self.assertLess(float(elapsed), IMPORT_BUDGET)
+        with self.subTest(2):
+            compare('False', django_loaded)
+
+    @unittest.skipUnless(has_display(), 'No display to open windows on')
+    def test_returns_false_if_startup_budget_exceeded(self):
+        import sorter
+        from gui.loader import Loader
+        start = time.perf_counter()
+        startup = sorter.Startup()
+        Loader().load(startup.get_tasks())
+        app = startup.gui_class(operations=startup.operations,
+                                settings=startup.settings.SETTINGS)
+        app.update()
+        elapsed = time.perf_counter() - start
+        app.destroy()
+        self.assertLess(elapsed, STARTUP_BUDGET)
@@ -0,0 +1,126 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+from unittest import mock
+from testfixtures import TempDirectory, compare
+from slib import transfer
+
+
+class TestTransferTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_returns_false_if_same_device_not_renamed(self):
+        src = self.temp.write('one/abc.txt', 'abc')
+        dst = os.path.join(self.tempdir, 'two', 'abc.txt')
+        self.temp.makedir('two')
+        inode = os.stat(src).st_ino
+        with self.subTest(1):
+            compare(True, transfer.same_device(src, dst))
+        transfer.move(src, dst)
+        with self.subTest(2):
+            compare(inode, os.stat(dst).st_ino)
+        with self.subTest(3):
+            compare(False, os.path.exists(src))
+
+    def test_returns_false_if_cross_device_file_not_copied(self):
+        content = 'x' * (transfer.CHUNK_SIZE + 10)
+        src = self.temp.write('one/abc.bin', content)
+        dst = os.path.join(self.temp.makedir('two'), 'abc.bin')
+        messages = []
+
+        def messenger(*args, **kwargs):
+            messages.append(kwargs.get('msg'))
+        with mock.patch('slib.transfer.same_device', return_value=False):
+            transfer.move(src, dst, messenger)
+        with self.subTest(1):
+            compare(False, os.path.exists(src))
+        with self.subTest(2):
+            compare(content, self.temp.read(dst))
+        with self.subTest(3):
+            compare(True, messages[-1].startswith('Copied abc.bin ('))
+
+    def test_returns_false_if_cross_device_folder_not_copied(self):
+        self.temp.write('one/folder/a.txt', 'a')
+        self.temp.write('one/folder/sub/b.txt', 'b')
+        src = os.path.join(self.tempdir, 'one', 'folder')
+        dst = os.path.join(self.temp.makedir('two'), 'folder')
+        with mock.patch('slib.transfer.same_device', return_value=False):
+            transfer.move(src, dst)
+        with self.subTest(1):
+            compare(False, os.path.exists(src))
+        with self.subTest(2):
+            self.temp.compare(['a.txt', 'sub/', 'sub/b.txt'], path=dst)
+
+    def test_returns_false_if_copy_falls_back(self):
+        src = self.temp.write('abc.txt', 'abc')
+        dst = os.path.join(self.tempdir, 'def.txt')
+        with mock.patch('slib.transfer._get_copiers',
+                        return_value=[transfer._read_write]):
+            transfer.copy_file(src, dst)
+        compare('abc', self.temp.read('def.txt'))
+
+    def test_returns_false_if_mismatch_not_detected(self):
+        src = self.temp.write('abc.txt', 'abc')
+        same = self.temp.write('same.txt', 'abc')
+        other = self.temp.write('other.txt', 'abd')
+        with self.subTest(1):
+            compare(True, transfer.verify_copy(src, same))
+        with self.subTest(2):
+            compare(False, transfer.verify_copy(src, other))
+
+    def test_returns_false_if_failed_copy_left_behind(self):
+        src = self.temp.write('abc.txt', 'abc')
+        dst = self.temp.write('dst/abc.txt', 'old')
+        data = [
+            ('mismatch', 'slib.transfer.verify_copy', {'return_value': False},
+             transfer.TransferError),
+            ('error', 'slib.transfer._get_copiers',
+             {'return_value': [mock.Mock(side_effect=OSError(28, 'No space left'))]},
+             OSError),
+        ]
+        for name, target, kwargs, error in data:
+            with self.subTest(name):
+                with mock.patch(target, **kwargs):
+                    with self.assertRaises(error):
+                        transfer.copy_file(src, dst)
+                compare(['abc.txt'], os.listdir(os.path.dirname(dst)))
+                compare('old', self.temp.read('dst/abc.txt'))
+
+    def test_returns_false_if_late_file_overwritten(self):
+        data = [
+            # (same device, overwrite, expected error, content of dst)
+            (True, False, FileExistsError, 'late'),
+            (False, False, FileExistsError, 'late'),
+            (True, True, None, 'abc'),
+            (False, True, None, 'abc'),
+        ]
+        for same, overwrite, error, content in data:
+            src = self.temp.write('src/abc.txt', 'abc')
+            dst = self.temp.write('dst/abc.txt', 'late')
+            with self.subTest((same, overwrite)):
+                with mock.patch('slib.transfer.same_device', return_value=same):
+                    if error is None:
+                        transfer.move(src, dst, overwrite=overwrite)
+                    else:
+                        with self.assertRaises(error):
+                            transfer.move(src, dst, overwrite=overwrite)
+                compare(content, self.temp.read('dst/abc.txt'))
+                compare(['abc.txt'], os.listdir(os.path.dirname(dst)))
+
+    def test_returns_false_if_folder_overwritten(self):
+        src = self.temp.write('src/abc.txt', 'abc')
+        dst = self.temp.makedir('dst/abc.txt')
+        for same in (True, False):
+            with self.subTest(same):
+                with mock.patch('slib.transfer.same_device', return_value=same):
+                    with self.assertRaises(IsADirectoryError):
+                        transfer.move(src, dst, overwrite=True)
+                compare(True, os.path.isdir(dst))
+                compare('abc', self.temp.read('src/abc.txt'))
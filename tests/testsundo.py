@@ -0,0 +1,77 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+from testfixtures import TempDirectory, compare
+from slib.helpers import DatabaseHelper
+from slib.operations import SorterOps
+from slib.undo import RunReverser
+
+
+class TestRunReverserTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+        self.db_helper = DatabaseHelper(':memory:')
+        self.db_helper.initialise_db()
+        self.operations = SorterOps(self.db_helper)
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def sort(self, names, **kwargs):
+        for name in names:
+            self.temp.write(os.path.join('src', name), name)
+        self.temp.makedir('dst/keep')
+        self.operations.start(os.path.join(self.tempdir, 'src'),
+                              os.path.join(self.tempdir, 'dst'),
+                              send_message=lambda **kwargs: None, group=True, **kwargs)
+        return self.operations.last_run_id
+
+    def test_returns_false_if_files_not_restored(self):
+        names = ['a.txt', 'b.txt', 'c.jpg', 'd.mp3']
+        run_id = self.sort(names, workers=4)
+        result = RunReverser(self.db_helper, workers=4).undo_run(run_id)
+        with self.subTest(1):
+            compare(sorted(names), sorted(os.listdir(os.path.join(self.tempdir, 'src'))))
+        with self.subTest(2):
+            compare(['keep'], os.listdir(os.path.join(self.tempdir, 'dst')))
+        with self.subTest(3):
+            compare((4, []), (len(result.undone), result.failed))
+        with self.subTest(4):
+            compare(4, self.db_helper.get_run_statistics(run_id).undone)
+
+    def test_returns_false_if_missing_file_undone(self):
+        run_id = self.sort(['a.txt', 'b.txt'])
+        os.remove(os.path.join(self.tempdir, 'dst', 'document', 'b.txt'))
+        result = self.operations.undo_run(run_id)
+        with self.subTest(1):
+            compare((1, 1), (len(result.undone), len(result.failed)))
+        with self.subTest(2):
+            compare(['a.txt'], os.listdir(os.path.join(self.tempdir, 'src')))
+        with self.subTest(3):
+            compare(1, self.db_helper.get_run_statistics(run_id).undone)
+
+    def test_returns_false_if_taken_location_overwritten(self):
+        run_id = self.sort(['a.txt'])
+        self.temp.write('src/a.txt', 'new')
+        result = self.operations.undo_run(run_id)
+        with self.subTest(1):
+            compare(1, len(result.failed))
+        with self.subTest(2):
+            compare('new', self.temp.read('src/a.txt'))
+        with self.subTest(3):
+            compare(True, os.path.isfile(os.path.join(self.tempdir, 'dst', 'document', 'a.txt')))
+
+    def test_returns_false_if_unselected_file_undone(self):
+        run_id = self.sort(['a.txt', 'b.txt'])
+        selected = set(record.id for record in self.db_helper.iter_report_records(run_id)
+                       if record.filename == 'a.txt')
+        result = self.operations.undo_run(run_id, selected=selected)
+        with self.subTest(1):
+            compare((sorted(selected), []), (result.undone, result.failed))
+        with self.subTest(2):
+            compare(['a.txt'], os.listdir(os.path.join(self.tempdir, 'src')))
+        with self.subTest(3):
+            compare(True, os.path.isfile(os.path.join(self.tempdir, 'dst', 'document', 'b.txt')))
@@ -0,0 +1,159 @@
+#! /usr/bin/env python3
+
+import unittest
+import os
+import time
+import threading
+from testfixtures import TempDirectory, compare
+from slib.watch import FolderWatcher, InotifySource, PollingSource, WatchError, _get_libc
+from slib.scanner import Scanner
+from slib.planner import MovePlanner
+from slib.executor import RunControl
+
+TIMEOUT = 10    # Seconds a test waits for the watcher
+
+
+class TestFolderWatcherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+        # Cleanups run last to first, so the watchers stop before this
+        self.addCleanup(self.temp.cleanup)
+        self.batches = []
+        self.received = threading.Event()
+
+    def on_batch(self, batch):
+        self.batches.append(sorted(os.path.basename(path) for path in batch))
+        for path in batch:
+            os.remove(path)
+        self.received.set()
+
+    def start(self, watcher):
+        thread = threading.Thread(target=watcher.run, args=(self.on_batch,))
+        thread.start()
+        self.addCleanup(watcher.close)
+        self.addCleanup(thread.join, TIMEOUT)
+        self.addCleanup(watcher.stop)
+        return thread
+
+    def get_watcher(self, polling, **kwargs):
+        kwargs.setdefault('settle', 0.2)
+        kwargs.setdefault('batch_delay', 0.1)
+        return FolderWatcher(self.tempdir, Scanner(['*'], ''), polling=polling, **kwargs)
+
+    def check_arrivals(self, polling):
+        self.temp.write('old.txt', 'old')
+        self.temp.makedir('folder')
+        self.start(self.get_watcher(polling))
+        with self.subTest('existing'):
+            self.assertTrue(self.received.wait(TIMEOUT))
+            compare([['old.txt']], self.batches)
+
+        self.received.clear()
+        with open(os.path.join(self.tempdir, 'new.txt'), 'w') as f:
+            f.write('part')
+            f.flush()
+            time.sleep(0.1)
+            f.write('rest')
+        self.temp.write('folder/inner.txt', '')
+        with self.subTest('arrival'):
+            self.assertTrue(self.received.wait(TIMEOUT))
+            compare([['old.txt'], ['new.txt']], self.batches)
+
+    def test_returns_false_if_polling_arrivals_missed(self):
+        self.check_arrivals(polling=True)
+
+    @unittest.skipIf(_get_libc() is None, 'inotify not available')
+    def test_returns_false_if_inotify_arrivals_missed(self):
+        self.check_arrivals(polling=False)
+
+    def test_returns_false_if_incomplete_file_handed_over(self):
+        watcher = self.get_watcher(True, settle=0.5)
+        self.start(watcher)
+        path = os.path.join(self.tempdir, 'growing.txt')
+        with open(path, 'w') as f:
+            for _ in range(6):
+                f.write('x' * 100)
+                f.flush()
+                time.sleep(0.2)
+                with self.subTest(f.tell()):
+                    compare([], self.batches)
+        self.assertTrue(self.received.wait(TIMEOUT))
+        compare([['growing.txt']], self.batches)
+
+    def test_returns_false_if_batch_size_exceeded(self):
+        for i in range(5):
+            self.temp.write('{}.txt'.format(i), '')
+        self.start(self.get_watcher(True, batch_size=2))
+        deadline = time.monotonic() + TIMEOUT
+        while len(self.batches) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        compare([2, 2, 1], [len(batch) for batch in self.batches])
+
+    def test_returns_false_if_stop_ignored(self):
+        data = [
+            ('stop', lambda watcher, control: watcher.stop()),
+            ('cancel', lambda watcher, control: control.cancel()),
+        ]
+        for name, stop in data:
+            control = RunControl()
+            watcher = self.get_watcher(True, control=control)
+            thread = self.start(watcher)
+            stop(watcher, control)
+            thread.join(TIMEOUT)
+            with self.subTest(name):
+                self.assertFalse(thread.is_alive())
+
+    def test_returns_false_if_missing_folder_accepted(self):
+        path = os.path.join(self.tempdir, 'missing')
+        sources = [lambda: PollingSource(path)]
+        if _get_libc() is not None:
+            sources.append(lambda: InotifySource(path))
+        for get_source in sources:
+            with self.subTest(get_source):
+                with self.assertRaises(OSError):
+                    get_source()
+
+    def test_returns_false_if_removed_folder_unnoticed(self):
+        self.temp.makedir('watched')
+        path = os.path.join(self.tempdir, 'watched')
+        watcher = FolderWatcher(path, Scanner(['*'], ''), polling=True)
+        errors = []
+
+        def run():
+            try:
+                watcher.run(self.on_batch)
+            except WatchError as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        time.sleep(0.1)
+        os.rmdir(path)
+        thread.join(TIMEOUT)
+        watcher.close()
+        with self.subTest(1):
+            self.assertFalse(thread.is_alive())
+        with self.subTest(2):
+            compare(1, len(errors))
+
+
+class TestPlanPathsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = TempDirectory(encoding='utf-8')
+        self.tempdir = self.temp.path
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_returns_false_if_paths_not_filtered(self):
+        self.temp.write('a.txt', '')
+        self.temp.write('b.jpg', '')
+        self.temp.makedir('c.txt')
+        planner = MovePlanner(['txt'], group=True)
+        paths = [os.path.join(self.tempdir, name)
+                 for name in ('a.txt', 'b.jpg', 'c.txt', 'gone.txt')]
+        plan = planner.plan_paths(paths)
+        compare([os.path.join(self.tempdir, 'a.txt')], [move.source for move in plan])